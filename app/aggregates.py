@@ -0,0 +1,112 @@
+"""Day-granular country aggregates for the dashboard.
+
+Each day's per-country tone sum and counts are fetched once and kept in
+dense day × country NumPy arrays, so any date range is answered by summing
+rows locally; only days never seen before cost an RPC round trip.
+"""
+
+import threading
+from collections.abc import Callable
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from pipeline.cache import _runs
+
+COLUMNS = ["country_code", "avg_tone", "article_count"]
+
+
+def _days(start_date: date, end_date: date) -> list[date]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+class DailyAggregates:
+    """Cache of per-day (tone_sum, tone_count, article_count) by country."""
+
+    def __init__(self):
+        self.countries: list[str] = []
+        self._country_index: dict[str, int] = {}
+        self._day_index: dict[date, int] = {}
+        self._tone_sum = np.zeros((0, 0))
+        self._tone_count = np.zeros((0, 0), dtype=np.int64)
+        self._article_count = np.zeros((0, 0), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def missing(self, start_date: date, end_date: date) -> list[date]:
+        """Days in the range that have never been fetched."""
+        with self._lock:
+            return [d for d in _days(start_date, end_date) if d not in self._day_index]
+
+    def fill(self, start_date: date, end_date: date, fetch: Callable[[date, date], pd.DataFrame]) -> int:
+        """Fetch and ``add`` the days in the range never fetched.
+
+        Args:
+            fetch: Returns the rows for one inclusive date range; called once
+                per run of consecutive missing days, so cached days in
+                between are not fetched again.
+
+        Returns:
+            Number of ``fetch`` calls made.
+        """
+        runs = _runs(self.missing(start_date, end_date))
+        for run in runs:
+            self.add(run[0], run[-1], fetch(run[0], run[-1]))
+        return len(runs)
+
+    def _grow(self, n_days: int, n_countries: int) -> None:
+        rows = n_days - self._tone_sum.shape[0]
+        cols = n_countries - self._tone_sum.shape[1]
+        if rows or cols:
+            pad = ((0, rows), (0, cols))
+            self._tone_sum = np.pad(self._tone_sum, pad)
+            self._tone_count = np.pad(self._tone_count, pad)
+            self._article_count = np.pad(self._article_count, pad)
+
+    def add(self, start_date: date, end_date: date, rows: pd.DataFrame) -> None:
+        """Store a fetched range; days in it without rows are cached as empty.
+
+        Args:
+            rows: Columns ``published_date``, ``country_code``, ``tone_sum``,
+                ``tone_count`` and ``article_count``.
+        """
+        with self._lock:
+            for code in rows["country_code"].unique() if not rows.empty else []:
+                if code not in self._country_index:
+                    self._country_index[code] = len(self.countries)
+                    self.countries.append(code)
+            for day in _days(start_date, end_date):
+                self._day_index.setdefault(day, len(self._day_index))
+            self._grow(len(self._day_index), len(self.countries))
+
+            # The fetch replaces whatever was cached for these days
+            span = [self._day_index[d] for d in _days(start_date, end_date)]
+            self._tone_sum[span] = 0
+            self._tone_count[span] = 0
+            self._article_count[span] = 0
+
+            if rows.empty:
+                return
+            r = pd.to_datetime(rows["published_date"]).dt.date.map(self._day_index).to_numpy()
+            c = rows["country_code"].map(self._country_index).to_numpy()
+            self._tone_sum[r, c] = rows["tone_sum"].to_numpy(dtype=float)
+            self._tone_count[r, c] = rows["tone_count"].to_numpy(dtype=np.int64)
+            self._article_count[r, c] = rows["article_count"].to_numpy(dtype=np.int64)
+
+    def combine(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """Country-level weighted average tone and article count for the range."""
+        with self._lock:
+            r = [self._day_index[d] for d in _days(start_date, end_date) if d in self._day_index]
+            tone_sum = self._tone_sum[r].sum(axis=0)
+            tone_count = self._tone_count[r].sum(axis=0)
+            article_count = self._article_count[r].sum(axis=0)
+            countries = np.array(self.countries, dtype=object)
+
+        present = article_count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_tone = np.where(tone_count > 0, tone_sum / tone_count, np.nan)
+        return pd.DataFrame({
+            "country_code": countries[present],
+            "avg_tone": avg_tone[present],
+            "article_count": article_count[present],
+        }, columns=COLUMNS)
@@ -0,0 +1,50 @@
+"""Keyset-paginated article browser for a single country.
+
+Pages come from the ``get_country_articles`` RPC. Each request carries the
+sort key and id of the last row already shown, so the database seeks
+straight to the next page and the client never holds more than the pages
+the user has asked for.
+"""
+
+import pandas as pd
+
+SORTS = {"Most recent": "recent", "Most negative": "negative", "Most positive": "positive"}
+PAGE_SIZE = 50
+COLUMNS = ["id", "published_date", "avg_tone", "title", "source_name", "url"]
+
+
+class ArticlePager:
+    """Pages loaded so far for one (country, range, sort, source) query."""
+
+    def __init__(self, country: str, start_date: str, end_date: str, sort: str = "recent", source: str | None = None):
+        self.key = (country, start_date, end_date, sort, source)
+        self.country = country
+        self.start_date = start_date
+        self.end_date = end_date
+        self.sort = sort
+        self.source = source
+        self.rows: list[dict] = []
+        self.exhausted = False
+
+    def params(self) -> dict:
+        """RPC arguments for the next page, continuing after the last loaded row."""
+        params = {
+            "country": self.country,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "sort": self.sort,
+            "source": self.source,
+            "page_size": PAGE_SIZE,
+        }
+        if self.rows:
+            last = self.rows[-1]
+            params.update(after_date=last["published_date"], after_tone=last["avg_tone"], after_id=last["id"])
+        return params
+
+    def add_page(self, rows: list[dict]) -> None:
+        self.rows.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            self.exhausted = True
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.rows, columns=COLUMNS)
@@ -0,0 +1,84 @@
+"""Country × period sentiment cube for the animated heatmap.
+
+The ``get_sentiment_matrix`` RPC returns every (period, country) cell of a
+range in one index-encoded JSON payload; this module unpacks it into dense
+NumPy arrays and builds the long frame Plotly needs for all animation
+frames at once.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+BUCKET_DAYS = {"day": 1, "week": 7}
+
+
+def period_axis(start_date: date, end_date: date, bucket: str) -> np.ndarray:
+    """Contiguous period starts covering the range (weeks start on Monday)."""
+    if bucket == "week":
+        start_date -= timedelta(days=start_date.weekday())
+    step = np.timedelta64(BUCKET_DAYS[bucket], "D")
+    return np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1, step)
+
+
+class SentimentCube:
+    """Dense (period, country) arrays of tone sums and counts."""
+
+    def __init__(self, periods: np.ndarray, countries: np.ndarray,
+                 tone_sum: np.ndarray, tone_count: np.ndarray, article_count: np.ndarray):
+        self.periods = periods
+        self.countries = countries
+        self.tone_sum = tone_sum
+        self.tone_count = tone_count
+        self.article_count = article_count
+
+    @classmethod
+    def from_payload(cls, payload: dict, start_date: date, end_date: date, bucket: str) -> "SentimentCube":
+        """Unpack an index-encoded ``get_sentiment_matrix`` response."""
+        periods = period_axis(start_date, end_date, bucket)
+        countries = np.array(payload.get("countries") or [], dtype=object)
+        shape = (len(periods), len(countries))
+        tone_sum = np.zeros(shape)
+        tone_count = np.zeros(shape, dtype=np.int64)
+        article_count = np.zeros(shape, dtype=np.int64)
+
+        if len(countries):
+            # Map the payload's (sparse) period list onto the contiguous axis
+            payload_periods = np.array(payload["periods"], dtype="datetime64[D]")
+            rows = np.searchsorted(periods, payload_periods)[np.asarray(payload["period_index"], dtype=np.int64)]
+            cols = np.asarray(payload["country_index"], dtype=np.int64)
+            tone_sum[rows, cols] = payload["tone_sum"]
+            tone_count[rows, cols] = payload["tone_count"]
+            article_count[rows, cols] = payload["article_count"]
+        return cls(periods, countries, tone_sum, tone_count, article_count)
+
+    def smoothed(self, window: int) -> "SentimentCube":
+        """Trailing rolling window over periods, weighting each period by its counts."""
+        if window <= 1:
+            return self
+
+        def rolling(values: np.ndarray) -> np.ndarray:
+            cumsum = np.cumsum(values, axis=0)
+            out = cumsum.copy()
+            out[window:] -= cumsum[:-window]
+            return out
+
+        return SentimentCube(
+            self.periods, self.countries,
+            rolling(self.tone_sum), rolling(self.tone_count), rolling(self.article_count),
+        )
+
+    def avg_tone(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.tone_count > 0, self.tone_sum / self.tone_count, np.nan)
+
+    def to_long(self) -> pd.DataFrame:
+        """One row per non-empty (period, country) cell, ordered by period."""
+        rows, cols = np.nonzero(self.article_count > 0)
+        return pd.DataFrame({
+            "period": self.periods[rows].astype(str),
+            "country_code": self.countries[cols],
+            "avg_tone": self.avg_tone()[rows, cols],
+            "article_count": self.article_count[rows, cols],
+        })
@@ -10,6 +10,12 @@ import pandas as pd
 from datetime import date, timedelta
 from supabase import create_client
 
+from app.aggregates import DailyAggregates
+from app.drilldown import SORTS, ArticlePager
+from app.matrix import SentimentCube
+from config.settings import SHIFT_MIN_ARTICLES, SHIFT_Z_THRESHOLD
+from pipeline.data_version import read_data_version
+
 st.set_page_config(page_title="AI Sentiment Heatmap", layout="wide")
 
 
@@ -28,49 +34,111 @@ def get_supabase_client():
     return create_client(url, key)
 
 
-@st.cache_data(ttl=3600)
-def fetch_sentiment(start_date: str, end_date: str) -> pd.DataFrame:
+# Query results below are cached without expiry, keyed by the pipeline's
+# data version, which is re-read at most this often
+VERSION_CHECK_SECONDS = 60
+# Cached results kept per function, across ranges and data versions
+CACHE_ENTRIES = 128
+
+
+@st.cache_data(ttl=VERSION_CHECK_SECONDS)
+def get_data_version() -> int:
+    """The data version published by the last pipeline run that changed data."""
+    return read_data_version(get_supabase_client()) or 0
+
+
+@st.cache_resource(max_entries=1)
+def get_daily_aggregates(version: int) -> DailyAggregates:
+    return DailyAggregates()
+
+
+def fetch_sentiment(start_date: date, end_date: date, version: int) -> pd.DataFrame:
+    """Country aggregates for the range, fetching only days not yet cached."""
+    cache = get_daily_aggregates(version)
+
+    def fetch(first: date, last: date) -> pd.DataFrame:
+        response = get_supabase_client().rpc(
+            "get_daily_sentiment_by_country",
+            {"start_date": first.isoformat(), "end_date": last.isoformat()},
+        ).execute()
+        return pd.DataFrame(response.data or {})
+
+    cache.fill(start_date, end_date, fetch)
+    return cache.combine(start_date, end_date)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def fetch_matrix(start_date: date, end_date: date, bucket: str, version: int) -> dict:
+    """Whole country × period matrix for the range in a single RPC call."""
     client = get_supabase_client()
     response = client.rpc(
-        "get_sentiment_by_country",
-        {"start_date": start_date, "end_date": end_date},
+        "get_sentiment_matrix",
+        {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "bucket": bucket},
     ).execute()
-    if response.data:
-        return pd.DataFrame(response.data)
-    return pd.DataFrame(columns=["country_code", "avg_tone", "article_count"])
+    return response.data or {}
 
 
-# --- Sidebar ---
-st.sidebar.title("Filters")
-today = date.today()
-default_start = today - timedelta(days=30)
-min_date = today - timedelta(days=365)
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def fetch_theme_sentiment(start_date: date, end_date: date, theme: str, version: int) -> pd.DataFrame:
+    """Country aggregates for the range over articles tagged with one GKG theme."""
+    client = get_supabase_client()
+    response = client.rpc(
+        "get_sentiment_by_country_and_theme",
+        {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "theme": theme},
+    ).execute()
+    return pd.DataFrame(response.data or [], columns=["country_code", "avg_tone", "article_count"])
 
-start_date = st.sidebar.date_input("Start date", value=default_start, min_value=min_date, max_value=today)
-end_date = st.sidebar.date_input("End date", value=today, min_value=min_date, max_value=today)
 
-if start_date > end_date:
-    st.sidebar.error("Start date must be before end date.")
-    st.stop()
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def fetch_grid(start_date: date, end_date: date, cell_deg: float, bounds: tuple[float, float, float, float], version: int) -> pd.DataFrame:
+    """Pre-aggregated lat/lon grid cells inside ``bounds`` (min_lat, max_lat, min_lon, max_lon)."""
+    min_lat, max_lat, min_lon, max_lon = bounds
+    client = get_supabase_client()
+    response = client.rpc(
+        "get_sentiment_grid",
+        {
+            "start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "cell_deg": cell_deg,
+            "min_lat": min_lat, "max_lat": max_lat, "min_lon": min_lon, "max_lon": max_lon,
+        },
+    ).execute()
+    payload = response.data or {}
+    return pd.DataFrame({k: payload.get(k, []) for k in ("latitude", "longitude", "avg_tone", "article_count")})
 
-# --- Data ---
-df = fetch_sentiment(start_date.isoformat(), end_date.isoformat())
 
-# --- Header ---
-st.title("AI Sentiment Heatmap")
-st.caption(f"Showing data from {start_date} to {end_date}")
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def fetch_adm1(start_date: date, end_date: date, country: str | None, version: int) -> pd.DataFrame:
+    """ADM1 region aggregates for the range, optionally within one country."""
+    client = get_supabase_client()
+    response = client.rpc(
+        "get_sentiment_by_adm1",
+        {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "country": country},
+    ).execute()
+    payload = response.data or {}
+    return pd.DataFrame({k: payload.get(k, []) for k in ("adm1_code", "country_code", "avg_tone", "article_count")})
 
-# --- Metrics ---
-if not df.empty:
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Countries", len(df))
-    col2.metric("Total Articles", int(df["article_count"].sum()))
-    col3.metric("Global Avg Tone", f"{df['avg_tone'].mean():.2f}")
-else:
-    st.info("No data available for the selected date range.")
-    st.stop()
 
-# --- Choropleth ---
+ALERT_COLUMNS = ("country_code", "as_of", "window_days", "mean_tone", "baseline_mean", "z_score", "tone_count")
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES)
+def fetch_shift_alerts(start_date: date, end_date: date, version: int) -> pd.DataFrame:
+    """Tone shift alerts detected by the pipeline for windows ending in the range, strongest first."""
+    client = get_supabase_client()
+    response = client.rpc(
+        "get_shift_alerts", {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    ).execute()
+    payload = response.data or {}
+    return pd.DataFrame({k: payload.get(k, []) for k in ALERT_COLUMNS})
+
+
+def load_article_page(pager: ArticlePager) -> None:
+    """Fetch the next keyset page of the drill-down query into ``pager``."""
+    client = get_supabase_client()
+    response = client.rpc("get_country_articles", pager.params()).execute()
+    pager.add_page(response.data or [])
+
+
+# --- Map constants ---
 # GDELT uses FIPS 10-4 country codes; Plotly needs ISO-3166-1 alpha-3
 FIPS_TO_ISO3 = {
     "AF": "AFG", "AL": "ALB", "AG": "DZA", "AO": "AGO", "AC": "ATG",
@@ -114,8 +182,151 @@ FIPS_TO_ISO3 = {
     "ZA": "ZMB", "ZI": "ZWE",
 }
 
-df["iso3"] = df["country_code"].map(FIPS_TO_ISO3)
-df_mapped = df.dropna(subset=["iso3"])
+# Regions view: name -> ((min_lat, max_lat, min_lon, max_lon), grid cell size in degrees).
+# Cell sizes must be among grid_cell_sizes() in setup_supabase.sql.
+REGIONS = {
+    "World": ((-90, 90, -180, 180), 5),
+    "North America": ((10, 75, -170, -50), 1),
+    "South America": ((-57, 13, -92, -32), 1),
+    "Europe": ((34, 72, -25, 45), 1),
+    "Africa": ((-36, 38, -20, 53), 1),
+    "Middle East": ((12, 42, 25, 63), 1),
+    "Asia": ((-11, 56, 60, 150), 1),
+    "Oceania": ((-48, 0, 110, 180), 1),
+    "Bay Area": ((36.5, 38.75, -123.5, -121), 0.25),
+    "Northeast US": ((38, 43.5, -78, -69), 0.25),
+    "London & South East": ((50.5, 52.5, -2, 1.75), 0.25),
+}
+
+COLOR_SCALE = [
+    [0.0, "#d73027"],    # -5  strong red
+    [0.15, "#f46d43"],   # -3.5
+    [0.25, "#fdae61"],   # -2.5
+    [0.35, "#fee08b"],   # -1.5
+    [0.45, "#ffffbf"],   # -0.5
+    [0.55, "#d9ef8b"],   #  0.5
+    [0.65, "#a6d96a"],   #  1.5
+    [0.75, "#66bd63"],   #  2.5
+    [0.85, "#1a9850"],   #  3.5
+    [1.0, "#006837"],    #  5   strong green
+]
+
+
+def _iso3(df: pd.DataFrame) -> pd.DataFrame:
+    """Add Plotly's ISO-3 codes and drop countries without one."""
+    df["iso3"] = df["country_code"].map(FIPS_TO_ISO3)
+    return df.dropna(subset=["iso3"])
+
+
+# --- Sidebar ---
+st.sidebar.title("Filters")
+today = date.today()
+default_start = today - timedelta(days=30)
+min_date = today - timedelta(days=365)
+
+start_date = st.sidebar.date_input("Start date", value=default_start, min_value=min_date, max_value=today)
+end_date = st.sidebar.date_input("End date", value=today, min_value=min_date, max_value=today)
+
+if start_date > end_date:
+    st.sidebar.error("Start date must be before end date.")
+    st.stop()
+
+# Cached results stay valid until the pipeline publishes new data
+version = get_data_version()
+
+view = st.sidebar.radio("View", ["Map", "Animated", "Regions"], horizontal=True)
+
+# --- Sub-national grid and ADM1 regions ---
+if view == "Regions":
+    region = st.sidebar.selectbox("Region", list(REGIONS))
+    country = st.sidebar.text_input("ADM1 country", placeholder="FIPS code, e.g. US").strip().upper() or None
+    bounds, cell_deg = REGIONS[region]
+
+    st.title("AI Sentiment Heatmap")
+    st.caption(f"{region} in {cell_deg}° cells from {start_date} to {end_date}")
+
+    cells = fetch_grid(start_date, end_date, cell_deg, bounds, version)
+    if cells.empty:
+        st.info("No located articles in this region for the selected date range.")
+    else:
+        fig = px.scatter_geo(
+            cells,
+            lat="latitude",
+            lon="longitude",
+            color="avg_tone",
+            size="article_count",
+            hover_data={"article_count": True, "avg_tone": ":.2f", "latitude": ":.2f", "longitude": ":.2f"},
+            color_continuous_scale=COLOR_SCALE,
+            range_color=[-5, 5],
+            title="Average Sentiment by Grid Cell",
+        )
+        min_lat, max_lat, min_lon, max_lon = bounds
+        fig.update_geos(
+            lataxis_range=[min_lat, max_lat], lonaxis_range=[min_lon, max_lon],
+            showcountries=True, showcoastlines=True, projection_type="natural earth",
+        )
+        fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("ADM1 regions")
+    regions = fetch_adm1(start_date, end_date, country, version)
+    st.dataframe(regions.sort_values("article_count", ascending=False), use_container_width=True)
+    st.stop()
+
+# --- Animated heatmap ---
+if view == "Animated":
+    bucket = st.sidebar.selectbox("Frame", ["day", "week"], format_func=str.capitalize)
+    window = st.sidebar.slider("Rolling window (frames)", min_value=1, max_value=14, value=1)
+
+    st.title("AI Sentiment Heatmap")
+    st.caption(f"Sentiment over time from {start_date} to {end_date}")
+
+    cube = SentimentCube.from_payload(fetch_matrix(start_date, end_date, bucket, version), start_date, end_date, bucket)
+    frames = _iso3(cube.smoothed(window).to_long())
+    if frames.empty:
+        st.info("No data available for the selected date range.")
+        st.stop()
+
+    fig = px.choropleth(
+        frames,
+        locations="iso3",
+        locationmode="ISO-3",
+        color="avg_tone",
+        animation_frame="period",
+        hover_name="country_code",
+        hover_data={"article_count": True, "avg_tone": ":.2f", "iso3": False},
+        color_continuous_scale=COLOR_SCALE,
+        range_color=[-5, 5],
+        title="Average Sentiment by Country over Time",
+    )
+    fig.update_layout(
+        geo=dict(showframe=False, showcoastlines=True, projection_type="natural earth"),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.stop()
+
+theme = st.sidebar.text_input("Theme", placeholder="e.g. TAX_AI").strip().upper()
+
+# --- Data ---
+df = fetch_theme_sentiment(start_date, end_date, theme, version) if theme else fetch_sentiment(start_date, end_date, version)
+
+# --- Header ---
+st.title("AI Sentiment Heatmap")
+st.caption(f"Showing data from {start_date} to {end_date}" + (f" for theme {theme}" if theme else ""))
+
+# --- Metrics ---
+if not df.empty:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Countries", len(df))
+    col2.metric("Total Articles", int(df["article_count"].sum()))
+    col3.metric("Global Avg Tone", f"{df['avg_tone'].mean():.2f}")
+else:
+    st.info("No data available for the selected date range.")
+    st.stop()
+
+# --- Choropleth ---
+df_mapped = _iso3(df)
 
 fig = px.choropleth(
     df_mapped,
@@ -124,18 +335,7 @@ fig = px.choropleth(
     color="avg_tone",
     hover_name="country_code",
     hover_data={"article_count": True, "avg_tone": ":.2f", "iso3": False},
-    color_continuous_scale=[
-        [0.0, "#d73027"],    # -5  strong red
-        [0.15, "#f46d43"],   # -3.5
-        [0.25, "#fdae61"],   # -2.5
-        [0.35, "#fee08b"],   # -1.5
-        [0.45, "#ffffbf"],   # -0.5
-        [0.55, "#d9ef8b"],   #  0.5
-        [0.65, "#a6d96a"],   #  1.5
-        [0.75, "#66bd63"],   #  2.5
-        [0.85, "#1a9850"],   #  3.5
-        [1.0, "#006837"],    #  5   strong green
-    ],
+    color_continuous_scale=COLOR_SCALE,
     range_color=[-5, 5],
     title="Average Sentiment by Country",
 )
@@ -145,6 +345,38 @@ fig.update_layout(
 )
 st.plotly_chart(fig, use_container_width=True)
 
+# --- Tone shifts ---
+alerts = fetch_shift_alerts(start_date, end_date, version)
+with st.expander(f"Tone shifts ({len(alerts)})"):
+    st.caption(
+        f"7- and 30-day mean tone compared with the 90 days before; |z| of {SHIFT_Z_THRESHOLD:g} "
+        f"or more, with at least {SHIFT_MIN_ARTICLES} toned articles in each."
+    )
+    st.dataframe(alerts, use_container_width=True, hide_index=True)
+
 # --- Raw data ---
 with st.expander("Raw data"):
     st.dataframe(df.sort_values("article_count", ascending=False), use_container_width=True)
+
+# --- Drill-down ---
+st.subheader("Articles")
+col1, col2, col3 = st.columns(3)
+country = col1.selectbox("Country", df.sort_values("article_count", ascending=False)["country_code"])
+sort_label = col2.selectbox("Sort by", list(SORTS))
+source = col3.text_input("Source domain", placeholder="e.g. www.bbc.co.uk").strip() or None
+
+query = (country, start_date.isoformat(), end_date.isoformat(), SORTS[sort_label], source)
+pager = st.session_state.get("article_pager")
+if pager is None or pager.key != query:
+    pager = ArticlePager(*query)
+    st.session_state["article_pager"] = pager
+    load_article_page(pager)
+
+st.dataframe(
+    pager.frame().drop(columns="id"),
+    use_container_width=True,
+    column_config={"url": st.column_config.LinkColumn("url")},
+)
+if not pager.exhausted and st.button("Load more"):
+    load_article_page(pager)
+    st.rerun()
@@ -0,0 +1,41 @@
+"""Benchmark offline GKG file extraction throughput.
+
+Usage: python -m benchmarks.gkg_files_bench [rows] [workers]
+
+Writes ``rows`` synthetic GKG rows as 10,000-row ``.gkg.csv.zip`` files to
+a temporary directory, then reports MB/sec read and keyword-filtered, for
+one file at a time and for ``extract_files`` on a pool of ``workers``.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.synthetic import make_raw, write_gkg_files
+from pipeline.gkg_files import FileStats, extract_files, file_time, read_file
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_gkg_files(make_raw(n), directory)
+        serial = FileStats()
+        for path in paths:
+            serial += read_file(path)[1]
+
+        days = [file_time(p).date() for p in paths]
+        start = time.perf_counter()
+        df = extract_files(directory, min(days, default=date.today()), max(days, default=date.today()), workers=workers)
+        elapsed = time.perf_counter() - start
+
+    mb = serial.uncompressed_bytes / 2**20
+    print(f"rows={n} files={serial.files} matched={len(df)} ({mb:,.1f} MB, {serial.compressed_bytes / 2**20:,.1f} MB zipped)")
+    print(f"one file at a time: {serial.mb_per_sec:,.1f} MB/sec")
+    print(f"{workers} workers:          {mb / elapsed:,.1f} MB/sec")
+
+
+if __name__ == "__main__":
+    main()
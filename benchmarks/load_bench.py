@@ -0,0 +1,48 @@
+"""Benchmark the REST upsert loader against the COPY loader.
+
+Usage: python -m benchmarks.load_bench [rows]
+
+Point DATABASE_URL (and, for the REST path, SUPABASE_URL and
+SUPABASE_SERVICE_ROLE_KEY) at a local Supabase/Postgres, e.g. one started
+with ``supabase start``. Both loaders write the same rows, so the second
+run of each measures the update path of the merge.
+"""
+
+import sys
+import time
+
+from benchmarks.synthetic import make_raw
+from config.settings import DATABASE_URL, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from pipeline.transform import transform
+
+
+def _rows_per_sec(fn, df) -> float:
+    start = time.perf_counter()
+    fn(df)
+    return len(df) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = transform(make_raw(n))
+    print(f"rows={len(df)}")
+
+    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+        from pipeline.load import load
+
+        for label in ("insert", "update"):
+            print(f"rest {label}: {_rows_per_sec(load, df):,.0f} rows/sec")
+    else:
+        print("rest: skipped (SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY not set)")
+
+    if DATABASE_URL:
+        from pipeline.load_pg import load_copy
+
+        for label in ("insert", "update"):
+            print(f"copy {label}: {_rows_per_sec(load_copy, df):,.0f} rows/sec")
+    else:
+        print("copy: skipped (DATABASE_URL not set)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Profile pipeline stages offline, without BigQuery or Supabase.
+
+Usage:
+    python -m benchmarks.profile_stages [--rows 100000] [--seed 0] [--stages transform parse_locations ...]
+    python -m benchmarks.profile_stages --cache-dir .cache/extract --start 2025-06-01 --end 2025-06-07
+    python -m benchmarks.profile_stages --gkg-dir /data/gdeltv2 --start 2025-06-01 --end 2025-06-01
+
+Runs the benchmark suite's stage functions (``benchmarks.suite.STAGES``) on
+seeded synthetic rows, on extract results already in the extract cache,
+or on local GKG files. Each stage runs under ``pipeline.profiling``, exactly
+as ``python -m pipeline.run --profile`` does. The run directory gets the
+same pstats, allocation and collapsed-stack files, plus ``metrics.json``
+with each stage's wall time. The slowest functions of each stage are
+printed.
+"""
+
+import argparse
+import json
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.suite import STAGES
+from benchmarks.synthetic import make_raw
+from config.settings import EXTRACT_CACHE_DIR, EXTRACT_MODE, PROFILE_DIR
+from pipeline.cache import ExtractCache
+from pipeline.extract import _query_text
+from pipeline.gkg_files import extract_files
+from pipeline.metrics import RunMetrics
+from pipeline.profiling import StageProfiler, run_directory
+from pipeline.transform import transform
+
+
+def cached_raw(cache_dir: str, start_date: date, end_date: date, mode: str = EXTRACT_MODE) -> pd.DataFrame:
+    """Raw rows for the range from the extract cache; days not cached are skipped."""
+    cache = ExtractCache(cache_dir, _query_text(mode))
+    frames = []
+    day = start_date
+    while day <= end_date:
+        if cache.path(day).exists():
+            frames.append(pd.read_parquet(cache.path(day)))
+        day += timedelta(days=1)
+    if not frames:
+        raise SystemExit(f"No cached extract days for {start_date} to {end_date} under {cache.root / cache.query_hash}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def profile_stages(raw: pd.DataFrame, names: list[str], profiler: StageProfiler) -> RunMetrics:
+    """Run each named stage once on ``raw`` (or its transform) under ``profiler``."""
+    metrics = RunMetrics(profiler)
+    inputs = {"raw": raw}
+    if any(STAGES[name][0] == "clean" for name in names):
+        inputs["clean"] = transform(raw)
+    for name in names:
+        source, fn = STAGES[name]
+        with metrics.stage(name):
+            fn(inputs[source])
+        metrics.add(name, rows_in=len(inputs[source]))
+    return metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic rows (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", nargs="?", const=EXTRACT_CACHE_DIR,
+                        help="profile cached extract days instead (default dir: EXTRACT_CACHE_DIR)")
+    parser.add_argument("--gkg-dir", help="profile rows read from local GKG 2.1 files instead")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--out", default=PROFILE_DIR, help="run directory parent (default: PROFILE_DIR)")
+    parser.add_argument("--top", type=int, default=15, help="functions printed per stage")
+    args = parser.parse_args()
+
+    if args.cache_dir or args.gkg_dir:
+        if not (args.start and args.end):
+            parser.error("--cache-dir and --gkg-dir need --start and --end")
+        if args.cache_dir:
+            raw = cached_raw(args.cache_dir, args.start, args.end)
+        else:
+            raw = extract_files(args.gkg_dir, args.start, args.end)
+    else:
+        raw = make_raw(args.rows, args.seed)
+    print(f"Profiling {len(raw):,} raw rows")
+
+    profiler = StageProfiler(run_directory(args.out))
+    metrics = profile_stages(raw, args.stages, profiler)
+    directory = profiler.write()
+    (directory / "metrics.json").write_text(json.dumps(metrics.report(), indent=2) + "\n")
+
+    for name in args.stages:
+        seconds = metrics.stages[name]["seconds"]
+        print(f"\n=== {name}: {seconds:.2f}s, peak {profiler.peaks[name] / 2**20:,.1f} MB traced ===")
+        stats = profiler.stats(name)
+        stats.sort_stats("tottime").print_stats(args.top)
+    print(f"Profiles written to {directory}")
+
+
+if __name__ == "__main__":
+    main()
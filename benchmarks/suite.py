@@ -0,0 +1,158 @@
+"""Per-stage throughput and peak-memory benchmarks with stored baselines.
+
+Usage:
+    python -m benchmarks.suite [--sizes 10000 100000 1000000] [--save] [--threshold 0.25]
+
+Every stage runs on seeded synthetic GKG rows (``benchmarks.synthetic``),
+so results are comparable between runs on the same machine. Without
+``--save`` the results are checked against ``benchmarks/baselines.json``
+and the exit status is 1 if any stage lost more than ``--threshold`` of its
+rows/sec or grew its peak memory by more than that fraction. Baselines are
+machine-specific; re-record them with ``--save`` when the hardware changes.
+
+Peak memory is the largest allocation a stage makes on top of its input:
+tracemalloc (Python objects, NumPy buffers) plus the Arrow memory pool.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.synthetic import make_raw
+from pipeline.columnar import to_table
+from pipeline.headlines import score_headlines
+from pipeline.load import _sanitize_record
+from pipeline.transform import parse_locations, parse_themes, transform
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_THRESHOLD = 0.25
+# Peak-memory growth below this is noise at small sizes
+MEMORY_SLACK_MB = 2.0
+
+
+def _sanitize_records(df: pd.DataFrame) -> list[dict]:
+    """What ``load`` does to every frame before sending it."""
+    return [_sanitize_record(r) for r in df.to_dict(orient="records")]
+
+
+# name -> (input: "raw" or "clean", stage function)
+STAGES: dict[str, tuple[str, Callable]] = {
+    "parse_locations": ("raw", lambda raw: [parse_locations(v) for v in raw["raw_locations"].tolist()]),
+    "parse_themes": ("raw", lambda raw: [parse_themes(v) for v in raw["raw_themes"].tolist()]),
+    "transform": ("raw", transform),
+    "score_headlines": ("clean", lambda clean: score_headlines(clean, cache_path=None)),
+    "sanitize_records": ("clean", _sanitize_records),
+    "to_table": ("clean", to_table),
+}
+
+
+def measure(fn: Callable, arg) -> float:
+    """Run ``fn(arg)`` once and return the elapsed seconds."""
+    gc.collect()
+    start = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - start
+
+
+def measure_memory(fn: Callable, arg) -> float:
+    """Run ``fn(arg)`` once under tracing and return its peak allocation in MB.
+
+    The peak is tracemalloc's (Python objects and NumPy buffers) plus the
+    Arrow memory pool's, each measured from the start of the stage.
+    """
+    gc.collect()
+    previous = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(previous)
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(previous)
+    return (peak + pool.max_memory()) / 2**20
+
+
+def run_suite(sizes: list[int], repeat: int = 3, seed: int = 0) -> dict:
+    """Benchmark every stage at every size.
+
+    Returns:
+        ``{stage: {str(size): {"rows_per_sec": float, "peak_mb": float}}}``;
+        rows/sec is the best of ``repeat`` timed runs and the peak comes from
+        one extra traced run, so tracing overhead does not skew timings.
+    """
+    results: dict = {name: {} for name in STAGES}
+    for size in sizes:
+        inputs = {"raw": make_raw(size, seed)}
+        inputs["clean"] = transform(inputs["raw"])
+        for name, (source, fn) in STAGES.items():
+            data = inputs[source]
+            seconds = min(measure(fn, data) for _ in range(repeat))
+            peak = measure_memory(fn, data)
+            results[name][str(size)] = {"rows_per_sec": round(len(data) / seconds, 1), "peak_mb": round(peak, 1)}
+            print(f"{name:<18} {size:>9,} rows  {len(data) / seconds:>12,.0f} rows/sec  peak {peak:,.1f} MB", flush=True)
+    return results
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> list[str]:
+    """Describe every stage/size that regressed by more than ``threshold``."""
+    regressions = []
+    for stage, sizes in results.items():
+        for size, current in sizes.items():
+            base = baselines.get(stage, {}).get(size)
+            if base is None:
+                continue
+            if current["rows_per_sec"] < base["rows_per_sec"] * (1 - threshold):
+                regressions.append(
+                    f"{stage} @ {size}: {current['rows_per_sec']:,.0f} rows/sec "
+                    f"vs baseline {base['rows_per_sec']:,.0f}"
+                )
+            peak, base_peak = current["peak_mb"], base["peak_mb"]
+            if peak > base_peak * (1 + threshold) and peak - base_peak > MEMORY_SLACK_MB:
+                regressions.append(f"{stage} @ {size}: peak {peak:,.1f} MB vs baseline {base_peak:,.1f} MB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best one counts")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown / memory growth (default: %(default)s)")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baselines")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat)
+
+    stored = json.loads(args.baselines.read_text()) if args.baselines.exists() else {"results": {}}
+    if args.save:
+        for stage, sizes in results.items():
+            stored["results"].setdefault(stage, {}).update(sizes)
+        stored["machine"] = f"{platform.machine()} {platform.processor() or platform.system()}"
+        stored["python"] = platform.python_version()
+        args.baselines.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baselines to {args.baselines}")
+        return
+
+    regressions = compare(results, stored["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions beyond the threshold")
+
+
+if __name__ == "__main__":
+    main()
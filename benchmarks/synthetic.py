@@ -0,0 +1,213 @@
+"""Seeded synthetic GDELT GKG rows for benchmarks and offline runs.
+
+``make_raw(n, seed)`` returns a frame with the columns ``extract`` returns.
+Payloads follow the layouts ``pipeline.transform`` parses, with GKG-like
+distributions: a skewed mix of source domains, 0–12 locations per article
+drawn from a gazetteer (countries far more common than cities), several
+themes with character offsets (some repeated within an article), seven
+V2Tone fields, and Extras blocks that mostly carry a ``<PAGE_TITLE>``. A few
+percent of URLs are repeated, as syndicated stories are in real extracts.
+The same ``n`` and ``seed`` always produce the same frame.
+
+``write_gkg_files`` lays such a frame out as GKG 2.1 15-minute
+``.gkg.csv.zip`` files for ``pipeline.gkg_files``.
+"""
+
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.columnar import raw_frame
+from pipeline.gkg_files import FILE_SUFFIX, GKG_COLUMNS, RAW_COLUMNS
+
+# type#name#country_code#adm1_code#lat#lon#feature_id
+GAZETTEER = [
+    ("1#United States#US##39.8282#-98.5795#US", 30),
+    ("1#United Kingdom#UK##54#-2#UK", 12),
+    ("1#China#CH##35#105#CH", 10),
+    ("1#India#IN##20#77#IN", 8),
+    ("1#Japan#JA##36#138#JA", 6),
+    ("1#Germany#GM##51#9#GM", 6),
+    ("1#France#FR##46#2#FR", 5),
+    ("1#Canada#CA##60#-95#CA", 5),
+    ("1#Australia#AS##-25#135#AS", 4),
+    ("1#South Korea#KS##37#127.5#KS", 3),
+    ("1#Israel#IS##31.5#34.75#IS", 2),
+    ("1#Brazil#BR##-10#-55#BR", 2),
+    ("1#Singapore#SN##1.3667#103.8#SN", 2),
+    ("1#Nigeria#NI##10#8#NI", 1),
+    ("1#United Arab Emirates#AE##24#54#AE", 1),
+    ("2#California, United States#US#USCA#36.17#-119.746#CA", 8),
+    ("2#New York, United States#US#USNY#42.1497#-74.9384#NY", 5),
+    ("2#Washington, United States#US#USWA#47.3917#-121.571#WA", 3),
+    ("2#Texas, United States#US#USTX#31.106#-97.6475#TX", 3),
+    ("2#Massachusetts, United States#US#USMA#42.3739#-71.1079#MA", 2),
+    ("3#San Francisco, California, United States#US#USCA#37.7749#-122.419#277593", 6),
+    ("3#New York, New York, United States#US#USNY#40.7143#-74.006#977396", 5),
+    ("3#Seattle, Washington, United States#US#USWA#47.6062#-122.332#1509888", 2),
+    ("3#Boston, Massachusetts, United States#US#USMA#42.3584#-71.0598#617565", 2),
+    ("3#Washington, District of Columbia, United States#US#USDC#38.8951#-77.0364#531871", 4),
+    ("4#London, London, City of, United Kingdom#UK#UKH9#51.5#-0.116667#-2601889", 6),
+    ("4#Beijing, Beijing, China#CH#CH22#39.9289#116.388#-1898541", 4),
+    ("4#Shanghai, Shanghai, China#CH#CH23#31.2222#121.458#-1928004", 2),
+    ("4#Tokyo, Tokyo, Japan#JA#JA40#35.685#139.751#-246227", 3),
+    ("4#Bangalore, Karnataka, India#IN#IN19#12.9833#77.5833#-2090174", 2),
+    ("4#Paris, Ile-de-France, France#FR#FRA8#48.8667#2.33333#-1456928", 3),
+    ("4#Berlin, Berlin, Germany#GM#GM16#52.5167#13.4#-1746443", 2),
+    ("4#Toronto, Ontario, Canada#CA#CA08#43.6667#-79.4167#-574890", 2),
+    ("4#Tel Aviv, Tel Aviv, Israel#IS#IS05#32.0667#34.7667#-781545", 1),
+    ("4#Seoul, Soul-t'ukpyolsi, South Korea#KS#KS11#37.5664#127#-716583", 1),
+    ("5#Karnataka, India#IN#IN19#13.5#76#IN19", 1),
+    ("5#Ontario, Canada#CA#CA08#50#-85#CA08", 1),
+]
+THEMES = [
+    ("TAX_FNCACT_ARTIFICIAL_INTELLIGENCE", 20),
+    ("TECH_AUTOMATION", 10),
+    ("WB_678_DIGITAL_GOVERNMENT", 6),
+    ("ECON_STOCKMARKET", 6),
+    ("EPU_POLICY", 6),
+    ("WB_133_INFORMATION_AND_COMMUNICATION_TECHNOLOGIES", 5),
+    ("TAX_FNCACT_CEO", 4),
+    ("EDUCATION", 4),
+    ("GENERAL_GOVERNMENT", 4),
+    ("CYBER_ATTACK", 2),
+    ("UNEMPLOYMENT", 2),
+    ("WB_1921_PRIVATE_SECTOR_DEVELOPMENT", 2),
+    ("LEGISLATION", 2),
+    ("TAX_ETHNICITY_AMERICAN", 1),
+    ("MEDIA_MSM", 1),
+    ("SECURITY_SERVICES", 1),
+]
+SUBJECTS = ["AI", "OpenAI", "ChatGPT", "Machine learning", "Generative AI", "Chatbots", "AI startups", "Regulators"]
+VERBS = ["boosts", "threatens", "transforms", "fails", "wins", "warns about", "drives", "slows", "reshapes", "faces"]
+OBJECTS = [
+    "growth", "jobs", "schools", "the stock market", "healthcare", "elections",
+    "privacy fears", "a record quarter", "a new lawsuit", "productivity",
+]
+DOMAINS = 2_000
+DUPLICATE_SHARE = 0.03
+
+
+def _weighted(rng: np.random.Generator, table: list[tuple[str, int]], size: int) -> np.ndarray:
+    values = np.array([v for v, _ in table], dtype=object)
+    weights = np.array([w for _, w in table], dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _join(parts: np.ndarray, counts: np.ndarray, sep: str) -> list[str]:
+    """Join consecutive runs of ``parts`` (lengths ``counts``) with ``sep``."""
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    parts = parts.tolist()
+    return [sep.join(parts[s:e]) for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+def make_raw(n: int, seed: int = 0, day: date = date(2025, 6, 15), days: int = 7) -> pd.DataFrame:
+    """Build ``n`` synthetic GKG rows.
+
+    Args:
+        n: Number of rows.
+        seed: Random seed; equal seeds give identical frames.
+        day: Last publication day.
+        days: Rows are spread over this many days ending at ``day``.
+
+    Returns:
+        Raw frame with the ``extract`` columns and Arrow-backed strings.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Source domains follow a Zipf-like popularity curve
+    popularity = 1 / np.arange(1, DOMAINS + 1)
+    domains = rng.choice(DOMAINS, size=n, p=popularity / popularity.sum())
+    ids = np.arange(n)
+    repeats = rng.random(n) < DUPLICATE_SHARE
+    ids[repeats] = rng.integers(0, max(n, 1), size=int(repeats.sum()))
+    urls = [f"https://news{d}.example.com/tech/ai-story-{i}" for d, i in zip(domains.tolist(), ids.tolist())]
+
+    loc_counts = np.minimum(rng.poisson(2.5, size=n), 12)
+    locations = _join(_weighted(rng, GAZETTEER, int(loc_counts.sum())), loc_counts, ";")
+
+    theme_counts = rng.integers(1, 12, size=n)
+    names = _weighted(rng, THEMES, int(theme_counts.sum()))
+    offsets = rng.integers(0, 8_000, size=len(names)).astype(str).astype(object)
+    themes = _join(names + "," + offsets, theme_counts, ";")
+
+    tone = rng.normal(0, 3, size=n)
+    positive = np.abs(tone) + rng.uniform(0, 3, size=n)
+    negative = positive - tone
+    words = rng.integers(80, 2_500, size=n)
+    tones = [
+        f"{t:.6f},{p:.6f},{q:.6f},{p + q:.6f},{a:.6f},0,{w}"
+        for t, p, q, a, w in zip(
+            tone.tolist(), positive.tolist(), negative.tolist(), rng.uniform(15, 30, size=n).tolist(), words.tolist()
+        )
+    ]
+
+    calendar = np.array([int((day - timedelta(days=d)).strftime("%Y%m%d")) for d in range(days)], dtype=np.int64)
+    seconds = rng.integers(0, 86_400, size=n)
+    raw_dates = (
+        calendar[rng.integers(0, days, size=n)] * 1_000_000
+        + seconds // 3600 * 10_000 + seconds % 3600 // 60 * 100 + seconds % 60
+    )
+
+    subjects = np.array(SUBJECTS, dtype=object)[rng.integers(0, len(SUBJECTS), size=n)]
+    verbs = np.array(VERBS, dtype=object)[rng.integers(0, len(VERBS), size=n)]
+    objects = np.array(OBJECTS, dtype=object)[rng.integers(0, len(OBJECTS), size=n)]
+    titles = subjects + " " + verbs + " " + objects
+    has_title = rng.random(n) < 0.9
+    extras = [
+        f"<PAGE_LINKS>{u}</PAGE_LINKS><PAGE_TITLE>{t}</PAGE_TITLE><PAGE_PRECISEPUBTIMESTAMP>{d}</PAGE_PRECISEPUBTIMESTAMP>"
+        if keep else f"<PAGE_LINKS>{u}</PAGE_LINKS>"
+        for u, t, d, keep in zip(urls, titles.tolist(), raw_dates.tolist(), has_title.tolist())
+    ]
+
+    return raw_frame(pd.DataFrame({
+        "url": urls,
+        "SourceCollectionIdentifier": np.ones(n, dtype=np.int64),
+        "extras": extras,
+        "raw_locations": locations,
+        "raw_tone": tones,
+        "raw_date": raw_dates,
+        "raw_themes": themes,
+        "SharingImage": [None] * n,
+    }))
+
+
+def write_gkg_files(
+    raw: pd.DataFrame,
+    directory: str | Path,
+    rows_per_file: int = 10_000,
+    start: datetime = datetime(2025, 6, 15),
+    seed: int = 0,
+) -> list[Path]:
+    """Write ``raw`` (a ``make_raw`` frame) as consecutive 15-minute GKG 2.1 files.
+
+    Columns ``extract`` does not read are filled with GCAM-like counts so
+    the files are about as large per row as real ones.
+
+    Returns:
+        The files written, oldest first.
+    """
+    rng = np.random.default_rng(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fields = {gkg: raw[name].astype(object).where(raw[name].notna(), "").astype(str).tolist()
+              for gkg, name in RAW_COLUMNS.items()}
+    paths = []
+    for number, first in enumerate(range(0, len(raw), rows_per_file)):
+        rows = range(first, min(first + rows_per_file, len(raw)))
+        stamp = (start + timedelta(minutes=15 * number)).strftime("%Y%m%d%H%M%S")
+        lines = []
+        for i in rows:
+            gcam = ",".join(f"c{k}.1:{v}" for k, v in enumerate(rng.integers(1, 50, size=40).tolist()))
+            values = {"GKGRECORDID": f"{stamp}-{i}", "GCAM": f"wc:{i % 900 + 100},{gcam}"}
+            values.update({gkg: column[i] for gkg, column in fields.items()})
+            lines.append("\t".join(values.get(c, "") for c in GKG_COLUMNS))
+        path = directory / f"{stamp}{FILE_SUFFIX}"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(path.name.removesuffix(".zip"), "\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
@@ -0,0 +1,32 @@
+"""Benchmark the columnar transform against the row-by-row reference.
+
+Usage: python -m benchmarks.transform_bench [rows]
+"""
+
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_raw
+from pipeline.transform import _transform_rowwise, transform
+
+
+def _rows_per_sec(fn, df: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    fn(df)
+    return len(df) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_raw(n)
+    before = _rows_per_sec(_transform_rowwise, df)
+    after = _rows_per_sec(transform, df)
+    print(f"rows={n}")
+    print(f"row-by-row: {before:,.0f} rows/sec")
+    print(f"columnar:   {after:,.0f} rows/sec ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,10 +18,51 @@ def _get(key: str, default: str | None = None) -> str | None:
 # BigQuery
 GCP_PROJECT = _get("GCP_PROJECT")
 
+# Extract cache (empty EXTRACT_CACHE_DIR disables it)
+EXTRACT_CACHE_DIR = _get("EXTRACT_CACHE_DIR", ".cache/extract")
+EXTRACT_CACHE_SETTLE_DAYS = int(_get("EXTRACT_CACHE_SETTLE_DAYS", "2"))
+EXTRACT_CACHE_MAX_BYTES = int(_get("EXTRACT_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Extract: "raw" fetches GKG text columns, "pushdown" parses them in BigQuery
+EXTRACT_MODE = _get("EXTRACT_MODE", "raw")
+# Offline extract: read GKG 2.1 .gkg.csv.zip files from here instead (empty uses BigQuery)
+GKG_FILES_DIR = _get("GKG_FILES_DIR", "")
+
+# Incremental extract: re-read this many hours before the watermark
+WATERMARK_LOOKBACK_HOURS = float(_get("WATERMARK_LOOKBACK_HOURS", "2"))
+
 # Supabase
 SUPABASE_URL = _get("SUPABASE_URL")
 SUPABASE_ANON_KEY = _get("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_ROLE_KEY = _get("SUPABASE_SERVICE_ROLE_KEY")
 
+# Load: "rest" upserts through Supabase, "copy" bulk-loads over DATABASE_URL
+LOAD_CONCURRENCY = int(_get("LOAD_CONCURRENCY", "4"))
+LOAD_BACKEND = _get("LOAD_BACKEND", "rest")
+DATABASE_URL = _get("DATABASE_URL")
+
 # Retention
 RETENTION_DAYS = int(_get("RETENTION_DAYS", "365"))
+# Rows deleted per request below the cutoff (after whole partitions are dropped)
+RETENTION_DELETE_BATCH = int(_get("RETENTION_DELETE_BATCH", "10000"))
+# Detach expired monthly partitions (renamed *_detached) instead of dropping them
+RETENTION_DETACH_ONLY = str(_get("RETENTION_DETACH_ONLY", "false")).lower() == "true"
+
+# Transform
+TRANSFORM_WORKERS = int(_get("TRANSFORM_WORKERS", "1"))
+
+# Headline sentiment score cache (empty HEADLINE_CACHE_PATH disables it)
+HEADLINE_CACHE_PATH = _get("HEADLINE_CACHE_PATH", ".cache/headline_scores.sqlite")
+
+# Index of loaded rows, to skip unchanged ones (empty SEEN_INDEX_PATH disables it)
+SEEN_INDEX_PATH = _get("SEEN_INDEX_PATH", ".cache/seen_articles.sqlite")
+
+# Tone shift alerts: 7/30-day mean tone this many standard errors from the
+# preceding 90 days, with at least SHIFT_MIN_ARTICLES toned articles in each
+SHIFT_Z_THRESHOLD = float(_get("SHIFT_Z_THRESHOLD", "3"))
+SHIFT_MIN_ARTICLES = int(_get("SHIFT_MIN_ARTICLES", "20"))
+
+# Run reports: JSON per run plus a Prometheus textfile (empty disables)
+METRICS_DIR = _get("METRICS_DIR", ".cache/metrics")
+# Where ``pipeline.run --profile`` writes per-stage profiles
+PROFILE_DIR = _get("PROFILE_DIR", ".cache/profiles")
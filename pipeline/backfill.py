@@ -0,0 +1,184 @@
+"""Resumable, concurrent backfill over daily GKG partitions.
+
+Usage: python -m pipeline.backfill 2025-01-01 2025-12-31 [--days-per-unit N] [--concurrency N]
+
+The range is split into units of ``days_per_unit`` days which run through
+``pipeline.run.run`` on a bounded thread pool. Each finished unit is
+checkpointed to a JSON state file, so rerunning the same command after a
+failure skips the days already loaded. Once every unit has finished, the
+rolling tone windows, retention and data version are brought up to date
+in one pass over the whole range.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = ".cache/backfill_state.json"
+
+
+def plan_units(start_date: date, end_date: date, days_per_unit: int = 1) -> list[tuple[date, date]]:
+    """Split an inclusive date range into consecutive (start, end) units."""
+    units = []
+    day = start_date
+    while day <= end_date:
+        last = min(day + timedelta(days=days_per_unit - 1), end_date)
+        units.append((day, last))
+        day = last + timedelta(days=1)
+    return units
+
+
+def _unit_days(start_date: date, end_date: date) -> set[date]:
+    return {start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)}
+
+
+class BackfillState:
+    """Completed units persisted as ``{"completed": {"start/end": {...}}}``."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.completed: dict[str, dict] = {}
+        if self.path.exists():
+            self.completed = json.loads(self.path.read_text()).get("completed", {})
+
+    def done_days(self) -> set[date]:
+        days = set()
+        for key in self.completed:
+            start, end = (date.fromisoformat(d) for d in key.split("/"))
+            days |= _unit_days(start, end)
+        return days
+
+    def mark_done(self, start_date: date, end_date: date, rows: int, seconds: float) -> None:
+        with self._lock:
+            key = f"{start_date.isoformat()}/{end_date.isoformat()}"
+            self.completed[key] = {"rows": rows, "seconds": round(seconds, 3)}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"completed": self.completed}, indent=2, sort_keys=True))
+            tmp.replace(self.path)
+
+
+def backfill(
+    start_date: date,
+    end_date: date,
+    runner: Callable[[date, date], int],
+    days_per_unit: int = 1,
+    concurrency: int = 4,
+    state_path: str | Path = STATE_FILE,
+) -> dict[tuple[date, date], float]:
+    """Run ``runner`` over every not-yet-completed unit of the range.
+
+    Args:
+        runner: Loads one inclusive date range and returns the row count.
+
+    Returns:
+        Wall time in seconds of each unit run in this call.
+
+    Raises:
+        RuntimeError: If any unit failed; completed units stay checkpointed.
+    """
+    state = BackfillState(state_path)
+    done = state.done_days()
+    pending = [
+        (start, end) for start, end in plan_units(start_date, end_date, days_per_unit)
+        if not _unit_days(start, end) <= done
+    ]
+    total_units = len(pending)
+    logger.info(
+        "Backfill %s to %s: %d units pending, %d days already done",
+        start_date, end_date, total_units, len(done & _unit_days(start_date, end_date)),
+    )
+
+    def run_unit(unit: tuple[date, date]) -> tuple[int, float]:
+        began = time.perf_counter()
+        rows = runner(*unit)
+        return rows, time.perf_counter() - began
+
+    timings: dict[tuple[date, date], float] = {}
+    failed = []
+    rows_total = 0
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(run_unit, unit): unit for unit in pending}
+        for finished, future in enumerate(as_completed(futures), start=1):
+            unit = futures[future]
+            try:
+                rows, seconds = future.result()
+            except Exception:
+                logger.exception("Backfill unit %s to %s failed", *unit)
+                failed.append(unit)
+                continue
+            state.mark_done(*unit, rows, seconds)
+            timings[unit] = seconds
+            rows_total += rows
+            elapsed = time.perf_counter() - began
+            eta = elapsed / finished * (total_units - finished)
+            logger.info(
+                "[%d/%d] %s to %s: %d rows in %.1fs (elapsed %.0fs, eta %.0fs)",
+                finished, total_units, unit[0], unit[1], rows, seconds, elapsed, eta,
+            )
+
+    if timings:
+        values = list(timings.values())
+        logger.info(
+            "Backfill finished %d units, %d rows in %.0fs; unit time min %.1fs / median %.1fs / max %.1fs",
+            len(values), rows_total, time.perf_counter() - began,
+            min(values), statistics.median(values), max(values),
+        )
+    if failed:
+        raise RuntimeError(f"{len(failed)} backfill units failed; rerun to resume: {failed}")
+    return timings
+
+
+def finish_backfill(client, start_date: date, end_date: date) -> None:
+    """The steps backfill units skip (``finalize=False``), run once for the whole range.
+
+    Moves the rolling tone windows forward from ``start_date`` in one pass,
+    applies retention and publishes a new data version for the dashboard.
+    """
+    from pipeline.cleanup import cleanup
+    from pipeline.data_version import publish_data_version
+    from pipeline.rollup import refresh_rolling_stats
+
+    refresh_rolling_stats(client, [start_date.isoformat(), end_date.isoformat()])
+    cleanup(client)
+    publish_data_version(client)
+
+
+def main() -> None:
+    from supabase import create_client
+
+    from config.settings import SUPABASE_SERVICE_ROLE_KEY, SUPABASE_URL
+    from pipeline.run import run
+
+    parser = argparse.ArgumentParser(description="Resumable, concurrent pipeline backfill")
+    parser.add_argument("start_date", type=date.fromisoformat)
+    parser.add_argument("end_date", type=date.fromisoformat)
+    parser.add_argument("--days-per-unit", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--state-file", default=STATE_FILE)
+    args = parser.parse_args()
+
+    backfill(
+        args.start_date,
+        args.end_date,
+        runner=lambda start, end: run(start, end, finalize=False),
+        days_per_unit=args.days_per_unit,
+        concurrency=args.concurrency,
+        state_path=args.state_file,
+    )
+    finish_backfill(create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY), args.start_date, args.end_date)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""On-disk Parquet cache of extract results, one file per partition day."""
+
+import hashlib
+import logging
+import os
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _days(start_date: date, end_date: date) -> list[date]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def _runs(days: list[date]) -> list[list[date]]:
+    """Sorted days grouped into runs of consecutive days."""
+    runs: list[list[date]] = []
+    for day in days:
+        if runs and day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+def split_days(df: pd.DataFrame, days: list[date]) -> dict[date, pd.DataFrame]:
+    """Rows of a fetch covering ``days`` (consecutive), by the day of their ``raw_date``.
+
+    GKG partitions hold the 15-minute files published that day, so a
+    record's ``raw_date`` day is its partition day. Rows without a usable
+    ``raw_date`` go to the first day and rows outside the range to the
+    nearest end, so every fetched row lands in exactly one day.
+    """
+    if len(days) == 1 or df.empty:
+        return {day: df for day in days}
+    stamps = pd.to_numeric(df["raw_date"], errors="coerce") // 1_000_000
+    dates = pd.to_datetime(stamps.astype("Int64").astype("string"), format="%Y%m%d", errors="coerce")
+    offsets = (dates - pd.Timestamp(days[0])).dt.days
+    positions = offsets.fillna(0).clip(0, len(days) - 1).astype(int).to_numpy()
+    return {day: df[positions == i].reset_index(drop=True) for i, day in enumerate(days)}
+
+
+class ExtractCache:
+    """Parquet files under ``root/<query hash>/<YYYY-MM-DD>.parquet``.
+
+    Files are keyed by a hash of the query text, so editing ``QUERY``
+    naturally invalidates every cached day. Days within ``settle_days`` of
+    today are still receiving GKG updates and are always re-fetched.
+    """
+
+    def __init__(self, root: str | Path, query: str, settle_days: int = 2, max_bytes: int = 2 * 1024**3):
+        self.root = Path(root)
+        self.query_hash = hashlib.sha256(query.encode()).hexdigest()[:16]
+        self.settle_days = settle_days
+        self.max_bytes = max_bytes
+
+    def path(self, day: date) -> Path:
+        return self.root / self.query_hash / f"{day.isoformat()}.parquet"
+
+    def is_settled(self, day: date) -> bool:
+        return day < date.today() - timedelta(days=self.settle_days)
+
+    def get(self, day: date) -> pd.DataFrame | None:
+        """Cached rows for ``day``, or None if missing or still settling."""
+        path = self.path(day)
+        if not self.is_settled(day) or not path.exists():
+            return None
+        # Another process may evict the file in between; then it is missing
+        try:
+            os.utime(path)  # mark as recently used for eviction
+            return pd.read_parquet(path)
+        except FileNotFoundError:
+            return None
+
+    def put(self, day: date, df: pd.DataFrame) -> None:
+        path = self.path(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(path)
+
+    def evict(self) -> int:
+        """Delete least recently used files until the cache fits in ``max_bytes``.
+
+        Returns:
+            Number of files removed.
+        """
+        # Other processes may evict (or rewrite) the same files concurrently
+        files = []
+        for path in self.root.glob("*/*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort(key=lambda f: f[0])
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        if removed:
+            logger.info("Evicted %d cached extract files", removed)
+        return removed
+
+    def extract(
+        self,
+        start_date: date,
+        end_date: date,
+        fetch: Callable[[date, date], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Return rows for ``start_date``..``end_date``, fetching only uncached days.
+
+        Args:
+            fetch: Queries one inclusive date range; called once per run of
+                consecutive missing days, whose rows are then cached by day
+                (see ``split_days``).
+        """
+        days = _days(start_date, end_date)
+        frames = {day: self.get(day) for day in days}
+        missing = _runs([day for day in days if frames[day] is None])
+        for run in missing:
+            for day, df in split_days(fetch(run[0], run[-1]), run).items():
+                if self.is_settled(day):
+                    self.put(day, df)
+                frames[day] = df
+
+        fetched = sum(len(run) for run in missing)
+        logger.info(
+            "Extract cache: %d of %d days served from %s; %d fetched in %d queries",
+            len(days) - fetched, len(days), self.root, fetched, len(missing),
+        )
+        if fetched:
+            self.evict()
+        frames = [df for df in frames.values() if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
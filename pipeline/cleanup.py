@@ -2,26 +2,69 @@
 
 import logging
 from datetime import date, timedelta
+from pathlib import Path
 
-from supabase import create_client
+from supabase import Client, create_client
 
-from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, RETENTION_DAYS
+from config.settings import (
+    RETENTION_DAYS,
+    RETENTION_DELETE_BATCH,
+    RETENTION_DETACH_ONLY,
+    SEEN_INDEX_PATH,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_URL,
+)
+
+from pipeline.seen import SeenIndex
 
 logger = logging.getLogger(__name__)
 
 
-def cleanup() -> None:
-    """Delete articles where published_date < today - RETENTION_DAYS."""
-    cutoff = date.today() - timedelta(days=RETENTION_DAYS)
-    logger.info("Deleting articles older than %s (retention=%d days)", cutoff, RETENTION_DAYS)
+def cleanup(
+    client: Client | None = None,
+    retention_days: int = RETENTION_DAYS,
+    batch_size: int = RETENTION_DELETE_BATCH,
+    detach_only: bool = RETENTION_DETACH_ONLY,
+    seen_path: str | None = SEEN_INDEX_PATH,
+) -> int:
+    """Delete articles where published_date < today - ``retention_days``.
+
+    When ``articles`` is partitioned by month (setup_partitioned_articles.sql),
+    every partition entirely before the cutoff is dropped (or only detached,
+    with ``detach_only``) first. Whatever remains below the cutoff (the
+    boundary month, or everything on an unpartitioned table) is deleted
+    ``batch_size`` rows per request, so no single statement holds locks or
+    generates WAL for the whole backlog. Counts come from the server; the
+    deleted rows are never returned. Entries below the cutoff are also
+    removed from the local seen-article index at ``seen_path``.
+
+    Returns:
+        Number of articles deleted.
+    """
+    cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+    logger.info("Deleting articles older than %s (retention=%d days)", cutoff, retention_days)
+
+    if client is None:
+        client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    dropped = client.rpc("drop_article_partitions", {"cutoff": cutoff, "detach_only": detach_only}).execute().data
+    if dropped:
+        logger.info("%s %d old articles with their partitions", "Detached" if detach_only else "Dropped", dropped)
+
+    deleted = 0
+    while True:
+        chunk = client.rpc("delete_articles_before", {"cutoff": cutoff, "batch_size": batch_size}).execute().data
+        deleted += chunk
+        if chunk < batch_size:
+            break
+    logger.info("Deleted %d old articles", dropped + deleted)
 
-    client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-    result = (
-        client.table("articles")
-        .delete()
-        .lt("published_date", cutoff.isoformat())
-        .execute()
-    )
+    client.rpc("delete_rollups_before", {"cutoff": cutoff}).execute()
 
-    deleted = len(result.data) if result.data else 0
-    logger.info("Deleted %d old articles", deleted)
+    if seen_path and Path(seen_path).exists():
+        seen = SeenIndex(seen_path)
+        try:
+            forgotten = seen.forget_before(date.fromisoformat(cutoff))
+        finally:
+            seen.close()
+        logger.info("Removed %d entries from the seen-article index", forgotten)
+    return dropped + deleted
@@ -0,0 +1,88 @@
+"""Arrow-backed, dictionary-encoded layout for raw and transformed frames.
+
+Country/ADM1 codes, location names, source domains, dates and theme names
+repeat across most articles. Transformed frames store them as dictionary
+columns (pandas ``category``, which maps to Arrow dictionary arrays
+without copying), ``themes`` as an Arrow ``list<dictionary<string>>``
+and numbers in typed columns instead of Python objects.
+"""
+
+import pandas as pd
+import pyarrow as pa
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+ARTICLE_SCHEMA = pa.schema([
+    ("url", pa.string()),
+    ("title", pa.string()),
+    ("source_name", _DICT),
+    ("avg_tone", pa.float64()),
+    ("published_date", _DICT),
+    ("themes", pa.list_(_DICT)),
+    ("specific_location_type", pa.int16()),
+    ("specific_location_name", _DICT),
+    ("specific_country_code", _DICT),
+    ("specific_adm1_code", _DICT),
+    ("specific_latitude", pa.float64()),
+    ("specific_longitude", pa.float64()),
+    ("mentioned_location_type", pa.int16()),
+    ("mentioned_location_name", _DICT),
+    ("mentioned_country_code", _DICT),
+    ("mentioned_adm1_code", _DICT),
+    ("mentioned_latitude", pa.float64()),
+    ("mentioned_longitude", pa.float64()),
+])
+
+# Raw GKG text columns; pandas' "str" dtype is Arrow-backed and keeps NaN
+# (not pd.NA) for missing values, which the scalar parsers expect.
+# ``title`` and ``published_date`` come pre-parsed from a pushdown extract.
+RAW_STRING_COLUMNS = ["url", "extras", "raw_locations", "raw_tone", "raw_themes", "title", "published_date"]
+RAW_STRING_DTYPE = pd.StringDtype("pyarrow", na_value=float("nan"))
+
+_TYPES = {
+    pa.int16(): pd.Int16Dtype(),
+    pa.list_(_DICT): pd.ArrowDtype(pa.list_(_DICT)),
+}
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert an article table (cast to ``ARTICLE_SCHEMA``) to pandas.
+
+    Dictionary columns become ``category`` and ``themes`` stays an Arrow
+    list column; other columns keep their Arrow-backed or NumPy types.
+    """
+    table = table.cast(ARTICLE_SCHEMA)
+    return table.to_pandas(types_mapper=_TYPES.get)
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """Convert transformed articles in any layout to an Arrow table.
+
+    Article columns are cast to ``ARTICLE_SCHEMA``; extra columns (e.g.
+    ``headline_sentiment``) are appended with their inferred types.
+    """
+    df = df.reset_index(drop=True)
+    table = pa.Table.from_pandas(df[ARTICLE_SCHEMA.names], schema=ARTICLE_SCHEMA, preserve_index=False)
+    for name in df.columns.difference(ARTICLE_SCHEMA.names, sort=False):
+        table = table.append_column(name, pa.array(df[name], from_pandas=True))
+    return table
+
+
+def encode(df: pd.DataFrame) -> pd.DataFrame:
+    """Re-encode articles into the compact layout.
+
+    Used for frames built row by row and after ``pd.concat``, which falls
+    back to object columns when categoricals have different categories.
+    """
+    if df.empty:
+        return df
+    result = to_frame(to_table(df[ARTICLE_SCHEMA.names]))
+    for name in df.columns.difference(ARTICLE_SCHEMA.names, sort=False):
+        result[name] = df[name].to_numpy()
+    return result
+
+
+def raw_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Store raw GKG text columns as Arrow-backed strings."""
+    columns = {c: RAW_STRING_DTYPE for c in RAW_STRING_COLUMNS if c in df.columns}
+    return df.astype(columns)
@@ -0,0 +1,29 @@
+"""Data version token: a counter bumped whenever a run changes the data.
+
+The dashboard caches query results without expiry, keyed by this token.
+It re-reads the token every minute or so, and a new value makes every
+cached result miss once. The counter lives in ``pipeline_state`` and is
+incremented in one statement by ``bump_data_version()``, so concurrent
+runs (backfill units) never hand out the same value twice.
+"""
+
+import logging
+
+from pipeline.state import get_state
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "data_version"
+
+
+def read_data_version(client) -> int | None:
+    """Current data version, or None before the first publish."""
+    value = get_state(client, DATA_VERSION_KEY)
+    return int(value) if value is not None else None
+
+
+def publish_data_version(client) -> int:
+    """Increment the data version; returns the new value."""
+    version = int(client.rpc("bump_data_version", {}).execute().data)
+    logger.info("Published data version %d", version)
+    return version
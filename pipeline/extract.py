@@ -1,13 +1,42 @@
 """BigQuery extraction for GDELT GKG AI-related articles."""
 
 import logging
+from collections.abc import Iterator
 from datetime import date, timedelta
 
 import pandas as pd
 from google.cloud import bigquery
 
+from config.settings import (
+    EXTRACT_CACHE_DIR,
+    EXTRACT_CACHE_MAX_BYTES,
+    EXTRACT_CACHE_SETTLE_DAYS,
+    EXTRACT_MODE,
+)
+from pipeline.cache import ExtractCache
+from pipeline.columnar import raw_frame
+from pipeline.watermark import partition_date
+
 logger = logging.getLogger(__name__)
 
+# An article is AI-related if its Extras contain any of these (lowercase)
+KEYWORDS = [
+    "artificial intelligence",
+    "machine learning",
+    "generative ai",
+    "chatgpt",
+    "openai",
+    "large language model",
+]
+
+# Shared by both extract modes: the day partitions and the AI keyword match
+SOURCE = """FROM `gdelt-bq.gdeltv2.gkg_partitioned`
+WHERE _PARTITIONTIME BETWEEN TIMESTAMP(@start_date) AND TIMESTAMP(@end_date)
+  AND (
+    """ + "\n    OR ".join(f"LOWER(Extras) LIKE '%{keyword}%'" for keyword in KEYWORDS) + """
+  )
+"""
+
 QUERY = """
 SELECT
     DocumentIdentifier AS url,
@@ -18,43 +47,156 @@ SELECT
     DATE AS raw_date,
     V2Themes AS raw_themes,
     SharingImage
-FROM `gdelt-bq.gdeltv2.gkg_partitioned`
-WHERE _PARTITIONTIME BETWEEN TIMESTAMP(@start_date) AND TIMESTAMP(@end_date)
-  AND (
-    LOWER(Extras) LIKE '%artificial intelligence%'
-    OR LOWER(Extras) LIKE '%machine learning%'
-    OR LOWER(Extras) LIKE '%generative ai%'
-    OR LOWER(Extras) LIKE '%chatgpt%'
-    OR LOWER(Extras) LIKE '%openai%'
-    OR LOWER(Extras) LIKE '%large language model%'
-  )
+""" + SOURCE
+
+# Parses everything but the locations in BigQuery (see ``transform``), so
+# Extras, V2Tone and V2Themes never leave it. Each expression mirrors the
+# matching scalar parser in ``pipeline.transform``: the trimmed PAGE_TITLE
+# (NULL falls back to the URL client-side), the first V2Tone field, the
+# YYYY-MM-DD prefix of DATE and the unique theme names in order of first
+# mention. Location entries are cut to the six fields ``parse_locations``
+# reads, and rows that cannot have a tone, a date or a country code are
+# dropped before they are sent.
+PUSHDOWN_QUERY = r"""
+SELECT
+    DocumentIdentifier AS url,
+    DATE AS raw_date,
+    NULLIF(TRIM(REGEXP_EXTRACT(Extras, r'<PAGE_TITLE>((?s:.*?))</PAGE_TITLE>')), '') AS title,
+    SAFE_CAST(SPLIT(V2Tone, ',')[SAFE_OFFSET(0)] AS FLOAT64) AS avg_tone,
+    FORMAT('%s-%s-%s',
+        SUBSTR(CAST(DATE AS STRING), 1, 4),
+        SUBSTR(CAST(DATE AS STRING), 5, 2),
+        SUBSTR(CAST(DATE AS STRING), 7, 2)) AS published_date,
+    ARRAY(
+        SELECT name FROM (
+            SELECT SPLIT(TRIM(entry), ',')[SAFE_OFFSET(0)] AS name, MIN(pos) AS first_pos
+            FROM UNNEST(SPLIT(V2Themes, ';')) AS entry WITH OFFSET AS pos
+            GROUP BY name
+        )
+        WHERE name != ''
+        ORDER BY first_pos
+    ) AS themes,
+    REGEXP_REPLACE(V2Locations, r'((?:^|;)(?:[^#;]*#){5}[^#;]*)[^;]*', r'\1') AS raw_locations
+""" + SOURCE + r"""  AND DATE >= 10000000
+  AND SAFE_CAST(SPLIT(V2Tone, ',')[SAFE_OFFSET(0)] AS FLOAT64) IS NOT NULL
+  AND REGEXP_CONTAINS(V2Locations, r'(?:^|;)[^#;]*#[^#;]*#[^#;]+#')
 """
 
+QUERIES = {"raw": QUERY, "pushdown": PUSHDOWN_QUERY}
 
-def extract(start_date: date | None = None, end_date: date | None = None) -> pd.DataFrame:
-    """Extract AI-related articles from GDELT BigQuery.
+# Only GKG records newer than the watermark (see pipeline.watermark)
+INCREMENTAL_FILTER = "  AND DATE > @since\n"
 
-    Args:
-        start_date: Inclusive start date. Defaults to yesterday.
-        end_date: Inclusive end date. Defaults to today.
+PAGE_SIZE = 10_000
 
-    Returns:
-        Raw DataFrame with GDELT GKG columns.
-    """
+
+def _default_window(
+    start_date: date | None,
+    end_date: date | None,
+    since: int | None = None,
+) -> tuple[date, date]:
+    """Fill in the default extract window (3 days ago, or the watermark day, to yesterday)."""
+    if start_date is None and since is not None:
+        start_date = partition_date(since)
     if start_date is None:
         start_date = date.today() - timedelta(days=3)
     if end_date is None:
         end_date = date.today() - timedelta(days=1)
+    return start_date, end_date
+
 
+def _job_config(start_date: date, end_date: date, since: int | None = None) -> bigquery.QueryJobConfig:
+    params = [
+        bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
+        bigquery.ScalarQueryParameter("end_date", "DATE", end_date),
+    ]
+    if since is not None:
+        params.append(bigquery.ScalarQueryParameter("since", "INT64", since))
+    return bigquery.QueryJobConfig(query_parameters=params)
+
+
+def _query_text(mode: str, since: int | None = None) -> str:
+    """SQL for an extract ``mode`` ("raw" or "pushdown"), incremental if ``since`` is set."""
+    if mode not in QUERIES:
+        raise ValueError(f"Unknown extract mode {mode!r}; expected one of {sorted(QUERIES)}")
+    return QUERIES[mode] if since is None else QUERIES[mode] + INCREMENTAL_FILTER
+
+
+def _query(
+    start_date: date,
+    end_date: date,
+    since: int | None = None,
+    mode: str = EXTRACT_MODE,
+) -> pd.DataFrame:
     client = bigquery.Client()
-    job_config = bigquery.QueryJobConfig(
-        query_parameters=[
-            bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
-            bigquery.ScalarQueryParameter("end_date", "DATE", end_date),
-        ]
-    )
-
-    logger.info("Querying GDELT GKG for %s to %s", start_date, end_date)
-    df = client.query(QUERY, job_config=job_config).to_dataframe()
+    query = _query_text(mode, since)
+    logger.info("Querying GDELT GKG for %s to %s (since %s, %s mode)", start_date, end_date, since, mode)
+    df = client.query(query, job_config=_job_config(start_date, end_date, since)).to_dataframe()
+    return raw_frame(df)
+
+
+def extract(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    use_cache: bool = True,
+    since: int | None = None,
+    mode: str = EXTRACT_MODE,
+) -> pd.DataFrame:
+    """Extract AI-related articles from GDELT BigQuery.
+
+    Args:
+        start_date: Inclusive start date. Defaults to 3 days ago, or with
+            ``since`` to its partition day (see ``_default_window``).
+        end_date: Inclusive end date. Defaults to yesterday.
+        use_cache: Serve settled days from the local Parquet cache
+            (``EXTRACT_CACHE_DIR``) and only query BigQuery for the rest.
+        since: Only return records with ``raw_date`` after this GKG
+            timestamp; the scan then starts at its partition day. Incremental
+            windows are still settling, so they bypass the cache.
+        mode: "raw" returns the GKG text columns for ``transform`` to parse;
+            "pushdown" parses title, tone, date and themes in BigQuery and
+            returns only the columns ``transform`` still needs (see
+            ``PUSHDOWN_QUERY``). Defaults to ``EXTRACT_MODE``.
+
+    Returns:
+        Raw DataFrame with GDELT GKG columns (or their pushed-down parses).
+    """
+    start_date, end_date = _default_window(start_date, end_date, since)
+
+    if since is not None:
+        df = _query(start_date, end_date, since, mode)
+    elif use_cache and EXTRACT_CACHE_DIR:
+        cache = ExtractCache(
+            EXTRACT_CACHE_DIR, _query_text(mode),
+            settle_days=EXTRACT_CACHE_SETTLE_DAYS, max_bytes=EXTRACT_CACHE_MAX_BYTES,
+        )
+        df = cache.extract(start_date, end_date, lambda start, end: _query(start, end, mode=mode))
+    else:
+        df = _query(start_date, end_date, mode=mode)
     logger.info("Extracted %d rows", len(df))
     return df
+
+
+def extract_pages(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    page_size: int = PAGE_SIZE,
+    since: int | None = None,
+    mode: str = EXTRACT_MODE,
+) -> Iterator[pd.DataFrame]:
+    """Yield the ``extract`` result one BigQuery result page at a time.
+
+    Only the current page is held in memory, so the peak does not grow with
+    the length of the date range.
+    """
+    start_date, end_date = _default_window(start_date, end_date, since)
+
+    client = bigquery.Client()
+    logger.info("Streaming GDELT GKG for %s to %s (page size %d, %s mode)", start_date, end_date, page_size, mode)
+    query = _query_text(mode, since)
+    job = client.query(query, job_config=_job_config(start_date, end_date, since))
+    total = 0
+    for page in job.result(page_size=page_size).to_dataframe_iterable():
+        total += len(page)
+        yield raw_frame(page)
+    logger.info("Extracted %d rows", total)
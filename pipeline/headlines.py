@@ -0,0 +1,162 @@
+"""Headline sentiment: score article titles with a bundled lexicon model.
+
+GKG ``avg_tone`` scores the whole article body; this stage adds a
+``headline_sentiment`` score in [-1, 1] computed from the title alone. The
+model is a weighted word lexicon (``pipeline/data/headline_lexicon.tsv``)
+with simple negation handling, scored a whole batch at a time on CPU.
+Syndicated stories share titles across many URLs, so scores are cached
+on disk by a hash of the normalized title and each distinct title is
+only ever scored once.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.settings import HEADLINE_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+LEXICON_PATH = Path(__file__).parent / "data" / "headline_lexicon.tsv"
+NEGATIONS = frozenset({"not", "no", "never", "without", "nor", "isn't", "won't", "can't", "don't"})
+# Normalization constant: score / sqrt(score^2 + ALPHA) maps sums to (-1, 1)
+ALPHA = 15.0
+BATCH_SIZE = 50_000
+
+_TOKEN_RE = r"[a-z][a-z']*"
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share a cache key."""
+    return " ".join(title.lower().split())
+
+
+class HeadlineModel:
+    """Lexicon scorer; ``version`` changes whenever the lexicon file does."""
+
+    def __init__(self, path: str | Path = LEXICON_PATH):
+        raw = Path(path).read_bytes()
+        self.version = hashlib.sha256(raw).hexdigest()[:12]
+        lexicon = pd.read_csv(path, sep="\t", comment="#", names=["token", "weight"])
+        self.weights = dict(zip(lexicon["token"], lexicon["weight"].astype(float)))
+
+    def score(self, titles: pd.Series) -> np.ndarray:
+        """Score normalized titles in one vectorized pass.
+
+        Args:
+            titles: Normalized title strings.
+
+        Returns:
+            Array of scores in [-1, 1], aligned with ``titles``.
+        """
+        titles = titles.reset_index(drop=True)
+        tokens = titles.str.findall(_TOKEN_RE).explode()
+        weights = tokens.map(self.weights).fillna(0.0).astype(float)
+        negated = tokens.groupby(level=0).shift(1).isin(NEGATIONS)
+        weights = weights.where(~negated, -weights)
+        total = weights.groupby(level=0).sum().reindex(titles.index, fill_value=0.0)
+        total = total.to_numpy(dtype=float)
+        return total / np.sqrt(total * total + ALPHA)
+
+
+@lru_cache(maxsize=4)
+def load_model(path: str | Path = LEXICON_PATH) -> HeadlineModel:
+    """The model for a lexicon file, loaded once per process.
+
+    Streaming runs score every page separately; they share one model.
+    """
+    return HeadlineModel(path)
+
+
+class ScoreCache:
+    """SQLite table of ``title hash → score``.
+
+    Safe to share between threads, and between the processes of a
+    backfill: WAL lets readers run alongside a writer, and writers wait
+    for each other instead of failing with "database is locked".
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL NOT NULL)")
+
+    def get_many(self, keys: list[str]) -> dict[str, float]:
+        """Look keys up with one join against a temp table of the batch."""
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (key TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM wanted")
+            self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((k,) for k in keys))
+            return dict(self.conn.execute("SELECT key, score FROM scores JOIN wanted USING (key)"))
+
+    def put_many(self, scores: dict[str, float]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?)", scores.items())
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def score_headlines(
+    df: pd.DataFrame,
+    cache_path: str | Path | None = HEADLINE_CACHE_PATH,
+    model: HeadlineModel | None = None,
+) -> pd.DataFrame:
+    """Add a ``headline_sentiment`` column to transformed articles.
+
+    Rows without a real title (``transform`` falls back to the URL) get NaN.
+
+    Args:
+        df: Output of ``transform``.
+        cache_path: SQLite score cache; empty or None disables caching.
+        model: Scorer to use; defaults to the bundled lexicon.
+
+    Returns:
+        A copy of ``df`` with ``headline_sentiment`` added.
+    """
+    started = time.perf_counter()
+    model = model or load_model()
+    df = df.copy()
+    df["headline_sentiment"] = np.nan
+    if df.empty:
+        return df
+
+    titles = df["title"].astype(object)
+    has_title = titles.notna() & titles.ne(df["url"].astype(object))
+    normalized = titles[has_title].map(normalize_title).reset_index(drop=True)
+    keys = normalized.map(lambda t: hashlib.sha1(f"{model.version}:{t}".encode()).hexdigest())
+    unique = keys.drop_duplicates()
+
+    cache = ScoreCache(cache_path) if cache_path else None
+    try:
+        scores = cache.get_many(unique.tolist()) if cache else {}
+        missing = unique[[key not in scores for key in unique]]
+        for i in range(0, len(missing), BATCH_SIZE):
+            batch = missing.iloc[i : i + BATCH_SIZE]
+            fresh = dict(zip(batch, model.score(normalized[batch.index]).tolist()))
+            scores.update(fresh)
+            if cache:
+                cache.put_many(fresh)
+    finally:
+        if cache:
+            cache.close()
+
+    df.loc[has_title, "headline_sentiment"] = keys.map(scores).to_numpy()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Scored %d headlines (%d distinct, %d new) in %.2fs — %.0f titles/sec",
+        len(keys), len(unique), len(missing), elapsed, len(keys) / elapsed if elapsed else 0.0,
+    )
+    return df
@@ -1,31 +1,126 @@
 """Load transformed data into Supabase."""
 
+import json
 import logging
 import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import pandas as pd
-from supabase import create_client
+from supabase import Client, create_client
 
-from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, LOAD_CONCURRENCY
+from pipeline.metrics import RunMetrics
+from pipeline.rollup import touched_days
+from pipeline.themes import intern_rpc, with_theme_ids
 
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 500
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 5000
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+TARGET_BATCH_SECONDS = 2.0
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
 
 
 def _sanitize_record(record: dict) -> dict:
-    """Replace NaN/inf with None for JSON serialization."""
+    """Replace NaN/inf/NA with None for JSON serialization."""
     clean = {}
     for k, v in record.items():
-        if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
+        if v is pd.NA or isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
             clean[k] = None
         else:
             clean[k] = v
     return clean
 
 
-def load(df: pd.DataFrame) -> int:
-    """Upsert articles into Supabase in batches.
+class BatchSizer:
+    """Adapts the upsert batch size to observed round-trip latency.
+
+    Grows the batch by half while requests finish well under
+    ``TARGET_BATCH_SECONDS``, shrinks it proportionally when they run over,
+    and halves it after a failure. The size is also capped so a batch's
+    JSON payload stays under ``MAX_BATCH_BYTES``.
+    """
+
+    def __init__(self, initial: int = BATCH_SIZE, bytes_per_row: float = 0.0):
+        self.size = initial
+        self.bytes_per_row = bytes_per_row
+        self._lock = threading.Lock()
+
+    def next_size(self) -> int:
+        with self._lock:
+            size = self.size
+        if self.bytes_per_row:
+            size = min(size, int(MAX_BATCH_BYTES / self.bytes_per_row))
+        return max(MIN_BATCH_SIZE, size)
+
+    def observe(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            if seconds < TARGET_BATCH_SECONDS / 2:
+                self.size = min(MAX_BATCH_SIZE, int(self.size * 1.5))
+            elif seconds > TARGET_BATCH_SECONDS:
+                self.size = max(MIN_BATCH_SIZE, int(rows * TARGET_BATCH_SECONDS / seconds))
+
+    def failed(self) -> None:
+        with self._lock:
+            self.size = max(MIN_BATCH_SIZE, self.size // 2)
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt))
+
+
+def _upsert_batch(client: Client, batch: list[dict], sizer: BatchSizer) -> int:
+    """Upsert one batch, retrying with backoff; raises after ``MAX_RETRIES``."""
+    for attempt in range(MAX_RETRIES + 1):
+        began = time.perf_counter()
+        try:
+            client.table("articles").upsert(batch, on_conflict="url,published_date").execute()
+        except Exception as exc:
+            sizer.failed()
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            logger.warning("Upsert of %d rows failed (%s); retry %d in %.1fs", len(batch), exc, attempt + 1, delay)
+            time.sleep(delay)
+            continue
+        sizer.observe(len(batch), time.perf_counter() - began)
+        return len(batch)
+    return 0
+
+
+def ensure_partitions(client: Client, df: pd.DataFrame) -> None:
+    """Create any monthly ``articles`` partitions ``df`` needs (no-op when unpartitioned)."""
+    days = touched_days(df)
+    if days:
+        client.rpc("ensure_article_partitions", {"first_day": days[0], "last_day": days[-1]}).execute()
+
+
+def load(
+    df: pd.DataFrame,
+    client: Client | None = None,
+    concurrency: int = LOAD_CONCURRENCY,
+    metrics: RunMetrics | None = None,
+) -> int:
+    """Upsert articles into Supabase in concurrent, adaptively sized batches.
+
+    Up to ``concurrency`` batches are in flight on a shared client. Each
+    failed batch is retried on its own, so batches that already succeeded
+    are never re-sent.
+
+    Args:
+        df: Transformed articles.
+        client: Supabase client to reuse (e.g. across streamed pages).
+        concurrency: Maximum number of upsert requests in flight.
+        metrics: Run metrics to add the (sample-estimated) JSON bytes sent to.
 
     Returns:
         Number of rows upserted.
@@ -34,17 +129,30 @@ def load(df: pd.DataFrame) -> int:
         logger.info("No data to load")
         return 0
 
-    client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    if client is None:
+        client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    ensure_partitions(client, df)
+    df = with_theme_ids(df, intern_rpc(client))
     records = [_sanitize_record(r) for r in df.to_dict(orient="records")]
 
+    sample = records[:100]
+    sizer = BatchSizer(bytes_per_row=len(json.dumps(sample, default=str)) / len(sample))
+
     total = 0
-    for i in range(0, len(records), BATCH_SIZE):
-        batch = records[i : i + BATCH_SIZE]
-        client.table("articles").upsert(
-            batch, on_conflict="url,published_date"
-        ).execute()
-        total += len(batch)
-        logger.info("Upserted batch %d–%d", i, i + len(batch))
+    offset = 0
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while offset < len(records) or in_flight:
+            while offset < len(records) and len(in_flight) < concurrency:
+                batch = records[offset : offset + sizer.next_size()]
+                in_flight.add(pool.submit(_upsert_batch, client, batch, sizer))
+                logger.info("Upserting batch %d–%d", offset, offset + len(batch))
+                offset += len(batch)
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                total += future.result()
 
+    if metrics is not None:
+        metrics.add("load", bytes=sizer.bytes_per_row * len(records))
     logger.info("Loaded %d total rows", total)
     return total
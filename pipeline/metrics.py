@@ -0,0 +1,160 @@
+"""Per-stage run metrics, written as a JSON report and a Prometheus textfile.
+
+``run`` creates one ``RunMetrics`` per pipeline run and wraps each stage in
+``metrics.stage(name)``. A stage may run many times (once per streamed page,
+possibly on several threads at once); its wall time and counters add up.
+At the end of the run ``write`` drops ``run-<timestamp>.json`` and
+``ai_sentiment_pipeline.prom`` into ``METRICS_DIR``; point the node_exporter
+textfile collector at that directory to graph stage latency over time.
+Given a ``pipeline.profiling.StageProfiler``, every stage is also profiled.
+
+The OS only reports the process's lifetime peak RSS, so per stage the
+report gives how far that high-water mark rose while the stage ran
+(``rss_high_water_growth_bytes``): the stage that first needs the most
+memory shows the growth, later stages that fit under the mark show 0.
+Stages overlapping on other threads share the growth they cause.
+"""
+
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROM_FILE = "ai_sentiment_pipeline.prom"
+PREFIX = "ai_sentiment"
+COUNTERS = ("rows_in", "rows_out", "bytes")
+
+
+def peak_rss_bytes() -> int:
+    """High-water resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """In-memory size of a frame, including string and list payloads."""
+    return int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+
+
+def _empty_stage() -> dict:
+    return {"seconds": 0.0, "calls": 0, **{c: 0 for c in COUNTERS}, "dropped": {}, "rss_high_water_growth_bytes": 0}
+
+
+class RunMetrics:
+    """Thread-safe accumulator of per-stage wall time and counters."""
+
+    def __init__(self, profiler=None):
+        self.started = time.time()
+        self.profiler = profiler
+        self.stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str) -> dict:
+        return self.stages.setdefault(name, _empty_stage())
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time one execution of ``name`` and note how far the process peak RSS rose during it."""
+        high_water = peak_rss_bytes()
+        start = time.perf_counter()
+        try:
+            with self.profiler.stage(name) if self.profiler else nullcontext():
+                yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._stage(name)
+                stats["seconds"] += elapsed
+                stats["calls"] += 1
+                growth = peak_rss_bytes() - high_water
+                stats["rss_high_water_growth_bytes"] = max(stats["rss_high_water_growth_bytes"], growth)
+
+    def add(self, name: str, dropped: dict[str, int] | None = None, **counters: int) -> None:
+        """Add to ``name``'s counters (``rows_in``, ``rows_out``, ``bytes``) and drop reasons."""
+        with self._lock:
+            stats = self._stage(name)
+            for key, value in counters.items():
+                stats[key] += int(value)
+            for reason, count in (dropped or {}).items():
+                stats["dropped"][reason] = stats["dropped"].get(reason, 0) + int(count)
+
+    def report(self, status: str = "success", **extra) -> dict:
+        """The run as a JSON-serializable dict."""
+        with self._lock:
+            stages = {name: dict(stats, dropped=dict(stats["dropped"])) for name, stats in self.stages.items()}
+        return {
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            "seconds": round(time.time() - self.started, 3),
+            "status": status,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": stages,
+            **extra,
+        }
+
+    def write(self, directory: str | Path, status: str = "success", **extra) -> Path:
+        """Write the JSON report and Prometheus textfile; returns the report path."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        report = self.report(status, **extra)
+        stamp = datetime.fromtimestamp(self.started, timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = directory / f"run-{stamp}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+
+        # Write then rename, so the collector never reads a partial file
+        tmp = directory / f".{PROM_FILE}.{os.getpid()}.{threading.get_ident()}"
+        tmp.write_text(to_prometheus(report, self.started))
+        tmp.replace(directory / PROM_FILE)
+        logger.info("Wrote run report %s", path)
+        return path
+
+
+def to_prometheus(report: dict, timestamp: float) -> str:
+    """Render a run report in the Prometheus text exposition format."""
+    gauges = [
+        ("stage_seconds", "Wall time spent in each stage", "seconds"),
+        ("stage_calls", "Times each stage ran", "calls"),
+        ("stage_rows_in", "Rows entering each stage", "rows_in"),
+        ("stage_rows_out", "Rows leaving each stage", "rows_out"),
+        ("stage_bytes", "Bytes received (extract) or sent (load) by each stage", "bytes"),
+        (
+            "stage_rss_high_water_growth_bytes",
+            "Largest rise in the process peak RSS during one run of each stage",
+            "rss_high_water_growth_bytes",
+        ),
+    ]
+    lines = []
+    for name, help_text, key in gauges:
+        lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} gauge"]
+        for stage, stats in report["stages"].items():
+            lines.append(f'{PREFIX}_{name}{{stage="{stage}"}} {stats[key]}')
+
+    lines += [
+        f"# HELP {PREFIX}_stage_rows_dropped Rows a stage dropped, by reason",
+        f"# TYPE {PREFIX}_stage_rows_dropped gauge",
+    ]
+    for stage, stats in report["stages"].items():
+        for reason, count in stats["dropped"].items():
+            lines.append(f'{PREFIX}_stage_rows_dropped{{stage="{stage}",reason="{reason}"}} {count}')
+
+    lines += [
+        f"# HELP {PREFIX}_run_seconds Wall time of the whole run",
+        f"# TYPE {PREFIX}_run_seconds gauge",
+        f"{PREFIX}_run_seconds {report['seconds']}",
+        f"# HELP {PREFIX}_run_success Whether the last run succeeded",
+        f"# TYPE {PREFIX}_run_success gauge",
+        f"{PREFIX}_run_success {int(report['status'] == 'success')}",
+        f"# HELP {PREFIX}_run_timestamp_seconds Start time of the last run",
+        f"# TYPE {PREFIX}_run_timestamp_seconds gauge",
+        f"{PREFIX}_run_timestamp_seconds {timestamp:.0f}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,152 @@
+"""Per-stage CPU and memory profiles of a pipeline run.
+
+``StageProfiler`` plugs into ``RunMetrics``. Every ``metrics.stage(name)``
+block then also runs under cProfile and tracemalloc, while a sampler thread
+records the stage's call stack every few milliseconds. ``write`` leaves
+these files in one run directory:
+
+* ``<stage>.pstats``: the stage's cProfile data, for ``pstats``, snakeviz
+  and similar viewers;
+* ``<stage>.txt``: the slowest functions by cumulative and own time;
+* ``<stage>.alloc.txt``: peak traced memory and the top allocation sites
+  still holding memory when the stage finished;
+* ``stacks.collapsed``: sampled stacks in the collapsed format read by
+  ``flamegraph.pl`` and speedscope, rooted at the stage name.
+
+cProfile and tracemalloc see one stage at a time. While profiling, stages
+that would overlap (streaming runs) take turns. Work a stage hands to other
+threads or processes, such as load's upsert pool or transform workers,
+shows up only as waiting.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 30
+SAMPLE_INTERVAL = 0.005
+# Frames below this module are profiler plumbing
+_SKIP_FILES = (__file__, tracemalloc.__file__, cProfile.__file__)
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def collapse(frame, root: str) -> str:
+    """One sampled stack as a ``root;outer;...;inner`` line prefix."""
+    names = []
+    while frame is not None:
+        if frame.f_code.co_filename not in _SKIP_FILES:
+            names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join([root, *reversed(names)])
+
+
+class StageProfiler:
+    """cProfile, tracemalloc and stack samples, accumulated per stage."""
+
+    def __init__(self, directory: str | Path, top_n: int = TOP_N, interval: float = SAMPLE_INTERVAL):
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.interval = interval
+        self.profiles: dict[str, list[cProfile.Profile]] = {}
+        self.allocations: dict[str, Counter] = {}
+        self.peaks: dict[str, int] = {}
+        self.stacks: Counter = Counter()
+        self._turn = threading.RLock()
+        self._active: tuple[int, str] | None = None
+        self._sampler: threading.Thread | None = None
+        self._closed = threading.Event()
+
+    def _sample(self) -> None:
+        while not self._closed.wait(self.interval):
+            active = self._active
+            if active is None:
+                continue
+            frame = sys._current_frames().get(active[0])
+            if frame is not None:
+                self.stacks[collapse(frame, active[1])] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """Profile one execution of stage ``name``; nested stages count toward the outer one."""
+        with self._turn:
+            if self._active is not None:
+                yield self
+                return
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="stage-sampler", daemon=True)
+                self._sampler.start()
+
+            tracemalloc.start()
+            profile = cProfile.Profile()
+            self._active = (threading.get_ident(), name)
+            profile.enable()
+            try:
+                yield self
+            finally:
+                profile.disable()
+                self._active = None
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.profiles.setdefault(name, []).append(profile)
+                self.peaks[name] = max(self.peaks.get(name, 0), peak)
+                sites = self.allocations.setdefault(name, Counter())
+                filtered = snapshot.filter_traces([tracemalloc.Filter(False, path) for path in _SKIP_FILES])
+                for stat in filtered.statistics("lineno"):
+                    sites[str(stat.traceback[0])] += stat.size
+
+    def stats(self, name: str) -> pstats.Stats:
+        """Combined cProfile statistics of every execution of ``name``."""
+        return pstats.Stats(*self.profiles[name])
+
+    def summary(self, name: str, limit: int | None = None) -> str:
+        """The slowest functions of ``name`` by cumulative and by own time."""
+        limit = limit or self.top_n
+        out = io.StringIO()
+        stats = self.stats(name)
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(limit)
+        stats.sort_stats("tottime").print_stats(limit)
+        return out.getvalue()
+
+    def allocation_report(self, name: str) -> str:
+        """Peak traced memory and the top allocation sites of ``name``."""
+        lines = [f"peak traced memory: {self.peaks[name] / 2**20:,.1f} MB", "", "retained at stage end (all runs):"]
+        for site, size in self.allocations[name].most_common(self.top_n):
+            lines.append(f"{size / 2**20:>10,.2f} MB  {site}")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> Path:
+        """Write every stage's profile files and the collapsed stacks; returns the directory."""
+        self._closed.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name in self.profiles:
+            self.stats(name).dump_stats(self.directory / f"{name}.pstats")
+            (self.directory / f"{name}.txt").write_text(self.summary(name))
+            (self.directory / f"{name}.alloc.txt").write_text(self.allocation_report(name))
+        lines = [f"{stack} {count}" for stack, count in sorted(self.stacks.items())]
+        (self.directory / "stacks.collapsed").write_text("\n".join(lines) + "\n" if lines else "")
+        logger.info("Wrote stage profiles to %s", self.directory)
+        return self.directory
+
+
+def run_directory(root: str | Path) -> Path:
+    """A fresh ``run-<timestamp>`` directory name under ``root``."""
+    stamp = datetime.fromtimestamp(time.time(), timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return Path(root) / f"run-{stamp}"
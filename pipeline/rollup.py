@@ -0,0 +1,56 @@
+"""Incremental maintenance of the daily aggregate tables in Supabase."""
+
+import logging
+
+import pandas as pd
+
+from config.settings import SHIFT_MIN_ARTICLES, SHIFT_Z_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+def touched_days(df: pd.DataFrame) -> list[str]:
+    """Distinct ``published_date`` values (YYYY-MM-DD) in a transformed frame."""
+    if df.empty:
+        return []
+    return sorted(df["published_date"].dropna().unique().tolist())
+
+
+def refresh_rollups(client, days: list[str]) -> None:
+    """Recompute the per-day rollups for ``days`` from the articles table.
+
+    Only the days a load touched are rebuilt, so the cost is bounded by
+    the size of the load rather than the retention window. Covers the
+    country rollup and the ADM1 and lat/lon grid rollups behind zoomed-in
+    maps.
+    """
+    if not days:
+        return
+    client.rpc("refresh_country_rollup", {"days": days}).execute()
+    client.rpc("refresh_geo_rollups", {"days": days}).execute()
+    logger.info("Refreshed country and geo rollups for %d days (%s to %s)", len(days), days[0], days[-1])
+
+
+def refresh_rolling_stats(
+    client,
+    days: list[str],
+    z_threshold: float = SHIFT_Z_THRESHOLD,
+    min_articles: int = SHIFT_MIN_ARTICLES,
+) -> int:
+    """Move the per-country rolling tone windows forward past ``days``.
+
+    Run after ``refresh_rollups``. Each window is updated from the previous
+    day's running sums and the country rollup, never from the articles
+    table, and tone shift alerts are re-detected for the windows that moved.
+
+    Returns:
+        Number of shift alerts now recorded for those windows.
+    """
+    if not days:
+        return 0
+    alerts = client.rpc(
+        "refresh_country_rolling",
+        {"days": days, "z_threshold": z_threshold, "min_articles": min_articles},
+    ).execute().data or 0
+    logger.info("Refreshed rolling tone windows from %s; %d shift alerts", days[0], alerts)
+    return alerts
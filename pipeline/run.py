@@ -1,13 +1,37 @@
-"""Pipeline orchestrator: extract → transform → load → cleanup."""
+"""Pipeline orchestrator: extract → transform → score headlines → load → cleanup."""
 
+import argparse
 import logging
-import sys
-from datetime import date, timedelta
+from datetime import date
 
-from pipeline.extract import extract
-from pipeline.transform import transform
+import pandas as pd
+from supabase import Client, create_client
+
+from config.settings import (
+    GKG_FILES_DIR,
+    LOAD_BACKEND,
+    METRICS_DIR,
+    PROFILE_DIR,
+    SEEN_INDEX_PATH,
+    SUPABASE_URL,
+    SUPABASE_SERVICE_ROLE_KEY,
+    TRANSFORM_WORKERS,
+    WATERMARK_LOOKBACK_HOURS,
+)
+from pipeline.extract import extract, extract_pages
+from pipeline.gkg_files import extract_file_pages, extract_files
+from pipeline.transform import transform, transform_parallel
+from pipeline.headlines import score_headlines
 from pipeline.load import load
+from pipeline.load_pg import load_copy
 from pipeline.cleanup import cleanup
+from pipeline.data_version import publish_data_version
+from pipeline.metrics import RunMetrics, frame_bytes
+from pipeline.profiling import StageProfiler, run_directory
+from pipeline.rollup import refresh_rollups, refresh_rolling_stats, touched_days
+from pipeline.seen import SeenIndex
+from pipeline.stream import threaded
+from pipeline.watermark import advance_watermark, max_raw_date, read_watermark, with_lookback
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,26 +40,248 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run(start_date: date | None = None, end_date: date | None = None) -> None:
-    """Run the full pipeline."""
+def _load(df: pd.DataFrame, client: Client, metrics: RunMetrics) -> int:
+    """Load with the configured backend (``LOAD_BACKEND``)."""
+    with metrics.stage("load"):
+        if LOAD_BACKEND == "copy":
+            loaded = load_copy(df, metrics=metrics)
+        else:
+            loaded = load(df, client, metrics=metrics)
+    metrics.add("load", rows_in=len(df), rows_out=loaded)
+    return loaded
+
+
+def _transform(
+    raw: pd.DataFrame,
+    metrics: RunMetrics,
+    workers: int = 1,
+    seen: SeenIndex | None = None,
+) -> tuple[pd.DataFrame, tuple]:
+    """Transform and score one raw frame, recording both stages.
+
+    With ``seen``, raw rows whose GKG records were already loaded are
+    dropped before transform, and scored rows identical to what was last
+    loaded are dropped after it.
+
+    Returns:
+        The rows to load, and the arguments for ``seen.stage`` once they are loaded.
+    """
+    pending = (None, None)
+    if seen is not None:
+        with metrics.stage("seen_index"):
+            kept, digests = seen.drop_seen_raw(raw)
+        metrics.add("seen_index", dropped={"loaded_before": len(raw) - len(kept)})
+        raw, pending = kept, (digests, None)
+    with metrics.stage("transform"):
+        clean = transform_parallel(raw, workers)
+    metrics.add("transform", rows_in=len(raw), rows_out=len(clean), dropped=clean.attrs.get("dropped"))
+    with metrics.stage("headlines"):
+        clean = score_headlines(clean)
+    metrics.add("headlines", rows_in=len(clean), rows_out=len(clean))
+    if seen is not None:
+        with metrics.stage("seen_index"):
+            changed, hashes = seen.drop_unchanged(clean)
+        metrics.add("seen_index", dropped={"unchanged": len(clean) - len(changed)})
+        clean, pending = changed, (pending[0], hashes)
+    return clean, pending
+
+
+def _run_streaming(
+    start_date: date | None,
+    end_date: date | None,
+    client: Client,
+    metrics: RunMetrics,
+    since: int | None = None,
+    gkg_dir: str | None = None,
+    seen: SeenIndex | None = None,
+    workers: int = 1,
+) -> tuple[int, int | None, list[str]]:
+    """Extract, transform and load page by page with overlapping stages.
+
+    BigQuery page fetches (or GKG file reads, with ``gkg_dir``), transform
+    and upserts each run in their own thread, connected by bounded queues,
+    so at most a few pages are in memory at once regardless of the date range.
+    GKG files are read by ``workers`` processes, a bounded number ahead.
+    With ``seen``, each page's index entries are staged as it loads.
+
+    Returns:
+        Rows loaded, the largest ``raw_date`` extracted and the days loaded.
+    """
+    marks = []
+    days = set()
+
+    def tracked(pages):
+        pages = iter(pages)
+        while True:
+            with metrics.stage("extract"):
+                page = next(pages, None)
+            if page is None:
+                return
+            metrics.add("extract", rows_out=len(page), bytes=frame_bytes(page))
+            marks.append(max_raw_date(page))
+            yield page
+
+    if gkg_dir:
+        source = extract_file_pages(gkg_dir, start_date, end_date, since=since, workers=workers)
+    else:
+        source = extract_pages(start_date, end_date, since=since)
+    pages = threaded(tracked(source))
+    frames = threaded(_transform(page, metrics, seen=seen) for page in pages)
+
+    loaded = 0
+    for frame, page_pending in frames:
+        loaded += _load(frame, client, metrics)
+        if seen is not None:
+            seen.stage(*page_pending)
+        days.update(touched_days(frame))
+    return loaded, max((m for m in marks if m is not None), default=None), sorted(days)
+
+
+def run(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    workers: int = TRANSFORM_WORKERS,
+    stream: bool = False,
+    incremental: bool = True,
+    finalize: bool = True,
+    gkg_dir: str | None = GKG_FILES_DIR,
+    seen_path: str | None = SEEN_INDEX_PATH,
+    profile_dir: str | None = None,
+) -> int:
+    """Run the full pipeline.
+
+    Args:
+        start_date: Inclusive start date, passed to ``extract``.
+        end_date: Inclusive end date, passed to ``extract``.
+        workers: Transform processes; more than one enables chunked parallel
+            transform (not in streaming runs). Also the GKG file readers with ``gkg_dir``.
+        stream: Process BigQuery result pages incrementally with bounded memory.
+        incremental: Without an explicit start date, only extract records
+            newer than the stored watermark (minus ``WATERMARK_LOOKBACK_HOURS``).
+        finalize: Move the rolling tone windows forward, advance the
+            watermark and run retention cleanup. Disabled for backfill units,
+            which the scheduler finalizes once at the end.
+        gkg_dir: Read GKG 2.1 ``.gkg.csv.zip`` files from this directory
+            instead of querying BigQuery (see ``pipeline.gkg_files``).
+        seen_path: SQLite index of loaded rows (see ``pipeline.seen``);
+            rows it has already loaded unchanged are skipped. Empty or None
+            transforms and loads every extracted row.
+        profile_dir: Profile every stage (see ``pipeline.profiling``) and
+            write the results to a new ``run-<timestamp>`` directory here.
+
+    Returns:
+        Number of rows loaded.
+    """
     logger.info("Pipeline starting")
+    profiler = StageProfiler(run_directory(profile_dir)) if profile_dir else None
+    metrics = RunMetrics(profiler)
+    loaded = 0
+    deleted = 0
+    status = "failed"
+    seen = SeenIndex(seen_path) if seen_path else None
+    try:
+        client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
-    raw_df = extract(start_date, end_date)
-    clean_df = transform(raw_df)
-    loaded = load(clean_df)
-    cleanup()
+        since = None
+        if incremental and start_date is None:
+            mark = read_watermark(client)
+            if mark is not None:
+                since = with_lookback(mark, WATERMARK_LOOKBACK_HOURS)
+                logger.info("Incremental extract after %s (watermark %s)", since, mark)
+
+        if stream:
+            loaded, mark, days = _run_streaming(
+                start_date, end_date, client, metrics, since, gkg_dir, seen, workers
+            )
+        else:
+            with metrics.stage("extract"):
+                if gkg_dir:
+                    raw_df = extract_files(gkg_dir, start_date, end_date, since=since, workers=workers)
+                else:
+                    raw_df = extract(start_date, end_date, since=since)
+            metrics.add("extract", rows_out=len(raw_df), bytes=frame_bytes(raw_df))
+            mark = max_raw_date(raw_df)
+            clean_df, pending = _transform(raw_df, metrics, workers, seen)
+            loaded = _load(clean_df, client, metrics)
+            if seen is not None:
+                seen.stage(*pending)
+            days = touched_days(clean_df)
+        with metrics.stage("rollup"):
+            refresh_rollups(client, days)
+        if finalize:
+            # Windows move forward day by day to the newest rollup day, so
+            # backfills do this once for their whole range instead of per unit
+            with metrics.stage("rolling"):
+                alerts = refresh_rolling_stats(client, days)
+            metrics.add("rolling", rows_out=alerts)
+            # Only advance once the rows are safely loaded
+            advance_watermark(client, mark)
+            with metrics.stage("cleanup"):
+                deleted = cleanup()
+            metrics.add("cleanup", dropped={"retention": deleted})
+        if days or deleted:
+            # Last, once everything is in place: dashboard caches are now stale
+            publish_data_version(client)
+        if seen is not None:
+            # Only now: rows skipped as seen on a rerun must already be in
+            # the rollups and the published data
+            seen.commit()
+        status = "success"
+    finally:
+        if seen is not None:
+            if status != "success":
+                seen.discard()
+            seen.close()
+        if METRICS_DIR:
+            metrics.write(METRICS_DIR, status, rows_loaded=loaded)
+        if profiler is not None:
+            profiler.write()
 
     logger.info("Pipeline complete — %d rows loaded", loaded)
+    return loaded
 
 
 def main() -> None:
     """Entry point with optional CLI backfill args: start_date end_date."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("start_date", nargs="?", type=date.fromisoformat)
+    parser.add_argument("end_date", nargs="?", type=date.fromisoformat)
+    parser.add_argument(
+        "--workers", type=int, default=TRANSFORM_WORKERS,
+        help="transform worker processes (default: TRANSFORM_WORKERS)",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="stream BigQuery pages through transform and load with bounded memory",
+    )
+    parser.add_argument(
+        "--full-window", action="store_true",
+        help="ignore the extract watermark and re-extract the default window",
+    )
+    parser.add_argument(
+        "--gkg-dir", default=GKG_FILES_DIR,
+        help="read GKG 2.1 .gkg.csv.zip files from this directory instead of BigQuery (default: GKG_FILES_DIR)",
+    )
+    parser.add_argument(
+        "--no-seen-index", action="store_true",
+        help="transform and load every extracted row, even ones already loaded unchanged",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+        help="profile each stage with cProfile and tracemalloc into a run directory under DIR "
+             "(default: PROFILE_DIR); stages no longer overlap while profiling",
+    )
+    args = parser.parse_args()
+
     start = end = None
-    if len(sys.argv) >= 3:
-        start = date.fromisoformat(sys.argv[1])
-        end = date.fromisoformat(sys.argv[2])
+    if args.start_date and args.end_date:
+        start, end = args.start_date, args.end_date
         logger.info("Backfill mode: %s to %s", start, end)
-    run(start, end)
+    run(
+        start, end, workers=args.workers, stream=args.stream, incremental=not args.full_window,
+        gkg_dir=args.gkg_dir, seen_path=None if args.no_seen_index else SEEN_INDEX_PATH,
+        profile_dir=args.profile,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""Local index of loaded articles, used to skip rows that have not changed.
+
+The overlapping extract window and backfill reruns bring back the same GKG
+records again and again. Re-upserting them rewrites identical rows, and
+every rewrite churns the row, its indexes and the WAL. ``SeenIndex`` is a
+SQLite file holding, for each loaded ``(url, published_date)``:
+
+* ``row_hash``: a hash of the transformed record as it was sent to
+  ``load``. Rows whose hash matches are dropped just before loading.
+* ``raw_digest``: a hash of the GKG records (``url`` and ``DATE``) that
+  produced the row. GKG records never change once published. When the same
+  records come back, transforming them would give the row that was already
+  loaded, so they are dropped before ``transform``. Digests are taken per
+  frame, so a key whose records are split across streamed pages never
+  matches and is always transformed (and loaded, if its pages disagree).
+
+Raw digests depend on the transform code. They are cleared whenever
+``transform.py``, ``headlines.py`` or the headline lexicon changes. Row
+hashes still skip rows that come out the same. A run stages each page's
+entries in a ``pending`` table of the same file as the page loads, and
+``commit`` promotes them once the whole run has succeeded, so a failed run
+remembers nothing and memory stays flat however many pages a run has.
+``cleanup`` prunes entries at the retention cutoff.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from pipeline import headlines, transform
+from pipeline.themes import _theme_lists
+from pipeline.transform import _column, _published_date
+
+logger = logging.getLogger(__name__)
+
+KEY = ["url", "published_date"]
+# List columns, hashed as their joined names
+_LIST_COLUMNS = ("themes",)
+
+
+def code_version() -> str:
+    """Hash of the code and data that turn GKG records into loaded rows."""
+    digest = hashlib.sha256()
+    for path in (transform.__file__, headlines.__file__, headlines.LEXICON_PATH):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _signed(hashes) -> np.ndarray:
+    """uint64 hashes as the signed 64-bit integers SQLite stores."""
+    return np.asarray(hashes, dtype=np.uint64).view(np.int64)
+
+
+def _hash(columns: dict) -> np.ndarray:
+    """Signed 64-bit hash of each row of ``columns``."""
+    return _signed(pd.util.hash_pandas_object(pd.DataFrame(columns), index=False, categorize=False).to_numpy())
+
+
+def _keys(url, published_date) -> np.ndarray:
+    """64-bit id of each ``(url, published_date)``."""
+    return _hash({"url": np.asarray(url, dtype=object), "published_date": np.asarray(published_date, dtype=object)})
+
+
+def raw_digests(raw: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    """Digest of the GKG records behind each ``(url, published_date)`` in ``raw``.
+
+    A key's digest covers the ``raw_date`` of all its records, in order, so
+    any new record for the key changes it.
+
+    Returns:
+        ``(digests, codes)``: one row per key with ``key``,
+        ``published_date`` and ``value`` (the digest), and each raw row's
+        position in ``digests`` (-1 for rows without a url or date).
+    """
+    dates, ok = _published_date(raw)
+    url = _column(raw, "url")
+    valid = np.flatnonzero(ok & url.notna().to_numpy())
+    codes = np.full(len(raw), -1)
+    if not len(valid):
+        return pd.DataFrame(columns=["key", "published_date", "value"]), codes
+
+    dates = dates.take(valid).to_numpy(zero_copy_only=False)
+    keys = _keys(url.iloc[valid], dates)
+    # Keys are numbered in order of first appearance
+    codes[valid], unique = pd.factorize(keys)
+    raw_date = pd.to_numeric(_column(raw, "raw_date").iloc[valid], errors="coerce").fillna(-1).astype("int64")
+    hashes = _hash({
+        "key": keys,
+        "raw_date": raw_date.to_numpy(),
+        "position": pd.Series(codes[valid]).groupby(codes[valid]).cumcount().to_numpy(),
+    })
+    order = np.argsort(codes[valid], kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[valid][order]) != 0])
+    digests = pd.DataFrame({
+        "key": unique,
+        "published_date": dates[order[starts]],
+        "value": np.bitwise_xor.reduceat(hashes[order], starts),
+    })
+    return digests, codes
+
+
+def row_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """Content hash of every record in a transformed frame, with its key."""
+    columns = {}
+    for name in df.columns:
+        values = df[name]
+        if name in _LIST_COLUMNS:
+            joined = pc.binary_join(_theme_lists(values), "\x1f")
+            values = pd.Series(joined.to_numpy(zero_copy_only=False), index=df.index, dtype=object)
+        columns[name] = values
+    published_date = df["published_date"].astype(object).to_numpy()
+    return pd.DataFrame({
+        "key": _keys(df["url"], published_date),
+        "published_date": published_date,
+        "value": _hash(columns),
+    })
+
+
+class SeenIndex:
+    """SQLite table of ``key → published_date, raw_digest, row_hash``.
+
+    ``key`` is a 64-bit hash of ``(url, published_date)``. Lookups read the
+    entries for the date range of a frame and match them in NumPy, so they
+    cost one indexed range scan however many rows the frame has. Safe to
+    share between the threads of a streaming run. Entries staged through
+    this instance are tagged with its own run id, so concurrent runs on
+    the same file only commit or discard their own.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.run_id = uuid.uuid4().hex
+        self.conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " key INTEGER PRIMARY KEY, published_date TEXT NOT NULL,"
+                " raw_digest INTEGER, row_hash INTEGER)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS seen_published_date ON seen (published_date)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending ("
+                " run TEXT NOT NULL, key INTEGER NOT NULL, published_date TEXT NOT NULL,"
+                " raw_digest INTEGER, row_hash INTEGER)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pending_run ON pending (run)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            version = code_version()
+            stored = self.conn.execute("SELECT value FROM meta WHERE key = 'code_version'").fetchone()
+            if stored is None or stored[0] != version:
+                if stored is not None:
+                    logger.info("Transform code changed; every GKG record will be transformed again")
+                self.conn.execute("UPDATE seen SET raw_digest = NULL")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('code_version', ?)", (version,))
+
+    def _matching(self, column: str, rows: pd.DataFrame) -> np.ndarray:
+        """Mask of ``rows`` whose stored ``column`` equals their ``value``."""
+        if rows.empty:
+            return np.zeros(0, dtype=bool)
+        dates = rows["published_date"]
+        with self._lock:
+            stored = self.conn.execute(
+                f"SELECT key, {column} FROM seen WHERE published_date BETWEEN ? AND ? AND {column} IS NOT NULL",
+                (dates.min(), dates.max()),
+            ).fetchall()
+        if not stored:
+            return np.zeros(len(rows), dtype=bool)
+        keys, values = np.array(stored, dtype=np.int64).T
+        positions = pd.Index(keys).get_indexer(rows["key"].to_numpy())
+        return (positions >= 0) & (values[positions] == rows["value"].to_numpy())
+
+    def _store(self, column: str, rows: pd.DataFrame) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO seen (key, published_date, {column}) VALUES (?, ?, ?) "
+                f"ON CONFLICT (key) DO UPDATE SET {column} = excluded.{column}",
+                zip(rows["key"].tolist(), rows["published_date"].tolist(), rows["value"].tolist()),
+            )
+
+    def _stage(self, column: str, rows: pd.DataFrame) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO pending (run, key, published_date, {column}) VALUES (?, ?, ?, ?)",
+                zip(
+                    [self.run_id] * len(rows),
+                    rows["key"].tolist(),
+                    rows["published_date"].tolist(),
+                    rows["value"].tolist(),
+                ),
+            )
+
+    def drop_seen_raw(self, raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Drop raw rows whose key's GKG records were all loaded before.
+
+        Returns:
+            ``(rows, digests)``: the raw rows still to transform, and the
+            new or changed key digests, for ``record`` once loaded.
+        """
+        if raw.empty or "raw_date" not in raw.columns:
+            return raw, pd.DataFrame(columns=["key", "published_date", "value"])
+        digests, codes = raw_digests(raw)
+        seen = self._matching("raw_digest", digests)
+        # Rows without a key (code -1) pick the trailing False
+        skip = np.append(seen, False)[codes]
+        logger.info("Skipping %d of %d raw rows already loaded", skip.sum(), len(raw))
+        return raw[~skip], digests[~seen]
+
+    def drop_unchanged(self, df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Drop transformed rows identical to what was last loaded for their key.
+
+        Returns:
+            ``(rows, hashes)``: the rows to load, and their content hashes
+            for ``record`` once loaded.
+        """
+        if df.empty:
+            return df, pd.DataFrame(columns=["key", "published_date", "value"])
+        hashes = row_hashes(df)
+        unchanged = self._matching("row_hash", hashes)
+        logger.info("Skipping %d of %d rows unchanged since they were loaded", unchanged.sum(), len(df))
+        return df[~unchanged], hashes[~unchanged]
+
+    def record(self, digests: pd.DataFrame | None = None, hashes: pd.DataFrame | None = None) -> None:
+        """Remember raw digests and loaded row hashes. Call only after a successful load."""
+        if digests is not None and not digests.empty:
+            self._store("raw_digest", digests)
+        if hashes is not None and not hashes.empty:
+            self._store("row_hash", hashes)
+
+    def stage(self, digests: pd.DataFrame | None = None, hashes: pd.DataFrame | None = None) -> None:
+        """Like ``record``, but held back until ``commit``. Call once a page is loaded."""
+        if digests is not None and not digests.empty:
+            self._stage("raw_digest", digests)
+        if hashes is not None and not hashes.empty:
+            self._stage("row_hash", hashes)
+
+    def commit(self) -> None:
+        """Promote every entry this run staged. Call only once the whole run has succeeded."""
+        with self._lock, self.conn:
+            # Staging order, so a key staged by several pages keeps its last value
+            self.conn.execute(
+                "INSERT INTO seen (key, published_date, raw_digest, row_hash) "
+                "SELECT key, published_date, raw_digest, row_hash FROM pending WHERE run = ? ORDER BY rowid "
+                "ON CONFLICT (key) DO UPDATE SET"
+                " raw_digest = coalesce(excluded.raw_digest, raw_digest),"
+                " row_hash = coalesce(excluded.row_hash, row_hash)",
+                (self.run_id,),
+            )
+            self.conn.execute("DELETE FROM pending WHERE run = ?", (self.run_id,))
+
+    def discard(self) -> None:
+        """Forget every entry this run staged, e.g. after it failed."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM pending WHERE run = ?", (self.run_id,))
+
+    def forget_before(self, cutoff: date) -> int:
+        """Drop entries published before ``cutoff``; returns how many.
+
+        Also drops entries staged before ``cutoff`` by runs killed before
+        they could commit or discard them.
+        """
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM pending WHERE published_date < ?", (cutoff.isoformat(),))
+            return self.conn.execute("DELETE FROM seen WHERE published_date < ?", (cutoff.isoformat(),)).rowcount
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,19 @@
+"""Small key/value pipeline state persisted in the Supabase ``pipeline_state`` table."""
+
+from datetime import datetime, timezone
+
+TABLE = "pipeline_state"
+
+
+def get_state(client, key: str) -> str | None:
+    """Return the stored value for ``key``, or None if unset."""
+    result = client.table(TABLE).select("value").eq("key", key).execute()
+    return result.data[0]["value"] if result.data else None
+
+
+def set_state(client, key: str, value: str) -> None:
+    """Insert or replace the value for ``key``."""
+    client.table(TABLE).upsert(
+        {"key": key, "value": value, "updated_at": datetime.now(timezone.utc).isoformat()},
+        on_conflict="key",
+    ).execute()
@@ -0,0 +1,64 @@
+"""Bounded-queue helpers for overlapping pipeline stages in threads."""
+
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from typing import TypeVar
+
+T = TypeVar("T")
+
+QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class _Raised:
+    """Wraps an exception raised by a producer so the consumer can re-raise it."""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Block until ``item`` is queued; give up (False) once ``stop`` is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def threaded(items: Iterable[T], maxsize: int = QUEUE_SIZE) -> Iterator[T]:
+    """Iterate ``items`` in a background thread, buffering at most ``maxsize``.
+
+    The producer runs ahead of the consumer by up to ``maxsize`` items, so
+    chaining ``threaded`` calls overlaps I/O-bound and CPU-bound stages while
+    keeping memory bounded. Producer exceptions are re-raised in the
+    consumer; closing the consumer early stops the producer.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not _put(q, item, stop):
+                    return
+            _put(q, _DONE, stop)
+        except BaseException as exc:
+            _put(q, _Raised(exc), stop)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Raised):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,81 @@
+"""Theme dictionary: GKG theme names stored as integer ids.
+
+``articles.theme_ids`` holds ids from the ``themes`` table instead of the
+theme strings themselves. Before a load, ``with_theme_ids`` collects every
+distinct theme name in the frame, interns them all with one
+``intern_themes`` call and maps each row's names to ids in bulk.
+"""
+
+import logging
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+# Names per intern_themes call, keeping request bodies small
+INTERN_BATCH = 5_000
+
+
+def _theme_lists(themes: pd.Series) -> pa.ListArray:
+    """A ``themes`` column (Arrow list or Python lists) as Arrow ``list<string>``."""
+    lists = pa.array(themes, from_pandas=True)
+    if isinstance(lists, pa.ChunkedArray):
+        lists = lists.combine_chunks()
+    if pa.types.is_null(lists.type):
+        lists = pa.nulls(len(lists), pa.list_(pa.string()))
+    return lists.cast(pa.list_(pa.string()))
+
+
+def theme_names(themes: pd.Series) -> list[str]:
+    """Distinct theme names in a ``themes`` column."""
+    return pc.unique(pc.list_flatten(_theme_lists(themes))).to_pylist()
+
+
+def theme_id_lists(themes: pd.Series, ids: dict[str, int]) -> list[list[int] | None]:
+    """Each row's theme names replaced by their ids, in the same order.
+
+    Args:
+        themes: Column of theme name lists.
+        ids: Id of every name in ``themes`` (see ``theme_names``).
+    """
+    lists = _theme_lists(themes)
+    flat = pc.list_flatten(lists)
+    positions = pc.index_in(flat, value_set=pa.array(list(ids), pa.string())).to_numpy(zero_copy_only=False)
+    codes = np.fromiter(ids.values(), dtype=np.int32, count=len(ids))
+    values = pa.array(codes[positions.astype(np.int64)] if len(flat) else [], pa.int32())
+    offsets = pc.subtract(lists.offsets, lists.offsets[0])
+    return pa.ListArray.from_arrays(offsets, values, mask=lists.is_null()).to_pylist()
+
+
+def intern_rpc(client) -> Callable[[list[str]], dict[str, int]]:
+    """``intern_themes`` through a Supabase client."""
+    def intern(names: list[str]) -> dict[str, int]:
+        return client.rpc("intern_themes", {"names": names}).execute().data or {}
+    return intern
+
+
+def with_theme_ids(df: pd.DataFrame, intern: Callable[[list[str]], dict[str, int]]) -> pd.DataFrame:
+    """Replace the ``themes`` column with ``theme_ids``.
+
+    Args:
+        df: Transformed articles.
+        intern: Maps a list of theme names to ``{name: id}``, creating ids
+            for new names (the ``intern_themes`` RPC).
+
+    Returns:
+        ``df`` with ``theme_ids`` instead of ``themes``; unchanged if it has
+        no ``themes`` column.
+    """
+    if "themes" not in df.columns:
+        return df
+    names = theme_names(df["themes"])
+    ids: dict[str, int] = {}
+    for i in range(0, len(names), INTERN_BATCH):
+        ids.update(intern(names[i : i + INTERN_BATCH]))
+    logger.info("Interned %d distinct themes", len(names))
+    theme_ids = theme_id_lists(df["themes"], ids)
+    return df.drop(columns="themes").assign(theme_ids=pd.Series(theme_ids, index=df.index, dtype=object))
@@ -0,0 +1,51 @@
+"""High-water mark of the largest GKG ``DATE`` (``raw_date``) already ingested.
+
+GKG timestamps are YYYYMMDDHHMMSS integers. The mark is stored in the
+``pipeline_state`` table so it survives the ephemeral CI runner.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from pipeline.state import get_state, set_state
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "extract_watermark"
+_FORMAT = "%Y%m%d%H%M%S"
+
+
+def read_watermark(client) -> int | None:
+    value = get_state(client, WATERMARK_KEY)
+    return int(value) if value is not None else None
+
+
+def advance_watermark(client, mark: int | None) -> None:
+    """Persist ``mark`` if it is newer than the stored watermark."""
+    if mark is None:
+        return
+    current = read_watermark(client)
+    if current is None or mark > current:
+        set_state(client, WATERMARK_KEY, str(mark))
+        logger.info("Advanced extract watermark %s → %s", current, mark)
+
+
+def max_raw_date(df: pd.DataFrame) -> int | None:
+    """Largest ``raw_date`` in an extracted frame, or None if there is none."""
+    if df.empty or "raw_date" not in df.columns:
+        return None
+    mark = pd.to_numeric(df["raw_date"], errors="coerce").max()
+    return None if pd.isna(mark) else int(mark)
+
+
+def with_lookback(mark: int, hours: float) -> int:
+    """Move a GKG timestamp back by ``hours`` to re-read late arrivals."""
+    moment = datetime.strptime(str(mark), _FORMAT) - timedelta(hours=hours)
+    return int(moment.strftime(_FORMAT))
+
+
+def partition_date(stamp: int) -> date:
+    """Calendar day of a GKG timestamp, used as the first partition to scan."""
+    return datetime.strptime(str(stamp), _FORMAT).date()
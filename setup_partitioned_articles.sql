@@ -0,0 +1,89 @@
+-- =============================================================
+-- AI Sentiment Heatmap — partition articles by month
+-- Run once, after setup_supabase.sql, in the Supabase SQL Editor.
+-- Rewrites articles as a table range-partitioned on published_date
+-- (one partition per month), so retention drops whole months instead of
+-- deleting rows. Existing rows and ids are kept; the table is locked
+-- while they are copied.
+-- =============================================================
+
+BEGIN;
+
+LOCK TABLE articles IN ACCESS EXCLUSIVE MODE;
+
+-- The partition key has to be part of every unique constraint
+CREATE TABLE articles_partitioned (
+    LIKE articles INCLUDING DEFAULTS INCLUDING IDENTITY,
+    PRIMARY KEY (id, published_date),
+    UNIQUE (url, published_date)
+) PARTITION BY RANGE (published_date);
+
+ALTER TABLE articles RENAME TO articles_unpartitioned;
+ALTER TABLE articles_partitioned RENAME TO articles;
+
+SELECT ensure_article_partitions(
+    COALESCE(MIN(published_date), CURRENT_DATE),
+    COALESCE(MAX(published_date), CURRENT_DATE)
+)
+FROM articles_unpartitioned;
+
+INSERT INTO articles OVERRIDING SYSTEM VALUE
+SELECT * FROM articles_unpartitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('articles', 'id'),
+    COALESCE(MAX(id), 1),
+    MAX(id) IS NOT NULL
+)
+FROM articles;
+
+DROP TABLE articles_unpartitioned;
+
+ALTER SEQUENCE articles_partitioned_id_seq RENAME TO articles_id_seq;
+ALTER TABLE articles RENAME CONSTRAINT articles_partitioned_pkey TO articles_pkey;
+ALTER TABLE articles RENAME CONSTRAINT articles_partitioned_url_published_date_key
+    TO articles_url_published_date_key;
+
+-- Same indexes as setup_supabase.sql, now one per partition
+CREATE INDEX IF NOT EXISTS idx_articles_published_date
+    ON articles (published_date);
+
+CREATE INDEX IF NOT EXISTS idx_articles_specific_country_date
+    ON articles (specific_country_code, published_date);
+
+CREATE INDEX IF NOT EXISTS idx_articles_mentioned_country_date
+    ON articles (mentioned_country_code, published_date);
+
+CREATE INDEX IF NOT EXISTS idx_articles_mentioned_country_tone
+    ON articles (mentioned_country_code, avg_tone, id);
+
+CREATE INDEX IF NOT EXISTS idx_articles_theme_ids
+    ON articles USING GIN (theme_ids);
+
+ALTER TABLE articles ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON articles;
+CREATE POLICY "Public read access"
+    ON articles FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "Service role insert" ON articles;
+CREATE POLICY "Service role insert"
+    ON articles FOR INSERT
+    TO service_role
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role update" ON articles;
+CREATE POLICY "Service role update"
+    ON articles FOR UPDATE
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role delete" ON articles;
+CREATE POLICY "Service role delete"
+    ON articles FOR DELETE
+    TO service_role
+    USING (true);
+
+COMMIT;
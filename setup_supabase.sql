@@ -1,6 +1,8 @@
 -- =============================================================
 -- AI Sentiment Heatmap — Supabase schema
--- Run this once in the Supabase SQL Editor
+-- Run this in the Supabase SQL Editor. It is safe to re-run on an
+-- existing database, which is how schema updates are applied: new
+-- columns, tables and functions are added and existing rows are kept.
 -- =============================================================
 
 -- 1. Articles table
@@ -11,7 +13,9 @@ CREATE TABLE IF NOT EXISTS articles (
     source_name     TEXT,
     avg_tone        DOUBLE PRECISION,
     published_date  DATE        NOT NULL,
-    themes          TEXT[],
+    themes          TEXT[],     -- superseded by theme_ids; no longer written
+    theme_ids       INTEGER[],  -- ids in the themes dictionary, in mention order
+    headline_sentiment DOUBLE PRECISION,
     ingested_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
 
     -- Most specific location (highest granularity from V2Locations)
@@ -33,6 +37,61 @@ CREATE TABLE IF NOT EXISTS articles (
     UNIQUE (url, published_date)
 );
 
+-- Added with the headline sentiment stage; no-op on fresh installs
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS headline_sentiment DOUBLE PRECISION;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS theme_ids INTEGER[];
+
+-- 1b. Theme dictionary: each GKG theme name stored once, referenced from
+--     articles.theme_ids. Loaders intern the names of a whole frame with
+--     one intern_themes() call.
+CREATE TABLE IF NOT EXISTS themes (
+    id    INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name  TEXT    NOT NULL UNIQUE
+);
+
+ALTER TABLE themes ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON themes;
+CREATE POLICY "Public read access"
+    ON themes FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "Service role insert" ON themes;
+CREATE POLICY "Service role insert"
+    ON themes FOR INSERT
+    TO service_role
+    WITH CHECK (true);
+
+-- Ids for names, adding the ones not seen before. Returns one JSON object
+-- {name: id}, so large frames are not cut off by the API row limit.
+CREATE OR REPLACE FUNCTION intern_themes(names TEXT[])
+RETURNS JSON
+LANGUAGE sql
+AS $$
+    -- Sorted so concurrent loads insert in the same order and cannot deadlock
+    INSERT INTO themes (name)
+    SELECT DISTINCT n FROM unnest(names) AS n
+    ORDER BY n
+    ON CONFLICT (name) DO NOTHING;
+
+    SELECT COALESCE(json_object_agg(t.name, t.id), '{}')
+    FROM themes t
+    WHERE t.name = ANY(names);
+$$;
+
+-- One-time move of TEXT[] themes loaded before the dictionary existed
+SELECT intern_themes(ARRAY(SELECT DISTINCT unnest(themes) FROM articles WHERE theme_ids IS NULL));
+
+UPDATE articles a
+SET theme_ids = ARRAY(
+        SELECT t.id
+        FROM unnest(a.themes) WITH ORDINALITY AS u(name, n)
+        JOIN themes t ON t.name = u.name
+        ORDER BY u.n
+    ),
+    themes = NULL
+WHERE a.themes IS NOT NULL AND a.theme_ids IS NULL;
+
 -- 2. Indexes
 CREATE INDEX IF NOT EXISTS idx_articles_published_date
     ON articles (published_date);
@@ -43,29 +102,399 @@ CREATE INDEX IF NOT EXISTS idx_articles_specific_country_date
 CREATE INDEX IF NOT EXISTS idx_articles_mentioned_country_date
     ON articles (mentioned_country_code, published_date);
 
+-- Drill-down sorted by tone (see get_country_articles)
+CREATE INDEX IF NOT EXISTS idx_articles_mentioned_country_tone
+    ON articles (mentioned_country_code, avg_tone, id);
+
+-- Theme filters (theme_ids @> ARRAY[id], see get_sentiment_by_country_and_theme)
+CREATE INDEX IF NOT EXISTS idx_articles_theme_ids
+    ON articles USING GIN (theme_ids);
+
 -- 3. Row-Level Security
 ALTER TABLE articles ENABLE ROW LEVEL SECURITY;
 
 -- Public read access (anon key)
+DROP POLICY IF EXISTS "Public read access" ON articles;
 CREATE POLICY "Public read access"
     ON articles FOR SELECT
     USING (true);
 
 -- Service-role write access
+DROP POLICY IF EXISTS "Service role insert" ON articles;
 CREATE POLICY "Service role insert"
     ON articles FOR INSERT
+    TO service_role
     WITH CHECK (true);
 
+DROP POLICY IF EXISTS "Service role update" ON articles;
 CREATE POLICY "Service role update"
     ON articles FOR UPDATE
+    TO service_role
     USING (true)
     WITH CHECK (true);
 
+DROP POLICY IF EXISTS "Service role delete" ON articles;
 CREATE POLICY "Service role delete"
     ON articles FOR DELETE
+    TO service_role
+    USING (true);
+
+-- 4. Daily country rollup: per (country, day) tone sum and counts so the
+--    dashboard RPC never scans raw articles. Maintained by the pipeline via
+--    refresh_country_rollup() for the days each load touches.
+CREATE TABLE IF NOT EXISTS country_daily_sentiment (
+    country_code    CHAR(2)          NOT NULL,
+    published_date  DATE             NOT NULL,
+    tone_sum        DOUBLE PRECISION NOT NULL,
+    tone_sq_sum     DOUBLE PRECISION NOT NULL DEFAULT 0,  -- for rolling variances
+    tone_count      BIGINT           NOT NULL,
+    article_count   BIGINT           NOT NULL,
+    PRIMARY KEY (published_date, country_code)
+);
+
+-- Added with the rolling statistics; filled by the refresh below
+ALTER TABLE country_daily_sentiment ADD COLUMN IF NOT EXISTS tone_sq_sum DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+ALTER TABLE country_daily_sentiment ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON country_daily_sentiment;
+CREATE POLICY "Public read access"
+    ON country_daily_sentiment FOR SELECT
+    USING (true);
+
+-- Serialize rollup refreshes per (scope, day) until the end of the calling
+-- transaction. Concurrent loads that touch the same day (backfill units
+-- meeting at a boundary day, the watermark lookback) take turns instead of
+-- colliding on the primary key. Days are locked in order, so overlapping
+-- refreshes cannot deadlock.
+CREATE OR REPLACE FUNCTION lock_rollup_days(scope TEXT, days DATE[])
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    day DATE;
+BEGIN
+    FOR day IN SELECT DISTINCT d FROM unnest(days) AS d ORDER BY d LOOP
+        PERFORM pg_advisory_xact_lock(hashtext(scope), hashtext(day::text));
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_country_rollup(days DATE[])
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    SELECT lock_rollup_days('country_daily_sentiment', days);
+
+    DELETE FROM country_daily_sentiment
+    WHERE published_date = ANY(days);
+
+    INSERT INTO country_daily_sentiment
+        (country_code, published_date, tone_sum, tone_sq_sum, tone_count, article_count)
+    SELECT
+        mentioned_country_code,
+        published_date,
+        COALESCE(SUM(avg_tone), 0),
+        COALESCE(SUM(avg_tone * avg_tone), 0),
+        COUNT(avg_tone),
+        COUNT(*)
+    FROM articles
+    WHERE published_date = ANY(days)
+      AND mentioned_country_code IS NOT NULL
+    GROUP BY mentioned_country_code, published_date;
+$$;
+
+-- One-time fill for articles loaded before the rollup existed
+SELECT refresh_country_rollup(ARRAY(SELECT DISTINCT published_date FROM articles));
+
+-- 4a. Daily sub-national rollups for zoomed-in maps, keyed like the country
+--     rollup and refreshed with it: per (ADM1 region, day) and per
+--     (lat/lon grid cell, day) at each size in grid_cell_sizes(). Both use
+--     the most specific location of each article.
+CREATE TABLE IF NOT EXISTS adm1_daily_sentiment (
+    adm1_code       TEXT             NOT NULL,
+    published_date  DATE             NOT NULL,
+    country_code    CHAR(2),
+    tone_sum        DOUBLE PRECISION NOT NULL,
+    tone_count      BIGINT           NOT NULL,
+    article_count   BIGINT           NOT NULL,
+    PRIMARY KEY (published_date, adm1_code)
+);
+
+CREATE TABLE IF NOT EXISTS grid_daily_sentiment (
+    cell_deg        NUMERIC(5, 2)    NOT NULL,  -- cell size in degrees
+    lat_bin         INTEGER          NOT NULL,  -- floor(latitude / cell_deg)
+    lon_bin         INTEGER          NOT NULL,  -- floor(longitude / cell_deg)
+    published_date  DATE             NOT NULL,
+    tone_sum        DOUBLE PRECISION NOT NULL,
+    tone_count      BIGINT           NOT NULL,
+    article_count   BIGINT           NOT NULL,
+    PRIMARY KEY (published_date, cell_deg, lat_bin, lon_bin)
+);
+
+ALTER TABLE adm1_daily_sentiment ENABLE ROW LEVEL SECURITY;
+ALTER TABLE grid_daily_sentiment ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON adm1_daily_sentiment;
+CREATE POLICY "Public read access"
+    ON adm1_daily_sentiment FOR SELECT
     USING (true);
 
--- 4. RPC function: aggregate sentiment by country
+DROP POLICY IF EXISTS "Public read access" ON grid_daily_sentiment;
+CREATE POLICY "Public read access"
+    ON grid_daily_sentiment FOR SELECT
+    USING (true);
+
+-- Grid resolutions kept in grid_daily_sentiment, coarsest first
+CREATE OR REPLACE FUNCTION grid_cell_sizes()
+RETURNS NUMERIC[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT ARRAY[5, 1, 0.25]::NUMERIC[];
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_geo_rollups(days DATE[])
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    SELECT lock_rollup_days('geo_rollups', days);
+
+    DELETE FROM adm1_daily_sentiment
+    WHERE published_date = ANY(days);
+
+    INSERT INTO adm1_daily_sentiment
+        (adm1_code, published_date, country_code, tone_sum, tone_count, article_count)
+    SELECT
+        specific_adm1_code,
+        published_date,
+        MIN(specific_country_code),
+        COALESCE(SUM(avg_tone), 0),
+        COUNT(avg_tone),
+        COUNT(*)
+    FROM articles
+    WHERE published_date = ANY(days)
+      AND specific_adm1_code IS NOT NULL
+    GROUP BY specific_adm1_code, published_date;
+
+    DELETE FROM grid_daily_sentiment
+    WHERE published_date = ANY(days);
+
+    INSERT INTO grid_daily_sentiment
+        (cell_deg, lat_bin, lon_bin, published_date, tone_sum, tone_count, article_count)
+    SELECT
+        c.cell_deg,
+        floor(a.specific_latitude / c.cell_deg)::INTEGER,
+        floor(a.specific_longitude / c.cell_deg)::INTEGER,
+        a.published_date,
+        COALESCE(SUM(a.avg_tone), 0),
+        COUNT(a.avg_tone),
+        COUNT(*)
+    FROM articles a
+    CROSS JOIN unnest(grid_cell_sizes()) AS c(cell_deg)
+    WHERE a.published_date = ANY(days)
+      AND a.specific_latitude BETWEEN -90 AND 90
+      AND a.specific_longitude BETWEEN -180 AND 180
+    GROUP BY 1, 2, 3, 4;
+$$;
+
+SELECT refresh_geo_rollups(ARRAY(SELECT DISTINCT published_date FROM articles));
+
+-- 4b. Rolling per-country tone statistics over the windows in
+--     rolling_windows(), kept as running sums (tone, tone², counts) per
+--     (country, day, window). refresh_country_rolling() moves each window
+--     forward a day at a time from the previous day's sums: add the new
+--     day's rollup and subtract the day that left the window. The longest
+--     window ending just before each shorter window starts is that window's
+--     baseline. A shorter window whose mean tone is z_threshold standard
+--     errors or more away from its baseline is recorded in
+--     sentiment_shift_alerts.
+CREATE TABLE IF NOT EXISTS country_rolling_sentiment (
+    country_code    CHAR(2)          NOT NULL,
+    as_of           DATE             NOT NULL,  -- last day of the window
+    window_days     INTEGER          NOT NULL,
+    tone_sum        DOUBLE PRECISION NOT NULL,
+    tone_sq_sum     DOUBLE PRECISION NOT NULL,
+    tone_count      BIGINT           NOT NULL,
+    article_count   BIGINT           NOT NULL,
+    PRIMARY KEY (as_of, window_days, country_code)
+);
+
+CREATE TABLE IF NOT EXISTS sentiment_shift_alerts (
+    country_code     CHAR(2)          NOT NULL,
+    as_of            DATE             NOT NULL,
+    window_days      INTEGER          NOT NULL,  -- the shorter window
+    mean_tone        DOUBLE PRECISION NOT NULL,
+    baseline_mean    DOUBLE PRECISION NOT NULL,
+    baseline_stddev  DOUBLE PRECISION NOT NULL,
+    z_score          DOUBLE PRECISION NOT NULL,
+    tone_count       BIGINT           NOT NULL,
+    baseline_count   BIGINT           NOT NULL,
+    PRIMARY KEY (as_of, window_days, country_code)
+);
+
+ALTER TABLE country_rolling_sentiment ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sentiment_shift_alerts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON country_rolling_sentiment;
+CREATE POLICY "Public read access"
+    ON country_rolling_sentiment FOR SELECT
+    USING (true);
+
+DROP POLICY IF EXISTS "Public read access" ON sentiment_shift_alerts;
+CREATE POLICY "Public read access"
+    ON sentiment_shift_alerts FOR SELECT
+    USING (true);
+
+-- Rolling window lengths in days; the longest is the alert baseline
+CREATE OR REPLACE FUNCTION rolling_windows()
+RETURNS INTEGER[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT ARRAY[7, 30, 90];
+$$;
+
+-- Bring the rolling sums and alerts up to date after days were refreshed in
+-- country_daily_sentiment: every window ending between the earliest of days
+-- and the latest rollup day moves forward. Returns the number of alerts.
+CREATE OR REPLACE FUNCTION refresh_country_rolling(
+    days          DATE[],
+    z_threshold   DOUBLE PRECISION DEFAULT 3,
+    min_articles  INTEGER          DEFAULT 20
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    first_day   DATE;
+    last_day    DATE;
+    oldest      DATE;
+    baseline    INTEGER := (SELECT max(w) FROM unnest(rolling_windows()) AS w);
+    day         DATE;
+    w           INTEGER;
+    incremental BOOLEAN;
+BEGIN
+    -- One refresh at a time: each builds on the previous day's windows.
+    -- The range is read once the lock is held, so it includes the rollup
+    -- days of any refresh that ran first.
+    PERFORM pg_advisory_xact_lock(hashtext('refresh_country_rolling'));
+
+    first_day := (SELECT min(d) FROM unnest(days) AS d);
+    last_day  := GREATEST(
+        (SELECT max(d) FROM unnest(days) AS d),
+        (SELECT max(published_date) FROM country_daily_sentiment)
+    );
+    oldest    := (SELECT min(published_date) FROM country_daily_sentiment);
+    IF first_day IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    FOR day IN SELECT generate_series(first_day, last_day, INTERVAL '1 day')::date LOOP
+        FOREACH w IN ARRAY rolling_windows() LOOP
+            -- Yesterday's sums, plus today, minus the day leaving the
+            -- window. With no previous day to build on (or when its window
+            -- reached past the oldest rollup day), sum the window's days.
+            incremental := day - w >= oldest AND EXISTS (
+                SELECT 1 FROM country_rolling_sentiment r WHERE r.as_of = day - 1 AND r.window_days = w
+            );
+
+            WITH fresh AS (
+                SELECT x.country_code, SUM(x.tone_sum) AS tone_sum, SUM(x.tone_sq_sum) AS tone_sq_sum,
+                       SUM(x.tone_count) AS tone_count, SUM(x.article_count) AS article_count
+                FROM (
+                    SELECT r.country_code, r.tone_sum, r.tone_sq_sum, r.tone_count, r.article_count
+                    FROM country_rolling_sentiment r
+                    WHERE incremental AND r.as_of = day - 1 AND r.window_days = w
+                    UNION ALL
+                    SELECT c.country_code, c.tone_sum, c.tone_sq_sum, c.tone_count, c.article_count
+                    FROM country_daily_sentiment c
+                    WHERE c.published_date > CASE WHEN incremental THEN day - 1 ELSE day - w END
+                      AND c.published_date <= day
+                    UNION ALL
+                    SELECT c.country_code, -c.tone_sum, -c.tone_sq_sum, -c.tone_count, -c.article_count
+                    FROM country_daily_sentiment c
+                    WHERE incremental AND c.published_date = day - w
+                ) x
+                GROUP BY x.country_code
+                HAVING SUM(x.article_count) > 0
+            ), upserted AS (
+                INSERT INTO country_rolling_sentiment
+                    (country_code, as_of, window_days, tone_sum, tone_sq_sum, tone_count, article_count)
+                SELECT f.country_code, day, w, f.tone_sum, f.tone_sq_sum, f.tone_count, f.article_count
+                FROM fresh f
+                ON CONFLICT (as_of, window_days, country_code) DO UPDATE
+                    SET tone_sum      = excluded.tone_sum,
+                        tone_sq_sum   = excluded.tone_sq_sum,
+                        tone_count    = excluded.tone_count,
+                        article_count = excluded.article_count
+                RETURNING 1
+            )
+            -- Countries whose window has emptied
+            DELETE FROM country_rolling_sentiment r
+            WHERE r.as_of = day AND r.window_days = w
+              AND r.country_code NOT IN (SELECT f.country_code FROM fresh f);
+        END LOOP;
+    END LOOP;
+
+    WITH fresh AS (
+        SELECT *
+        FROM (
+            SELECT
+                s.country_code,
+                s.as_of,
+                s.window_days,
+                s.tone_sum / s.tone_count AS mean_tone,
+                b.mean AS baseline_mean,
+                b.stddev AS baseline_stddev,
+                (s.tone_sum / s.tone_count - b.mean) / (b.stddev / sqrt(s.tone_count)) AS z_score,
+                s.tone_count,
+                b.tone_count AS baseline_count
+            FROM country_rolling_sentiment s
+            JOIN LATERAL (
+                SELECT
+                    r.tone_count,
+                    r.tone_sum / r.tone_count AS mean,
+                    sqrt(GREATEST(r.tone_sq_sum / r.tone_count - (r.tone_sum / r.tone_count) ^ 2, 0)) AS stddev
+                FROM country_rolling_sentiment r
+                WHERE r.as_of = s.as_of - s.window_days
+                  AND r.window_days = baseline
+                  AND r.country_code = s.country_code
+                  AND r.tone_count >= min_articles
+            ) b ON b.stddev > 0
+            WHERE s.as_of BETWEEN first_day AND last_day
+              AND s.window_days < baseline
+              AND s.tone_count >= min_articles
+        ) shifts
+        WHERE abs(shifts.z_score) >= z_threshold
+    ), upserted AS (
+        INSERT INTO sentiment_shift_alerts
+            (country_code, as_of, window_days, mean_tone, baseline_mean, baseline_stddev, z_score, tone_count, baseline_count)
+        SELECT * FROM fresh
+        ON CONFLICT (as_of, window_days, country_code) DO UPDATE
+            SET mean_tone       = excluded.mean_tone,
+                baseline_mean   = excluded.baseline_mean,
+                baseline_stddev = excluded.baseline_stddev,
+                z_score         = excluded.z_score,
+                tone_count      = excluded.tone_count,
+                baseline_count  = excluded.baseline_count
+        RETURNING 1
+    )
+    -- Alerts that no longer hold
+    DELETE FROM sentiment_shift_alerts a
+    WHERE a.as_of BETWEEN first_day AND last_day
+      AND NOT EXISTS (
+          SELECT 1 FROM fresh f
+          WHERE f.as_of = a.as_of AND f.window_days = a.window_days AND f.country_code = a.country_code
+      );
+
+    RETURN (SELECT count(*) FROM sentiment_shift_alerts a WHERE a.as_of BETWEEN first_day AND last_day);
+END;
+$$;
+
+SELECT refresh_country_rolling(ARRAY(SELECT min(published_date) FROM country_daily_sentiment));
+
+-- 5. RPC function: aggregate sentiment by country (weighted from the rollup)
 CREATE OR REPLACE FUNCTION get_sentiment_by_country(
     start_date DATE,
     end_date   DATE
@@ -79,11 +508,475 @@ LANGUAGE sql
 STABLE
 AS $$
     SELECT
-        mentioned_country_code AS country_code,
-        AVG(articles.avg_tone) AS avg_tone,
-        COUNT(*)               AS article_count
-    FROM articles
-    WHERE published_date BETWEEN start_date AND end_date
-      AND mentioned_country_code IS NOT NULL
-    GROUP BY mentioned_country_code;
+        r.country_code,
+        SUM(r.tone_sum) / NULLIF(SUM(r.tone_count), 0) AS avg_tone,
+        SUM(r.article_count)::BIGINT                  AS article_count
+    FROM country_daily_sentiment r
+    WHERE r.published_date BETWEEN start_date AND end_date
+    GROUP BY r.country_code;
 $$;
+
+-- 5a. RPC function: get_sentiment_by_country restricted to articles tagged
+--     with one GKG theme. There is no per-theme rollup, so this reads
+--     articles; the GIN index on theme_ids finds the tagged rows.
+CREATE OR REPLACE FUNCTION get_sentiment_by_country_and_theme(
+    start_date DATE,
+    end_date   DATE,
+    theme      TEXT
+)
+RETURNS TABLE (
+    country_code  CHAR(2),
+    avg_tone      DOUBLE PRECISION,
+    article_count BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        a.mentioned_country_code,
+        AVG(a.avg_tone) AS avg_tone,
+        COUNT(*)        AS article_count
+    FROM articles a
+    WHERE a.theme_ids @> ARRAY[(SELECT t.id FROM themes t WHERE t.name = theme)]
+      AND a.published_date BETWEEN start_date AND end_date
+      AND a.mentioned_country_code IS NOT NULL
+    GROUP BY a.mentioned_country_code;
+$$;
+
+-- 5b. RPC function: per-day country aggregates from the rollup, returned as
+--     one compact columnar JSON object (avoids the API row limit). The
+--     dashboard caches these by day and combines ranges client-side.
+CREATE OR REPLACE FUNCTION get_daily_sentiment_by_country(
+    start_date DATE,
+    end_date   DATE
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'published_date', COALESCE(array_agg(published_date ORDER BY published_date, country_code), '{}'),
+        'country_code',   COALESCE(array_agg(country_code   ORDER BY published_date, country_code), '{}'),
+        'tone_sum',       COALESCE(array_agg(tone_sum       ORDER BY published_date, country_code), '{}'),
+        'tone_count',     COALESCE(array_agg(tone_count     ORDER BY published_date, country_code), '{}'),
+        'article_count',  COALESCE(array_agg(article_count  ORDER BY published_date, country_code), '{}')
+    )
+    FROM country_daily_sentiment
+    WHERE published_date BETWEEN start_date AND end_date;
+$$;
+
+-- 5c. RPC function: the whole country × period (day or week) matrix for the
+--     animated heatmap in one index-encoded JSON payload. Periods and
+--     countries are listed once; each cell refers to them by position.
+CREATE OR REPLACE FUNCTION get_sentiment_matrix(
+    start_date DATE,
+    end_date   DATE,
+    bucket     TEXT DEFAULT 'day'
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    WITH cells AS (
+        SELECT
+            date_trunc(bucket, published_date::timestamp)::date AS period,
+            country_code,
+            SUM(tone_sum)      AS tone_sum,
+            SUM(tone_count)    AS tone_count,
+            SUM(article_count) AS article_count
+        FROM country_daily_sentiment
+        WHERE published_date BETWEEN start_date AND end_date
+        GROUP BY 1, 2
+    ),
+    ranked AS (
+        SELECT
+            cells.*,
+            dense_rank() OVER (ORDER BY period) - 1       AS period_index,
+            dense_rank() OVER (ORDER BY country_code) - 1 AS country_index
+        FROM cells
+    )
+    SELECT json_build_object(
+        'periods',       (SELECT COALESCE(array_agg(DISTINCT period ORDER BY period), '{}') FROM cells),
+        'countries',     (SELECT COALESCE(array_agg(DISTINCT country_code ORDER BY country_code), '{}') FROM cells),
+        'period_index',  COALESCE(array_agg(period_index  ORDER BY period_index, country_index), '{}'),
+        'country_index', COALESCE(array_agg(country_index ORDER BY period_index, country_index), '{}'),
+        'tone_sum',      COALESCE(array_agg(tone_sum      ORDER BY period_index, country_index), '{}'),
+        'tone_count',    COALESCE(array_agg(tone_count    ORDER BY period_index, country_index), '{}'),
+        'article_count', COALESCE(array_agg(article_count ORDER BY period_index, country_index), '{}')
+    )
+    FROM ranked;
+$$;
+
+-- 5d. RPC function: one page of a country's articles for the drill-down.
+--     Keyset pagination: pass the sort key and id of the last row shown
+--     (after_date/after_tone + after_id) to get the next page. 'recent'
+--     walks idx_articles_mentioned_country_date backwards; the tone sorts
+--     use idx_articles_mentioned_country_tone.
+CREATE OR REPLACE FUNCTION get_country_articles(
+    country     CHAR(2),
+    start_date  DATE,
+    end_date    DATE,
+    sort        TEXT             DEFAULT 'recent',
+    source      TEXT             DEFAULT NULL,
+    after_date  DATE             DEFAULT NULL,
+    after_tone  DOUBLE PRECISION DEFAULT NULL,
+    after_id    BIGINT           DEFAULT NULL,
+    page_size   INT              DEFAULT 50
+)
+RETURNS TABLE (
+    id             BIGINT,
+    url            TEXT,
+    title          TEXT,
+    source_name    TEXT,
+    avg_tone       DOUBLE PRECISION,
+    published_date DATE
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    page_size := LEAST(page_size, 200);
+
+    IF sort = 'recent' THEN
+        RETURN QUERY
+        SELECT a.id, a.url, a.title, a.source_name, a.avg_tone, a.published_date
+        FROM articles a
+        WHERE a.mentioned_country_code = country
+          AND a.published_date BETWEEN start_date AND end_date
+          AND (source IS NULL OR a.source_name = source)
+          AND (after_id IS NULL OR (a.published_date, a.id) < (after_date, after_id))
+        ORDER BY a.published_date DESC, a.id DESC
+        LIMIT page_size;
+    ELSIF sort = 'negative' THEN
+        RETURN QUERY
+        SELECT a.id, a.url, a.title, a.source_name, a.avg_tone, a.published_date
+        FROM articles a
+        WHERE a.mentioned_country_code = country
+          AND a.avg_tone IS NOT NULL
+          AND a.published_date BETWEEN start_date AND end_date
+          AND (source IS NULL OR a.source_name = source)
+          AND (after_id IS NULL OR (a.avg_tone, a.id) > (after_tone, after_id))
+        ORDER BY a.avg_tone, a.id
+        LIMIT page_size;
+    ELSIF sort = 'positive' THEN
+        RETURN QUERY
+        SELECT a.id, a.url, a.title, a.source_name, a.avg_tone, a.published_date
+        FROM articles a
+        WHERE a.mentioned_country_code = country
+          AND a.avg_tone IS NOT NULL
+          AND a.published_date BETWEEN start_date AND end_date
+          AND (source IS NULL OR a.source_name = source)
+          AND (after_id IS NULL OR (a.avg_tone, a.id) < (after_tone, after_id))
+        ORDER BY a.avg_tone DESC, a.id DESC
+        LIMIT page_size;
+    ELSE
+        RAISE EXCEPTION 'unknown sort: %', sort;
+    END IF;
+END;
+$$;
+
+-- 5e. RPC function: ADM1 region aggregates for the range, optionally within
+--     one country, as columnar JSON.
+CREATE OR REPLACE FUNCTION get_sentiment_by_adm1(
+    start_date DATE,
+    end_date   DATE,
+    country    CHAR(2) DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    WITH regions AS (
+        SELECT
+            adm1_code,
+            MIN(country_code)                            AS country_code,
+            SUM(tone_sum) / NULLIF(SUM(tone_count), 0)   AS avg_tone,
+            SUM(article_count)                           AS article_count
+        FROM adm1_daily_sentiment
+        WHERE published_date BETWEEN start_date AND end_date
+          AND (country IS NULL OR country_code = country)
+        GROUP BY adm1_code
+    )
+    SELECT json_build_object(
+        'adm1_code',     COALESCE(array_agg(adm1_code     ORDER BY adm1_code), '{}'),
+        'country_code',  COALESCE(array_agg(country_code  ORDER BY adm1_code), '{}'),
+        'avg_tone',      COALESCE(array_agg(avg_tone      ORDER BY adm1_code), '{}'),
+        'article_count', COALESCE(array_agg(article_count ORDER BY adm1_code), '{}')
+    )
+    FROM regions;
+$$;
+
+-- 5f. RPC function: grid cell aggregates for the range at one of the
+--     precomputed cell sizes, optionally only inside a lat/lon box (the
+--     visible map), as columnar JSON of cell centres.
+CREATE OR REPLACE FUNCTION get_sentiment_grid(
+    start_date DATE,
+    end_date   DATE,
+    cell_deg   NUMERIC,
+    min_lat    DOUBLE PRECISION DEFAULT -90,
+    max_lat    DOUBLE PRECISION DEFAULT 90,
+    min_lon    DOUBLE PRECISION DEFAULT -180,
+    max_lon    DOUBLE PRECISION DEFAULT 180
+)
+RETURNS JSON
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+    result JSON;
+BEGIN
+    IF NOT cell_deg = ANY(grid_cell_sizes()) THEN
+        RAISE EXCEPTION 'cell_deg must be one of %', grid_cell_sizes();
+    END IF;
+
+    WITH cells AS (
+        SELECT
+            g.lat_bin,
+            g.lon_bin,
+            SUM(g.tone_sum) / NULLIF(SUM(g.tone_count), 0) AS avg_tone,
+            SUM(g.article_count)                           AS article_count
+        FROM grid_daily_sentiment g
+        WHERE g.published_date BETWEEN start_date AND end_date
+          AND g.cell_deg = get_sentiment_grid.cell_deg
+          AND g.lat_bin BETWEEN floor(min_lat / get_sentiment_grid.cell_deg) AND floor(max_lat / get_sentiment_grid.cell_deg)
+          AND g.lon_bin BETWEEN floor(min_lon / get_sentiment_grid.cell_deg) AND floor(max_lon / get_sentiment_grid.cell_deg)
+        GROUP BY g.lat_bin, g.lon_bin
+    )
+    SELECT json_build_object(
+        'cell_deg',      get_sentiment_grid.cell_deg,
+        'latitude',      COALESCE(array_agg((lat_bin + 0.5) * get_sentiment_grid.cell_deg ORDER BY lat_bin, lon_bin), '{}'),
+        'longitude',     COALESCE(array_agg((lon_bin + 0.5) * get_sentiment_grid.cell_deg ORDER BY lat_bin, lon_bin), '{}'),
+        'avg_tone',      COALESCE(array_agg(avg_tone      ORDER BY lat_bin, lon_bin), '{}'),
+        'article_count', COALESCE(array_agg(article_count ORDER BY lat_bin, lon_bin), '{}')
+    )
+    INTO result
+    FROM cells;
+    RETURN result;
+END;
+$$;
+
+-- 5g. RPC function: shift alerts for the range, strongest first, as
+--     columnar JSON; one indexed range read of sentiment_shift_alerts.
+CREATE OR REPLACE FUNCTION get_shift_alerts(
+    start_date DATE,
+    end_date   DATE
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'country_code',    COALESCE(array_agg(country_code    ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'as_of',           COALESCE(array_agg(as_of           ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'window_days',     COALESCE(array_agg(window_days     ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'mean_tone',       COALESCE(array_agg(mean_tone       ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'baseline_mean',   COALESCE(array_agg(baseline_mean   ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'baseline_stddev', COALESCE(array_agg(baseline_stddev ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'z_score',         COALESCE(array_agg(z_score         ORDER BY abs(z_score) DESC, as_of DESC), '{}'),
+        'tone_count',      COALESCE(array_agg(tone_count      ORDER BY abs(z_score) DESC, as_of DESC), '{}')
+    )
+    FROM sentiment_shift_alerts
+    WHERE as_of BETWEEN start_date AND end_date;
+$$;
+
+-- 6. Pipeline state (extract watermark and other small key/value state)
+CREATE TABLE IF NOT EXISTS pipeline_state (
+    key         TEXT        PRIMARY KEY,
+    value       TEXT        NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+ALTER TABLE pipeline_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Public read access" ON pipeline_state;
+CREATE POLICY "Public read access"
+    ON pipeline_state FOR SELECT
+    USING (true);
+
+-- Writes are for the pipeline only: the watermark decides what the next
+-- run extracts, and the data version keys the dashboard's caches
+DROP POLICY IF EXISTS "Service role insert" ON pipeline_state;
+CREATE POLICY "Service role insert"
+    ON pipeline_state FOR INSERT
+    TO service_role
+    WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role update" ON pipeline_state;
+CREATE POLICY "Service role update"
+    ON pipeline_state FOR UPDATE
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- Increment the data version the dashboard keys its caches by (see
+-- pipeline/data_version.py) in a single statement; returns the new value.
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    INSERT INTO pipeline_state (key, value, updated_at)
+    VALUES ('data_version', '1', now())
+    ON CONFLICT (key) DO UPDATE
+        SET value = (pipeline_state.value::bigint + 1)::text,
+            updated_at = now()
+    RETURNING value::bigint;
+$$;
+
+-- 7. Retention. cleanup() first drops (or detaches) whole monthly
+--    partitions older than the cutoff when articles is partitioned (see
+--    setup_partitioned_articles.sql), then deletes what is left below the
+--    cutoff in bounded chunks. Counts are taken here, so deleted rows are
+--    never sent back to the client. On an unpartitioned articles table the
+--    partition functions are no-ops.
+
+-- Create the monthly partitions covering first_day..last_day that are
+-- missing; loaders call this before writing. Returns the number created.
+CREATE OR REPLACE FUNCTION ensure_article_partitions(first_day DATE, last_day DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    month DATE := date_trunc('month', first_day)::date;
+    part TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'articles'::regclass) THEN
+        RETURN 0;
+    END IF;
+    -- Concurrent loads may ask for the same month
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_article_partitions'));
+    WHILE month <= last_day LOOP
+        part := 'articles_' || to_char(month, 'YYYY_MM');
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF articles FOR VALUES FROM (%L) TO (%L)',
+                part, month, (month + INTERVAL '1 month')::date
+            );
+            -- Partitions are reachable directly through the API; RLS without
+            -- policies keeps them closed to anon (reads go through articles)
+            EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', part);
+            created := created + 1;
+        END IF;
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- Detach every partition whose months all fall before cutoff, then drop it
+-- (or keep it renamed to <name>_detached for archiving). Returns the number
+-- of article rows removed from articles.
+CREATE OR REPLACE FUNCTION drop_article_partitions(cutoff DATE, detach_only BOOLEAN DEFAULT false)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    part RECORD;
+    part_rows BIGINT;
+    removed BIGINT := 0;
+BEGIN
+    FOR part IN
+        SELECT c.oid::regclass AS rel, c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'articles'::regclass
+          AND substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([0-9-]+)''\)')::date <= cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('SELECT count(*) FROM %s', part.rel) INTO part_rows;
+        EXECUTE format('ALTER TABLE articles DETACH PARTITION %s', part.rel);
+        IF detach_only THEN
+            EXECUTE format('ALTER TABLE %s RENAME TO %I', part.rel, part.name || '_detached');
+        ELSE
+            EXECUTE format('DROP TABLE %s', part.rel);
+        END IF;
+        removed := removed + part_rows;
+    END LOOP;
+    RETURN removed;
+END;
+$$;
+
+-- Delete at most batch_size articles published before cutoff; call until it
+-- returns less than batch_size. Returns the number deleted.
+CREATE OR REPLACE FUNCTION delete_articles_before(cutoff DATE, batch_size INTEGER DEFAULT 10000)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    WITH doomed AS (
+        SELECT id, published_date
+        FROM articles
+        WHERE published_date < cutoff
+        LIMIT batch_size
+    ), deleted AS (
+        DELETE FROM articles a
+        USING doomed d
+        WHERE a.id = d.id AND a.published_date = d.published_date
+        RETURNING 1
+    )
+    SELECT count(*) FROM deleted;
+$$;
+
+-- Keep the rollups in step with the articles they summarize
+CREATE OR REPLACE FUNCTION delete_rollups_before(cutoff DATE)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    WITH countries AS (
+        DELETE FROM country_daily_sentiment
+        WHERE published_date < cutoff
+        RETURNING 1
+    ), regions AS (
+        DELETE FROM adm1_daily_sentiment
+        WHERE published_date < cutoff
+        RETURNING 1
+    ), cells AS (
+        DELETE FROM grid_daily_sentiment
+        WHERE published_date < cutoff
+        RETURNING 1
+    ), windows AS (
+        DELETE FROM country_rolling_sentiment
+        WHERE as_of < cutoff
+        RETURNING 1
+    ), alerts AS (
+        DELETE FROM sentiment_shift_alerts
+        WHERE as_of < cutoff
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM countries) + (SELECT count(*) FROM regions) + (SELECT count(*) FROM cells)
+         + (SELECT count(*) FROM windows) + (SELECT count(*) FROM alerts);
+$$;
+
+-- 8. Write-side functions are for the pipeline (service_role) only.
+--    PostgREST exposes every function in public as an RPC, and EXECUTE
+--    is granted to PUBLIC (and, on Supabase, to anon and authenticated)
+--    by default, so the public anon key could otherwise call them. The
+--    partition functions are SECURITY DEFINER and could drop all articles.
+REVOKE EXECUTE ON FUNCTION
+    intern_themes(TEXT[]),
+    lock_rollup_days(TEXT, DATE[]),
+    refresh_country_rollup(DATE[]),
+    refresh_geo_rollups(DATE[]),
+    refresh_country_rolling(DATE[], DOUBLE PRECISION, INTEGER),
+    bump_data_version(),
+    ensure_article_partitions(DATE, DATE),
+    drop_article_partitions(DATE, BOOLEAN),
+    delete_articles_before(DATE, INTEGER),
+    delete_rollups_before(DATE)
+FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION
+    intern_themes(TEXT[]),
+    lock_rollup_days(TEXT, DATE[]),
+    refresh_country_rollup(DATE[]),
+    refresh_geo_rollups(DATE[]),
+    refresh_country_rolling(DATE[], DOUBLE PRECISION, INTEGER),
+    bump_data_version(),
+    ensure_article_partitions(DATE, DATE),
+    drop_article_partitions(DATE, BOOLEAN),
+    delete_articles_before(DATE, INTEGER),
+    delete_rollups_before(DATE)
+TO service_role;
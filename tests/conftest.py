@@ -0,0 +1,51 @@
+"""Shared fixtures.
+
+Database tests need TEST_DATABASE_URL pointing at a throwaway Postgres;
+its public schema is recreated from setup_supabase.sql for every test
+(plus setup_partitioned_articles.sql for ``partitioned_db``).
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = Path(__file__).resolve().parent.parent / "setup_supabase.sql"
+PARTITIONED_SCHEMA = SCHEMA.with_name("setup_partitioned_articles.sql")
+
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+# Supabase's API roles; service_role bypasses row level security
+API_ROLES = {"anon": "NOLOGIN", "authenticated": "NOLOGIN", "service_role": "NOLOGIN BYPASSRLS"}
+
+
+def _grant_api_roles(conn) -> None:
+    """Create the API roles if needed and grant them what Supabase grants by default."""
+    for role, options in API_ROLES.items():
+        conn.execute(
+            f"DO $$ BEGIN CREATE ROLE {role} {options}; EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+        )
+    roles = ", ".join(API_ROLES)
+    conn.execute(f"GRANT USAGE ON SCHEMA public TO {roles}")
+    conn.execute(f"GRANT ALL ON ALL TABLES IN SCHEMA public TO {roles}")
+    conn.execute(f"GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO {roles}")
+
+
+@pytest.fixture
+def db():
+    import psycopg
+
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+        _grant_api_roles(conn)
+        conn.execute(SCHEMA.read_text())
+        _grant_api_roles(conn)
+        yield conn
+
+
+@pytest.fixture
+def partitioned_db(db):
+    db.execute(PARTITIONED_SCHEMA.read_text())
+    _grant_api_roles(db)
+    yield db
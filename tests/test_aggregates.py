@@ -0,0 +1,64 @@
+"""Tests for app.aggregates module."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.aggregates import DailyAggregates
+
+ROWS = pd.DataFrame({
+    "published_date": ["2025-06-01", "2025-06-01", "2025-06-02", "2025-06-03"],
+    "country_code": ["US", "JA", "US", "GM"],
+    "tone_sum": [4.0, -2.0, -1.0, 4.0],
+    "tone_count": [2, 1, 1, 1],
+    "article_count": [2, 1, 1, 1],
+})
+
+
+def test_missing_days_shrink_after_add():
+    cache = DailyAggregates()
+    assert len(cache.missing(date(2025, 6, 1), date(2025, 6, 5))) == 5
+    cache.add(date(2025, 6, 1), date(2025, 6, 3), ROWS)
+    assert cache.missing(date(2025, 6, 1), date(2025, 6, 5)) == [date(2025, 6, 4), date(2025, 6, 5)]
+
+
+def test_combine_weighted_average():
+    cache = DailyAggregates()
+    cache.add(date(2025, 6, 1), date(2025, 6, 3), ROWS)
+    result = cache.combine(date(2025, 6, 1), date(2025, 6, 2)).set_index("country_code")
+    assert result.loc["US", "avg_tone"] == pytest.approx(1.0)
+    assert result.loc["US", "article_count"] == 3
+    assert "GM" not in result.index
+
+
+def test_add_grows_countries_and_empty_days():
+    cache = DailyAggregates()
+    cache.add(date(2025, 6, 1), date(2025, 6, 2), ROWS.iloc[:3])
+    cache.add(date(2025, 6, 3), date(2025, 6, 4), ROWS.iloc[3:])
+    cache.add(date(2025, 6, 5), date(2025, 6, 5), ROWS.iloc[0:0])
+    assert cache.missing(date(2025, 6, 1), date(2025, 6, 5)) == []
+    result = cache.combine(date(2025, 6, 1), date(2025, 6, 5))
+    assert set(result["country_code"]) == {"US", "JA", "GM"}
+    assert cache.combine(date(2025, 6, 5), date(2025, 6, 5)).empty
+
+
+def test_fill_fetches_only_the_gaps():
+    cache = DailyAggregates()
+    cache.add(date(2025, 3, 1), date(2025, 3, 31), ROWS.iloc[0:0])
+    cache.add(date(2025, 6, 1), date(2025, 6, 3), ROWS)
+    calls = []
+
+    def fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        return ROWS.iloc[0:0]
+
+    assert cache.fill(date(2025, 1, 1), date(2025, 6, 30), fetch) == 3
+    assert calls == [
+        (date(2025, 1, 1), date(2025, 2, 28)),
+        (date(2025, 4, 1), date(2025, 5, 31)),
+        (date(2025, 6, 4), date(2025, 6, 30)),
+    ]
+    # Cached days keep their rows
+    assert cache.combine(date(2025, 1, 1), date(2025, 6, 30))["article_count"].sum() == 5
+    assert cache.fill(date(2025, 1, 1), date(2025, 6, 30), fetch) == 0
@@ -0,0 +1,61 @@
+"""Tests for pipeline.backfill module."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import pipeline.cleanup
+from pipeline.backfill import backfill, finish_backfill, plan_units
+
+
+def test_plan_units_daily():
+    units = plan_units(date(2025, 1, 1), date(2025, 1, 3))
+    assert units == [
+        (date(2025, 1, 1), date(2025, 1, 1)),
+        (date(2025, 1, 2), date(2025, 1, 2)),
+        (date(2025, 1, 3), date(2025, 1, 3)),
+    ]
+
+
+def test_plan_units_partial_last_unit():
+    units = plan_units(date(2025, 1, 1), date(2025, 1, 5), days_per_unit=2)
+    assert units[-1] == (date(2025, 1, 5), date(2025, 1, 5))
+    assert len(units) == 3
+
+
+def test_backfill_resumes_after_failure(tmp_path):
+    state = tmp_path / "state.json"
+    calls = []
+
+    def flaky(start, end):
+        calls.append(start)
+        if start == date(2025, 1, 2):
+            raise ValueError("transient")
+        return 10
+
+    with pytest.raises(RuntimeError):
+        backfill(date(2025, 1, 1), date(2025, 1, 3), flaky, concurrency=2, state_path=state)
+    assert sorted(calls) == [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)]
+
+    calls.clear()
+    timings = backfill(date(2025, 1, 1), date(2025, 1, 3), lambda s, e: calls.append(s) or 5, state_path=state)
+    assert calls == [date(2025, 1, 2)]
+    assert list(timings) == [(date(2025, 1, 2), date(2025, 1, 2))]
+
+
+def test_finish_backfill_rolls_windows_once_for_whole_range(monkeypatch):
+    calls = []
+
+    class Client:
+        def rpc(self, name, params):
+            calls.append((name, params.get("days")))
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=1))
+
+    monkeypatch.setattr(pipeline.cleanup, "cleanup", lambda client: calls.append(("cleanup", None)))
+    finish_backfill(Client(), date(2025, 1, 1), date(2025, 3, 31))
+    assert calls == [
+        ("refresh_country_rolling", ["2025-01-01", "2025-03-31"]),
+        ("cleanup", None),
+        ("bump_data_version", None),
+    ]
@@ -0,0 +1,38 @@
+"""Tests for the synthetic GKG generator and the benchmark regression check."""
+
+import pandas as pd
+
+from benchmarks.suite import compare
+from benchmarks.synthetic import make_raw
+from pipeline.transform import transform
+
+
+def test_make_raw_is_seeded():
+    pd.testing.assert_frame_equal(make_raw(200, seed=7), make_raw(200, seed=7))
+    assert not make_raw(200, seed=7).equals(make_raw(200, seed=8))
+
+
+def test_make_raw_rows_transform():
+    raw = make_raw(500, seed=1)
+    assert list(raw.columns) == [
+        "url", "SourceCollectionIdentifier", "extras", "raw_locations",
+        "raw_tone", "raw_date", "raw_themes", "SharingImage",
+    ]
+    clean = transform(raw)
+    # Rows without locations are dropped, as are repeated (url, date) pairs
+    assert 0.8 * len(raw) < len(clean) < len(raw)
+    assert clean["specific_country_code"].notna().all()
+    assert clean["themes"].map(len).gt(0).all()
+
+
+def test_compare_flags_slowdowns_and_memory_growth():
+    baselines = {"transform": {"10000": {"rows_per_sec": 1000.0, "peak_mb": 100.0}}}
+    ok = {"transform": {"10000": {"rows_per_sec": 900.0, "peak_mb": 110.0}}}
+    slow = {"transform": {"10000": {"rows_per_sec": 700.0, "peak_mb": 100.0}}}
+    fat = {"transform": {"10000": {"rows_per_sec": 1000.0, "peak_mb": 150.0}}}
+    new_stage = {"load": {"10000": {"rows_per_sec": 1.0, "peak_mb": 1.0}}}
+
+    assert compare(ok, baselines, threshold=0.25) == []
+    assert len(compare(slow, baselines, threshold=0.25)) == 1
+    assert len(compare(fat, baselines, threshold=0.25)) == 1
+    assert compare(new_stage, baselines, threshold=0.25) == []
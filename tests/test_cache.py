@@ -0,0 +1,105 @@
+"""Tests for pipeline.cache module."""
+
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline import cache as cache_module
+from pipeline.cache import ExtractCache, split_days
+
+QUERY = "SELECT 1"
+
+
+def _fetcher(calls):
+    def fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        return pd.DataFrame({
+            "url": [f"https://example.com/{day}" for day in days],
+            "raw_date": [int(day.strftime("%Y%m%d")) * 1_000_000 + 120000 for day in days],
+        })
+    return fetch
+
+
+def test_cache_serves_settled_days(tmp_path):
+    cache = ExtractCache(tmp_path, QUERY, settle_days=2)
+    start, end = date(2025, 1, 1), date(2025, 1, 3)
+    calls = []
+
+    first = cache.extract(start, end, _fetcher(calls))
+    assert calls == [(start, end)]
+    assert len(first) == 3 and len(list(tmp_path.glob("*/*.parquet"))) == 3
+    second = cache.extract(start, end, _fetcher(calls))
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_cache_fetches_each_run_of_missing_days_once(tmp_path):
+    cache = ExtractCache(tmp_path, QUERY, settle_days=2)
+    calls = []
+    cache.extract(date(2025, 1, 3), date(2025, 1, 3), _fetcher(calls))
+
+    df = cache.extract(date(2025, 1, 1), date(2025, 1, 5), _fetcher(calls))
+    assert calls[1:] == [(date(2025, 1, 1), date(2025, 1, 2)), (date(2025, 1, 4), date(2025, 1, 5))]
+    assert df["url"].tolist() == [f"https://example.com/2025-01-0{d}" for d in range(1, 6)]
+
+
+def test_cache_refetches_settling_days(tmp_path):
+    cache = ExtractCache(tmp_path, QUERY, settle_days=2)
+    yesterday = date.today() - timedelta(days=1)
+    calls = []
+
+    cache.extract(yesterday, yesterday, _fetcher(calls))
+    cache.extract(yesterday, yesterday, _fetcher(calls))
+    assert calls == [(yesterday, yesterday)] * 2
+
+
+def test_cache_keyed_by_query(tmp_path):
+    day = date(2025, 1, 1)
+    calls = []
+    ExtractCache(tmp_path, QUERY).extract(day, day, _fetcher(calls))
+    ExtractCache(tmp_path, QUERY + " ").extract(day, day, _fetcher(calls))
+    assert len(calls) == 2
+
+
+def test_split_days_by_raw_date():
+    days = [date(2025, 1, 1), date(2025, 1, 2)]
+    df = pd.DataFrame({"url": list("abcd"), "raw_date": [20250102000000, 20250101235959, None, 20250105000000]})
+    parts = split_days(df, days)
+    # Missing dates go to the first day, dates past the range to the last
+    assert parts[days[0]]["url"].tolist() == ["b", "c"]
+    assert parts[days[1]]["url"].tolist() == ["a", "d"]
+
+
+def test_cache_evicts_to_max_bytes(tmp_path):
+    cache = ExtractCache(tmp_path, QUERY, max_bytes=0)
+    day = date(2025, 1, 1)
+    cache.extract(day, day, _fetcher([]))
+    assert list(tmp_path.glob("*/*.parquet")) == []
+
+
+def test_evict_skips_files_removed_by_another_evictor(tmp_path, monkeypatch):
+    cache = ExtractCache(tmp_path, QUERY, max_bytes=0)
+    vanished = tmp_path / "other" / "2025-01-01.parquet"
+    monkeypatch.setattr(Path, "glob", lambda self, pattern: iter([vanished]))
+    assert cache.evict() == 0
+
+
+def test_get_treats_file_evicted_after_exists_check_as_missing(tmp_path, monkeypatch):
+    cache = ExtractCache(tmp_path, QUERY)
+    day = date(2025, 1, 1)
+    cache.extract(day, day, _fetcher([]))
+    utime = cache_module.os.utime
+
+    def evicted_first(path):
+        Path(path).unlink()
+        utime(path)
+
+    monkeypatch.setattr(cache_module.os, "utime", evicted_first)
+    assert cache.get(day) is None
+
+    calls = []
+    monkeypatch.setattr(cache_module.os, "utime", utime)
+    assert len(cache.extract(day, day, _fetcher(calls))) == 1
+    assert calls == [(day, day)]
@@ -0,0 +1,151 @@
+"""Tests for pipeline.cleanup and the partition SQL in setup_partitioned_articles.sql."""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import psycopg
+import pytest
+
+from pipeline.cleanup import cleanup
+from pipeline.load_pg import load_copy
+from pipeline.seen import SeenIndex
+from tests.conftest import PARTITIONED_SCHEMA, TEST_DATABASE_URL as DSN, requires_db
+
+pytestmark = requires_db
+
+RETENTION_DAYS = 100
+CUTOFF = date.today() - timedelta(days=RETENTION_DAYS)
+
+
+class _RpcClient:
+    """Runs Supabase ``client.rpc(name, params)`` calls as SQL on a test connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(name)
+        args = ", ".join(f"{key} => %({key})s" for key in params)
+        (data,) = self.conn.execute(f"SELECT {name}({args})", params).fetchone()
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+
+def _insert(db, days_old: list[int]):
+    db.execute(
+        "SELECT ensure_article_partitions(%s, CURRENT_DATE)", (date.today() - timedelta(days=max(days_old)),)
+    )
+    with db.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO articles (url, published_date, mentioned_country_code, avg_tone) VALUES (%s, %s, 'US', 1)",
+            [(f"https://a.example/{i}", date.today() - timedelta(days=d)) for i, d in enumerate(days_old)],
+        )
+    days = db.execute("SELECT array_agg(DISTINCT published_date) FROM articles").fetchone()[0]
+    db.execute("SELECT refresh_country_rollup(%s)", (days,))
+    db.execute("UPDATE articles SET specific_adm1_code = 'US06', specific_latitude = 34, specific_longitude = -118")
+    db.execute("SELECT refresh_geo_rollups(%s)", (days,))
+    db.execute("SELECT refresh_country_rolling(%s)", (days,))
+
+
+def _partitions(db) -> list[str]:
+    rows = db.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'articles'::regclass ORDER BY 1"
+    ).fetchall()
+    return [name for (name,) in rows]
+
+
+def _month(day: date) -> str:
+    return f"articles_{day:%Y_%m}"
+
+
+def test_partitioning_keeps_rows_and_ids(db):
+    _insert(db, [1, 40, 200])
+    before = db.execute("SELECT id, url, published_date FROM articles ORDER BY id").fetchall()
+    db.execute(PARTITIONED_SCHEMA.read_text())
+
+    assert db.execute("SELECT id, url, published_date FROM articles ORDER BY id").fetchall() == before
+    assert _month(date.today() - timedelta(days=200)) in _partitions(db)
+    (new_id,) = db.execute(
+        "INSERT INTO articles (url, published_date) VALUES ('https://a.example/new', CURRENT_DATE) RETURNING id"
+    ).fetchone()
+    assert new_id == max(row[0] for row in before) + 1
+
+
+def test_load_copy_creates_missing_partitions(partitioned_db):
+    df = pd.DataFrame([{"url": "https://a.example/x", "published_date": "2031-02-03", "themes": []}])
+    assert load_copy(df, DSN) == 1
+    assert "articles_2031_02" in _partitions(partitioned_db)
+
+
+def test_cleanup_drops_old_partitions_and_chunks_the_boundary(partitioned_db):
+    days_old = [1, 2, RETENTION_DAYS - 1, RETENTION_DAYS + 1, RETENTION_DAYS + 2, RETENTION_DAYS + 3, 400, 401]
+    _insert(partitioned_db, days_old)
+    client = _RpcClient(partitioned_db)
+
+    assert cleanup(client, retention_days=RETENTION_DAYS, batch_size=2) == 5
+
+    left = partitioned_db.execute("SELECT min(published_date), count(*) FROM articles").fetchone()
+    assert left == (date.today() - timedelta(days=RETENTION_DAYS - 1), 3)
+    assert _month(date.today() - timedelta(days=400)) not in _partitions(partitioned_db)
+    assert _month(CUTOFF) in _partitions(partitioned_db)
+    for rollup in ("country_daily_sentiment", "adm1_daily_sentiment", "grid_daily_sentiment"):
+        (rollup_min,) = partitioned_db.execute(f"SELECT min(published_date) FROM {rollup}").fetchone()
+        assert rollup_min >= CUTOFF
+    (window_min,) = partitioned_db.execute("SELECT min(as_of) FROM country_rolling_sentiment").fetchone()
+    assert window_min >= CUTOFF
+    # Boundary rows went in chunks of two, the last one short
+    assert client.calls.count("delete_articles_before") >= 2
+
+
+def test_cleanup_detach_only_keeps_expired_months(partitioned_db):
+    _insert(partitioned_db, [1, 400])
+    assert cleanup(_RpcClient(partitioned_db), retention_days=RETENTION_DAYS, detach_only=True) == 1
+
+    name = _month(date.today() - timedelta(days=400)) + "_detached"
+    assert partitioned_db.execute(f"SELECT count(*) FROM {name}").fetchone() == (1,)
+    assert partitioned_db.execute("SELECT count(*) FROM articles").fetchone() == (1,)
+
+
+def test_cleanup_unpartitioned_deletes_in_chunks(db, tmp_path):
+    _insert(db, [1, 200, 201, 202])
+    seen = SeenIndex(tmp_path / "seen.sqlite")
+    articles = pd.DataFrame({"url": ["https://a.example/new", "https://a.example/old"],
+                             "published_date": [date.today().isoformat(), "2000-01-01"]})
+    seen.record(hashes=seen.drop_unchanged(articles)[1])
+
+    client = _RpcClient(db)
+    assert cleanup(client, retention_days=RETENTION_DAYS, batch_size=2, seen_path=str(seen.path)) == 3
+    assert client.calls.count("delete_articles_before") == 2
+    assert db.execute("SELECT count(*) FROM articles").fetchone() == (1,)
+    # The seen-article index forgets rows past retention too
+    assert seen.drop_unchanged(articles)[0]["url"].tolist() == ["https://a.example/old"]
+    seen.close()
+
+
+def test_only_service_role_can_call_write_functions(partitioned_db):
+    _insert(partitioned_db, [1, 400])
+    partitioned_db.execute("SET ROLE anon")
+    try:
+        for call in (
+            "SELECT drop_article_partitions('2100-01-01')",
+            "SELECT delete_articles_before('2100-01-01')",
+            "SELECT delete_rollups_before('2100-01-01')",
+            "SELECT refresh_country_rollup(ARRAY[CURRENT_DATE])",
+            "SELECT bump_data_version()",
+        ):
+            with pytest.raises(psycopg.errors.InsufficientPrivilege):
+                partitioned_db.execute(call)
+        assert partitioned_db.execute("DELETE FROM articles RETURNING id").fetchall() == []
+    finally:
+        partitioned_db.execute("RESET ROLE")
+
+    partitioned_db.execute("SET ROLE service_role")
+    try:
+        (dropped,) = partitioned_db.execute(
+            "SELECT drop_article_partitions(%s)", (CUTOFF,)
+        ).fetchone()
+    finally:
+        partitioned_db.execute("RESET ROLE")
+    assert dropped == 1
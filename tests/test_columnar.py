@@ -0,0 +1,71 @@
+"""Tests for pipeline.columnar module."""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline.columnar import ARTICLE_SCHEMA, encode, raw_frame, to_table
+
+
+def _articles(n, offset=0):
+    return pd.DataFrame([
+        {
+            "url": f"https://example.com/{offset + i}",
+            "title": f"Story {offset + i}",
+            "source_name": "example.com",
+            "avg_tone": i / 2,
+            "published_date": "2025-06-15",
+            "themes": ["TAX_AI", f"THEME_{(offset + i) % 2}"],
+            "specific_location_type": 4 if i else None,
+            "specific_location_name": "Tokyo, Tokyo, Japan",
+            "specific_country_code": "JA",
+            "specific_adm1_code": None,
+            "specific_latitude": 35.68 if i else None,
+            "specific_longitude": 139.69,
+            "mentioned_location_type": 1,
+            "mentioned_location_name": "Japan",
+            "mentioned_country_code": "JA",
+            "mentioned_adm1_code": "JA40",
+            "mentioned_latitude": 35.68,
+            "mentioned_longitude": 139.69,
+        }
+        for i in range(n)
+    ], dtype=object)
+
+
+def test_encode_uses_dictionary_columns():
+    df = encode(_articles(3))
+    assert isinstance(df["source_name"].dtype, pd.CategoricalDtype)
+    assert list(df["source_name"].cat.categories) == ["example.com"]
+    assert df["specific_location_type"].tolist()[1:] == [4, 4]
+    assert df["specific_location_type"].isna().tolist() == [True, False, False]
+    assert df["themes"].tolist()[0] == ["TAX_AI", "THEME_0"]
+    assert df["specific_latitude"].isna().tolist() == [True, False, False]
+
+
+def test_to_table_round_trips_through_parquet(tmp_path):
+    df = encode(_articles(4))
+    df["headline_sentiment"] = [0.5, None, -0.25, 0.0]
+    table = to_table(df)
+    assert table.schema.field("themes").type == pa.list_(pa.dictionary(pa.int32(), pa.string()))
+    assert table.schema.field("specific_country_code").type == ARTICLE_SCHEMA.field("specific_country_code").type
+
+    pq.write_table(table, tmp_path / "articles.parquet")
+    back = pq.read_table(tmp_path / "articles.parquet")
+    assert back.column("themes").to_pylist() == table.column("themes").to_pylist()
+    assert back.column("headline_sentiment").to_pylist() == [0.5, None, -0.25, 0.0]
+
+
+def test_encode_after_concat_shares_dictionaries():
+    parts = [encode(_articles(2)), encode(_articles(2, offset=1))]
+    merged = encode(pd.concat(parts, ignore_index=True))
+    assert isinstance(merged["published_date"].dtype, pd.CategoricalDtype)
+    assert merged["themes"].tolist() == [
+        ["TAX_AI", "THEME_0"], ["TAX_AI", "THEME_1"], ["TAX_AI", "THEME_1"], ["TAX_AI", "THEME_0"],
+    ]
+
+
+def test_raw_frame_uses_arrow_strings():
+    raw = raw_frame(pd.DataFrame({"url": ["a", None], "raw_date": [1, 2]}, dtype=object))
+    assert raw["url"].array.__class__.__name__ == "ArrowStringArray"
+    assert pd.isna(raw.loc[1, "url"])
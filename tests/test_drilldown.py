@@ -0,0 +1,28 @@
+"""Tests for app.drilldown module."""
+
+from app.drilldown import PAGE_SIZE, ArticlePager
+
+
+def _row(i):
+    return {"id": i, "published_date": "2025-06-01", "avg_tone": -1.5, "title": "t", "source_name": "s", "url": "u"}
+
+
+def test_first_page_has_no_cursor():
+    params = ArticlePager("US", "2025-06-01", "2025-06-30").params()
+    assert "after_id" not in params
+    assert params["page_size"] == PAGE_SIZE
+
+
+def test_next_page_continues_after_last_row():
+    pager = ArticlePager("US", "2025-06-01", "2025-06-30", sort="negative")
+    pager.add_page([_row(i) for i in range(PAGE_SIZE)])
+    assert not pager.exhausted
+    params = pager.params()
+    assert (params["after_id"], params["after_tone"], params["after_date"]) == (PAGE_SIZE - 1, -1.5, "2025-06-01")
+
+
+def test_short_page_exhausts():
+    pager = ArticlePager("US", "2025-06-01", "2025-06-30")
+    pager.add_page([_row(1)])
+    assert pager.exhausted
+    assert len(pager.frame()) == 1
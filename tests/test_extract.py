@@ -0,0 +1,22 @@
+"""Tests for pipeline.extract query selection."""
+
+import pytest
+
+from pipeline.extract import PUSHDOWN_QUERY, QUERY, _query_text
+
+
+def test_query_text_by_mode():
+    assert _query_text("raw") == QUERY
+    assert _query_text("pushdown") == PUSHDOWN_QUERY
+    assert _query_text("pushdown", since=20250615000000).endswith("AND DATE > @since\n")
+
+
+def test_pushdown_query_leaves_blobs_in_bigquery():
+    select = PUSHDOWN_QUERY.split("FROM `gdelt-bq")[0]
+    for column in ("Extras AS", "V2Tone AS", "V2Themes AS", "SharingImage"):
+        assert column not in select
+
+
+def test_query_text_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="extract mode"):
+        _query_text("parquet")
@@ -0,0 +1,74 @@
+"""Tests for pipeline.gkg_files offline extraction."""
+
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.synthetic import make_raw, write_gkg_files
+from pipeline.extract import KEYWORDS
+from pipeline.gkg_files import bounded_map, extract_file_pages, extract_files, list_files, read_file
+from pipeline.transform import transform
+
+DAY = date(2025, 6, 15)
+
+
+def _matching(raw: pd.DataFrame) -> pd.DataFrame:
+    """Rows whose Extras contain a keyword, as ``QUERY``'s LIKE clauses select them."""
+    extras = raw["extras"].str.lower()
+    return raw[extras.str.contains("|".join(KEYWORDS)).fillna(False)].reset_index(drop=True)
+
+
+def test_extract_files_matches_keyword_filter(tmp_path):
+    raw = make_raw(3_000, seed=4)
+    write_gkg_files(raw, tmp_path, rows_per_file=1_000)
+
+    extracted = extract_files(tmp_path, DAY, DAY)
+    expected = _matching(raw)
+    assert list(extracted.columns) == list(raw.columns)
+    assert extracted["url"].tolist() == expected["url"].tolist()
+    pd.testing.assert_frame_equal(transform(extracted), transform(expected))
+
+
+def test_extract_file_pages_parallel_keeps_file_order(tmp_path):
+    write_gkg_files(make_raw(2_000, seed=5), tmp_path, rows_per_file=500)
+    serial = [df["url"].tolist() for df in extract_file_pages(tmp_path, DAY, DAY)]
+    parallel = [df["url"].tolist() for df in extract_file_pages(tmp_path, DAY, DAY, workers=2)]
+    assert len(serial) == 4
+    assert parallel == serial
+
+
+def test_read_file_since_and_invalid_rows(tmp_path):
+    raw = make_raw(500, seed=6)
+    (path,) = write_gkg_files(raw, tmp_path, rows_per_file=500)
+    # Append a truncated row, as interrupted mirror downloads leave them
+    name = path.name.removesuffix(".zip")
+    with zipfile.ZipFile(path) as archive:
+        text = archive.read(name).decode()
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(name, text + "broken\trow\n")
+
+    since = int(raw["raw_date"].median())
+    df, stats = read_file(path, since=since)
+    expected = _matching(raw)
+    assert df["url"].tolist() == expected.loc[expected["raw_date"] > since, "url"].tolist()
+    assert (stats.rows_read, stats.rows_invalid) == (500, 1)
+    assert stats.uncompressed_bytes == len(text) + len("broken\trow\n")
+
+
+def test_list_files_by_publication_day(tmp_path):
+    for name in ["20250614234500.gkg.csv.zip", "20250615000000.gkg.csv.zip", "20250616000000.gkg.csv.zip"]:
+        (tmp_path / name).touch()
+    (tmp_path / "20250615000000.export.CSV.zip").touch()
+    assert [p.name for p in list_files(tmp_path, DAY, DAY)] == ["20250615000000.gkg.csv.zip"]
+
+
+def test_bounded_map_limits_tasks_in_flight():
+    started = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = bounded_map(pool, lambda task: started.append(task) or task * 2, range(20), window=3)
+        for i, result in enumerate(results):
+            assert result == i * 2
+            # Only the window ahead of the consumer has been handed to the pool
+            assert len(started) <= i + 3
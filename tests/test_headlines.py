@@ -0,0 +1,105 @@
+"""Tests for pipeline.headlines module."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from pipeline import headlines
+from pipeline.headlines import HeadlineModel, ScoreCache, normalize_title, score_headlines
+
+
+def _articles(titles):
+    urls = [f"https://example.com/{i}" for i in range(len(titles))]
+    return pd.DataFrame({"url": urls, "title": [t if t is not None else u for t, u in zip(titles, urls)]})
+
+
+def test_normalize_title():
+    assert normalize_title("  AI  Breakthrough\tToday ") == "ai breakthrough today"
+
+
+def test_model_polarity_and_negation():
+    model = HeadlineModel()
+    scores = model.score(pd.Series([
+        "ai breakthrough boosts growth",
+        "ai crash sparks fears",
+        "ai is not safe",
+        "quarterly update",
+    ]))
+    assert scores[0] > 0.5
+    assert scores[1] < -0.5
+    assert scores[2] < 0
+    assert scores[3] == 0
+    assert ((scores >= -1) & (scores <= 1)).all()
+
+
+def test_score_headlines_skips_url_titles(tmp_path):
+    out = score_headlines(_articles(["AI breakthrough", None]), cache_path=tmp_path / "scores.sqlite")
+    assert out.loc[0, "headline_sentiment"] > 0
+    assert pd.isna(out.loc[1, "headline_sentiment"])
+
+
+def test_score_headlines_caches_by_normalized_title(tmp_path, monkeypatch):
+    path = tmp_path / "scores.sqlite"
+    first = score_headlines(_articles(["AI crash", "ai   CRASH", "Great AI"]), cache_path=path)
+    assert first.loc[0, "headline_sentiment"] == first.loc[1, "headline_sentiment"]
+
+    def fail(self, titles):
+        raise AssertionError("cached titles should not be re-scored")
+
+    monkeypatch.setattr(HeadlineModel, "score", fail)
+    second = score_headlines(_articles(["AI Crash", "great ai"]), cache_path=path)
+    assert second["headline_sentiment"].tolist() == pytest.approx(
+        [first.loc[0, "headline_sentiment"], first.loc[2, "headline_sentiment"]]
+    )
+
+
+def test_model_is_loaded_once_across_calls(monkeypatch):
+    loads = []
+
+    class CountingModel(HeadlineModel):
+        def __init__(self, *args):
+            loads.append(args)
+            super().__init__(*args)
+
+    monkeypatch.setattr(headlines, "HeadlineModel", CountingModel)
+    headlines.load_model.cache_clear()
+    try:
+        for titles in (["AI crash"], ["Great AI"], ["AI boom"]):
+            score_headlines(_articles(titles), cache_path=None)
+    finally:
+        headlines.load_model.cache_clear()
+    assert len(loads) == 1
+
+
+def test_lexicon_change_invalidates_cache(tmp_path):
+    lexicon = tmp_path / "lexicon.tsv"
+    lexicon.write_text("crash\t-2.0\n")
+    path = tmp_path / "scores.sqlite"
+    before = score_headlines(_articles(["AI crash"]), cache_path=path, model=HeadlineModel(lexicon))
+
+    lexicon.write_text("crash\t2.0\n")
+    after = score_headlines(_articles(["AI crash"]), cache_path=path, model=HeadlineModel(lexicon))
+    assert before.loc[0, "headline_sentiment"] == -after.loc[0, "headline_sentiment"]
+
+
+def test_cache_shared_by_concurrent_writers(tmp_path):
+    path = tmp_path / "scores.sqlite"
+
+    def write(worker):
+        # One connection per worker, as separate backfill processes would have
+        cache = ScoreCache(path)
+        try:
+            for batch in range(20):
+                cache.put_many({f"{worker}-{batch}-{i}": float(i) for i in range(200)})
+                cache.get_many([f"{worker}-{batch}-0"])
+        finally:
+            cache.close()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(write, range(6)))
+
+    cache = ScoreCache(path)
+    assert cache.conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert cache.conn.execute("SELECT count(*) FROM scores").fetchone() == (6 * 20 * 200,)
+    cache.close()
@@ -0,0 +1,104 @@
+"""Tests for pipeline.load against a local stand-in for the Supabase REST endpoint."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+from supabase import create_client
+
+from pipeline import load as load_module
+from pipeline.load import BatchSizer, load
+
+
+class _FakeRest(BaseHTTPRequestHandler):
+    """Accepts PostgREST upserts on /rest/v1/articles, failing the first ``fail_first``."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        if self.path.startswith("/rest/v1/rpc/"):
+            name = self.path.rsplit("/", 1)[-1]
+            with server.lock:
+                server.rpcs.append((name, body))
+            # intern_themes numbers names in request order
+            result = {n: i + 1 for i, n in enumerate(body["names"])} if name == "intern_themes" else 0
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(result).encode())
+            return
+        with server.lock:
+            server.requests += 1
+            fail = server.requests <= server.fail_first
+            if not fail:
+                server.rows.extend(body)
+        self.send_response(503 if fail else 201)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"message": "unavailable"}' if fail else b"[]")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rest_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeRest)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.fail_first = 0
+    server.rows = []
+    server.rpcs = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def _articles(n):
+    return pd.DataFrame({
+        "url": [f"https://example.com/{i}" for i in range(n)],
+        "published_date": ["2025-06-15"] * n,
+        "avg_tone": [float("nan") if i % 7 == 0 else i / 10 for i in range(n)],
+    })
+
+
+def _client(server):
+    return create_client(f"http://127.0.0.1:{server.server_address[1]}", "header.payload.signature")
+
+
+def test_load_upserts_every_row_once(rest_server):
+    loaded = load(_articles(1234), client=_client(rest_server), concurrency=3)
+    assert loaded == 1234
+    urls = [r["url"] for r in rest_server.rows]
+    assert sorted(urls) == sorted(set(urls)) and len(urls) == 1234
+    first = next(r for r in rest_server.rows if r["url"] == "https://example.com/0")
+    assert first["avg_tone"] is None
+    assert rest_server.rpcs == [
+        ("ensure_article_partitions", {"first_day": "2025-06-15", "last_day": "2025-06-15"}),
+    ]
+
+
+def test_load_retries_failed_batches(rest_server, monkeypatch):
+    monkeypatch.setattr(load_module, "BACKOFF_BASE_SECONDS", 0.001)
+    rest_server.fail_first = 2
+    loaded = load(_articles(300), client=_client(rest_server), concurrency=2)
+    assert loaded == 300
+    assert len(rest_server.rows) == 300
+
+
+def test_batch_sizer_adapts():
+    sizer = BatchSizer(initial=500)
+    sizer.observe(500, 0.1)
+    assert sizer.next_size() == 750
+    sizer.observe(750, 6.0)
+    assert sizer.next_size() == 250
+    sizer.failed()
+    assert sizer.next_size() == 125
+
+
+def test_batch_sizer_caps_payload():
+    sizer = BatchSizer(initial=5000, bytes_per_row=load_module.MAX_BATCH_BYTES / 100)
+    assert sizer.next_size() == 100
@@ -0,0 +1,75 @@
+"""Tests for pipeline.load_pg against a disposable Postgres (see conftest)."""
+
+import pandas as pd
+
+from pipeline.columnar import encode
+from pipeline.load_pg import load_copy
+from tests.conftest import TEST_DATABASE_URL as DSN, requires_db
+
+pytestmark = requires_db
+
+# An article's theme names, looked up from theme_ids in the themes dictionary
+THEME_NAMES = (
+    "ARRAY(SELECT t.name FROM unnest(theme_ids) WITH ORDINALITY AS u(id, n) "
+    "JOIN themes t ON t.id = u.id ORDER BY u.n)"
+)
+
+
+def _article(url, tone, themes, adm1=None):
+    return {
+        "url": url, "title": 'He said "AI", then left', "source_name": "example.com",
+        "avg_tone": tone, "published_date": "2025-06-15", "themes": themes,
+        "specific_location_type": 4, "specific_location_name": "Tokyo, Tokyo, Japan",
+        "specific_country_code": "JA", "specific_adm1_code": adm1,
+        "specific_latitude": 35.68, "specific_longitude": float("nan"),
+        "mentioned_location_type": 1, "mentioned_location_name": "",
+        "mentioned_country_code": "JA", "mentioned_adm1_code": None,
+        "mentioned_latitude": 35.68, "mentioned_longitude": 139.69,
+    }
+
+
+def test_load_copy_inserts_and_merges(db):
+    df = pd.DataFrame([
+        _article("https://example.com/a", 1.5, ["TAX_AI", 'WITH"QUOTE', "BACK\\SLASH"], "JA40"),
+        _article("https://example.com/b", -2.0, []),
+    ])
+    assert load_copy(df, DSN) == 2
+
+    row = db.execute(
+        f"SELECT title, {THEME_NAMES}, specific_longitude, mentioned_location_name, specific_adm1_code "
+        "FROM articles WHERE url = 'https://example.com/a'"
+    ).fetchone()
+    assert row == ('He said "AI", then left', ["TAX_AI", 'WITH"QUOTE', "BACK\\SLASH"], None, "", "JA40")
+
+    df.loc[0, "avg_tone"] = 9.0
+    assert load_copy(df, DSN) == 2
+    count, tone = db.execute(
+        "SELECT COUNT(*), MAX(avg_tone) FROM articles"
+    ).fetchone()
+    assert (count, tone) == (2, 9.0)
+
+
+def test_load_copy_accepts_encoded_frames(db):
+    df = encode(pd.DataFrame([
+        _article("https://example.com/a", 1.5, ["TAX_AI", "WB_AI"]),
+        {**_article("https://example.com/b", -2.0, ["TAX_AI"]), "mentioned_location_type": None},
+    ]))
+    assert load_copy(df, DSN) == 2
+
+    rows = db.execute(
+        f"SELECT {THEME_NAMES}, mentioned_location_type, specific_country_code FROM articles ORDER BY url"
+    ).fetchall()
+    assert rows == [(["TAX_AI", "WB_AI"], 1, "JA"), (["TAX_AI"], None, "JA")]
+
+
+def test_load_copy_interns_each_theme_once(db):
+    df = pd.DataFrame([
+        _article("https://example.com/a", 1.0, ["TAX_AI", "WB_AI"]),
+        _article("https://example.com/b", 2.0, ["WB_AI", "TAX_AI"]),
+    ])
+    load_copy(df, DSN)
+    load_copy(df.assign(themes=[["NEW_THEME"], []]), DSN)
+
+    assert db.execute("SELECT name FROM themes ORDER BY id").fetchall() == [("TAX_AI",), ("WB_AI",), ("NEW_THEME",)]
+    rows = db.execute("SELECT theme_ids, themes FROM articles ORDER BY url").fetchall()
+    assert rows == [([3], None), ([], None)]
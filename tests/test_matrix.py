@@ -0,0 +1,49 @@
+"""Tests for app.matrix module."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.matrix import SentimentCube, period_axis
+
+PAYLOAD = {
+    "periods": ["2025-06-01", "2025-06-03"],
+    "countries": ["JA", "US"],
+    "period_index": [0, 0, 1],
+    "country_index": [0, 1, 1],
+    "tone_sum": [-2.0, 4.0, 6.0],
+    "tone_count": [1, 2, 3],
+    "article_count": [1, 2, 3],
+}
+
+
+def test_period_axis_week_starts_monday():
+    axis = period_axis(date(2025, 6, 4), date(2025, 6, 20), "week")
+    assert axis[0] == np.datetime64("2025-06-02")
+    assert len(axis) == 3
+
+
+def test_from_payload_fills_gaps():
+    cube = SentimentCube.from_payload(PAYLOAD, date(2025, 6, 1), date(2025, 6, 3), "day")
+    assert cube.tone_sum.shape == (3, 2)
+    assert cube.article_count[1].sum() == 0
+    assert cube.avg_tone()[2, 1] == pytest.approx(2.0)
+
+
+def test_smoothed_rolling_weighted():
+    cube = SentimentCube.from_payload(PAYLOAD, date(2025, 6, 1), date(2025, 6, 3), "day").smoothed(3)
+    # US over all three days: (4 + 6) / (2 + 3)
+    assert cube.avg_tone()[2, 1] == pytest.approx(2.0)
+    assert cube.article_count[2, 0] == 1
+
+
+def test_to_long_skips_empty_cells():
+    long = SentimentCube.from_payload(PAYLOAD, date(2025, 6, 1), date(2025, 6, 3), "day").to_long()
+    assert list(long["period"]) == ["2025-06-01", "2025-06-01", "2025-06-03"]
+    assert list(long["country_code"]) == ["JA", "US", "US"]
+
+
+def test_from_payload_empty():
+    cube = SentimentCube.from_payload({"countries": []}, date(2025, 6, 1), date(2025, 6, 3), "day")
+    assert cube.to_long().empty
@@ -0,0 +1,87 @@
+"""Tests for pipeline.metrics and the instrumented pipeline run."""
+
+import json
+import threading
+
+from benchmarks.synthetic import make_raw
+from pipeline import metrics as metrics_module
+from pipeline import run as run_module
+from pipeline.headlines import score_headlines
+from pipeline.metrics import PROM_FILE, RunMetrics
+
+
+def test_stage_times_and_counters_accumulate_across_threads():
+    metrics = RunMetrics()
+
+    def page():
+        with metrics.stage("transform"):
+            metrics.add("transform", rows_in=10, rows_out=8, dropped={"no_country": 2})
+
+    threads = [threading.Thread(target=page) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = metrics.report()["stages"]["transform"]
+    assert (stats["calls"], stats["rows_in"], stats["rows_out"]) == (4, 40, 32)
+    assert stats["dropped"] == {"no_country": 8}
+    assert stats["seconds"] >= 0 and stats["rss_high_water_growth_bytes"] >= 0
+
+
+def test_rss_growth_is_reported_only_for_the_stage_that_raised_the_peak(monkeypatch):
+    peaks = iter([100, 400, 400, 400, 400])
+    monkeypatch.setattr(metrics_module, "peak_rss_bytes", lambda: next(peaks))
+    metrics = RunMetrics()
+    with metrics.stage("extract"):
+        pass
+    with metrics.stage("load"):
+        pass
+
+    stages = metrics.report()["stages"]
+    assert stages["extract"]["rss_high_water_growth_bytes"] == 300
+    assert stages["load"]["rss_high_water_growth_bytes"] == 0
+
+
+def test_write_emits_json_report_and_prometheus_textfile(tmp_path):
+    metrics = RunMetrics()
+    with metrics.stage("load"):
+        metrics.add("load", rows_in=5, rows_out=5, bytes=1234)
+
+    path = metrics.write(tmp_path, status="failed", rows_loaded=5)
+    report = json.loads(path.read_text())
+    assert report["status"] == "failed" and report["rows_loaded"] == 5
+    assert report["stages"]["load"]["bytes"] == 1234
+
+    prom = (tmp_path / PROM_FILE).read_text()
+    assert 'ai_sentiment_stage_bytes{stage="load"} 1234' in prom
+    assert "ai_sentiment_run_success 0" in prom
+
+
+def test_run_writes_stage_report(tmp_path, monkeypatch):
+    raw = make_raw(300, seed=2)
+    monkeypatch.setattr(run_module, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(run_module, "create_client", lambda *a: object())
+    monkeypatch.setattr(run_module, "read_watermark", lambda client: None)
+    monkeypatch.setattr(run_module, "extract", lambda *a, **kw: raw)
+    monkeypatch.setattr(run_module, "score_headlines", lambda df: score_headlines(df, cache_path=None))
+    monkeypatch.setattr(run_module, "load", lambda df, client, metrics: len(df))
+    monkeypatch.setattr(run_module, "refresh_rollups", lambda client, days: None)
+    monkeypatch.setattr(run_module, "refresh_rolling_stats", lambda client, days: 2)
+    monkeypatch.setattr(run_module, "publish_data_version", lambda client: 1)
+    monkeypatch.setattr(run_module, "advance_watermark", lambda client, mark: None)
+    monkeypatch.setattr(run_module, "cleanup", lambda: 3)
+
+    loaded = run_module.run(workers=1, seen_path=None)
+
+    report = json.loads(next(tmp_path.glob("run-*.json")).read_text())
+    stages = report["stages"]
+    assert report["status"] == "success" and report["rows_loaded"] == loaded
+    assert set(stages) == {"extract", "transform", "headlines", "load", "rollup", "rolling", "cleanup"}
+    assert stages["extract"]["rows_out"] == 300 and stages["extract"]["bytes"] > 0
+    transform = stages["transform"]
+    assert transform["rows_in"] - transform["rows_out"] == sum(transform["dropped"].values())
+    assert transform["dropped"]["no_country"] > 0
+    assert stages["load"]["rows_out"] == loaded
+    assert stages["rolling"]["rows_out"] == 2
+    assert stages["cleanup"]["dropped"] == {"retention": 3}
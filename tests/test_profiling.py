@@ -0,0 +1,69 @@
+"""Tests for pipeline.profiling and the offline stage profiler."""
+
+import pstats
+import threading
+import time
+
+from benchmarks.profile_stages import profile_stages
+from benchmarks.synthetic import make_raw
+from pipeline.metrics import RunMetrics
+from pipeline.profiling import StageProfiler
+
+
+def _busy(seconds: float) -> list[int]:
+    end = time.perf_counter() + seconds
+    chunks = []
+    while time.perf_counter() < end:
+        chunks.append(list(range(1000)))
+    return chunks
+
+
+def test_profiled_stages_write_pstats_allocations_and_stacks(tmp_path):
+    profiler = StageProfiler(tmp_path / "run", interval=0.001)
+    metrics = RunMetrics(profiler)
+    kept = []
+    with metrics.stage("transform"):
+        kept.append(_busy(0.05))
+    with metrics.stage("transform"):
+        _busy(0.02)
+    directory = profiler.write()
+
+    assert metrics.stages["transform"]["calls"] == 2
+    assert len(profiler.profiles["transform"]) == 2
+    functions = {func for _, _, func in pstats.Stats(str(directory / "transform.pstats")).stats}
+    assert "_busy" in functions
+    assert "test_profiling.py" in (directory / "transform.alloc.txt").read_text()
+    stacks = (directory / "stacks.collapsed").read_text().splitlines()
+    assert stacks and all(line.startswith("transform;") for line in stacks)
+    assert any(";tests.test_profiling:_busy " in line for line in stacks)
+
+
+def test_overlapping_stages_take_turns(tmp_path):
+    profiler = StageProfiler(tmp_path / "run")
+    spans = {}
+
+    def stage(name):
+        with profiler.stage(name):
+            start = time.perf_counter()
+            _busy(0.03)
+            spans[name] = (start, time.perf_counter())
+
+    threads = [threading.Thread(target=stage, args=(name,)) for name in ("extract", "load")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    (a_start, a_end), (b_start, b_end) = sorted(spans.values())
+    assert a_end <= b_start
+    assert set(profiler.profiles) == {"extract", "load"}
+
+
+def test_offline_profile_of_synthetic_rows(tmp_path):
+    profiler = StageProfiler(tmp_path / "run")
+    metrics = profile_stages(make_raw(300, seed=1), ["parse_locations", "to_table"], profiler)
+    directory = profiler.write()
+
+    assert set(metrics.stages) == {"parse_locations", "to_table"}
+    assert metrics.stages["parse_locations"]["rows_in"] == 300
+    assert "parse_locations" in (directory / "parse_locations.txt").read_text()
@@ -0,0 +1,166 @@
+"""Tests for pipeline.seen and skipping unchanged rows in a pipeline run."""
+
+from datetime import date
+
+import pytest
+
+from benchmarks.synthetic import make_raw
+from pipeline import run as run_module
+from pipeline import seen as seen_module
+from pipeline.headlines import score_headlines
+from pipeline.seen import SeenIndex
+from pipeline.transform import transform
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SeenIndex(tmp_path / "seen.sqlite")
+    yield index
+    index.close()
+
+
+def test_loaded_raw_rows_are_skipped_until_a_new_record_arrives(index):
+    raw = make_raw(400, seed=3)
+    kept, digests = index.drop_seen_raw(raw)
+    assert len(kept) == len(raw)
+    # Nothing is remembered until the rows are loaded
+    assert len(index.drop_seen_raw(raw)[0]) == len(raw)
+
+    index.record(digests)
+    kept, digests = index.drop_seen_raw(raw)
+    assert kept.empty and digests.empty
+
+    # A later GKG record for the same article and day brings the article back
+    updated = raw.copy()
+    updated.loc[5, "raw_date"] += 1500
+    kept, digests = index.drop_seen_raw(updated)
+    assert kept["url"].tolist() == [raw.loc[5, "url"]]
+    assert len(digests) == 1
+
+
+def test_only_changed_records_are_loaded(index):
+    clean = score_headlines(transform(make_raw(400, seed=3)), cache_path=None)
+    rows, hashes = index.drop_unchanged(clean)
+    assert len(rows) == len(clean)
+    index.record(hashes=hashes)
+
+    changed = clean.copy()
+    changed.loc[3, "avg_tone"] += 1
+    changed.loc[7, "themes"] = ["ONLY_THEME"]
+    rows, hashes = index.drop_unchanged(changed)
+    assert sorted(rows.index) == [3, 7]
+    assert len(hashes) == 2
+
+
+def test_transform_changes_clear_raw_digests(tmp_path, monkeypatch):
+    raw = make_raw(100, seed=4)
+    index = SeenIndex(tmp_path / "seen.sqlite")
+    index.record(index.drop_seen_raw(raw)[1])
+    index.close()
+
+    monkeypatch.setattr(seen_module, "code_version", lambda: "edited")
+    index = SeenIndex(tmp_path / "seen.sqlite")
+    assert len(index.drop_seen_raw(raw)[0]) == len(raw)
+    index.close()
+
+
+def test_forget_before(index):
+    clean = transform(make_raw(200, seed=5))
+    index.record(hashes=index.drop_unchanged(clean)[1])
+    cutoff = date.fromisoformat(sorted(clean["published_date"].astype(str))[len(clean) // 2])
+    older = int((clean["published_date"].astype(str) < cutoff.isoformat()).sum())
+
+    assert index.forget_before(cutoff) == older
+    assert len(index.drop_unchanged(clean)[0]) == older
+
+
+def _stub_run(monkeypatch, raw, calls, rollups=None):
+    """Point ``pipeline.run`` at ``raw`` and record loads, rollups and publishes in ``calls``."""
+    monkeypatch.setattr(run_module, "METRICS_DIR", "")
+    monkeypatch.setattr(run_module, "create_client", lambda *a: object())
+    monkeypatch.setattr(run_module, "read_watermark", lambda client: None)
+    monkeypatch.setattr(run_module, "extract", lambda *a, **kw: raw)
+    monkeypatch.setattr(run_module, "extract_pages", lambda *a, **kw: iter([raw.iloc[:150], raw.iloc[150:]]))
+    monkeypatch.setattr(run_module, "score_headlines", lambda df: score_headlines(df, cache_path=None))
+    monkeypatch.setattr(run_module, "load", lambda df, client, metrics: calls.append(len(df)) or len(df))
+    monkeypatch.setattr(run_module, "refresh_rollups", rollups or (lambda client, days: calls.append(list(days))))
+    monkeypatch.setattr(run_module, "refresh_rolling_stats", lambda client, days: 0)
+    monkeypatch.setattr(run_module, "publish_data_version", lambda client: calls.append("published"))
+    monkeypatch.setattr(run_module, "advance_watermark", lambda client, mark: None)
+    monkeypatch.setattr(run_module, "cleanup", lambda: 0)
+
+
+def test_rerun_loads_nothing_new(tmp_path, monkeypatch):
+    raw = make_raw(300, seed=2)
+    loads = []
+    _stub_run(monkeypatch, raw, loads)
+
+    first = run_module.run(workers=1, seen_path=str(tmp_path / "seen.sqlite"))
+    second = run_module.run(workers=1, seen_path=str(tmp_path / "seen.sqlite"))
+
+    assert first > 0 and second == 0
+    # The rerun neither loads rows, refreshes any day's rollups nor
+    # invalidates the dashboard's caches
+    assert loads[-3:] == ["published", 0, []]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_rows_are_seen_only_once_the_run_succeeds(tmp_path, monkeypatch, stream):
+    raw = make_raw(300, seed=2)
+    calls = []
+
+    def broken_rollups(client, days):
+        raise RuntimeError("rollup RPC failed")
+
+    _stub_run(monkeypatch, raw, calls, rollups=broken_rollups)
+    with pytest.raises(RuntimeError):
+        run_module.run(workers=1, stream=stream, seen_path=str(tmp_path / "seen.sqlite"))
+    failed_load = sum(calls)
+
+    calls.clear()
+    _stub_run(monkeypatch, raw, calls)
+    run_module.run(workers=1, stream=stream, seen_path=str(tmp_path / "seen.sqlite"))
+
+    # The retry loads the same rows again and refreshes their days
+    assert sum(c for c in calls if isinstance(c, int)) == failed_load > 0
+    assert any(isinstance(c, list) and c for c in calls) and "published" in calls
+
+
+def test_failed_streaming_run_records_nothing(tmp_path, monkeypatch):
+    raw = make_raw(300, seed=2)
+    calls = []
+    _stub_run(monkeypatch, raw, calls)
+
+    def second_page_fails(df, client, metrics):
+        if calls:
+            raise RuntimeError("upsert failed")
+        calls.append(len(df))
+        return len(df)
+
+    monkeypatch.setattr(run_module, "load", second_page_fails)
+    path = tmp_path / "seen.sqlite"
+    with pytest.raises(RuntimeError):
+        run_module.run(workers=1, stream=True, seen_path=str(path))
+
+    # The first page loaded and was staged, but nothing was kept
+    assert calls
+    index = SeenIndex(path)
+    try:
+        assert index.conn.execute("SELECT count(*) FROM seen").fetchone() == (0,)
+        assert index.conn.execute("SELECT count(*) FROM pending").fetchone() == (0,)
+    finally:
+        index.close()
+
+
+def test_staged_entries_apply_only_on_commit(index, tmp_path):
+    raw = make_raw(200, seed=6)
+    index.stage(index.drop_seen_raw(raw)[1])
+    # Staged entries of another run are neither visible nor committed by it
+    other = SeenIndex(tmp_path / "seen.sqlite")
+    other.commit()
+    other.close()
+    assert len(index.drop_seen_raw(raw)[0]) == len(raw)
+
+    index.commit()
+    assert index.drop_seen_raw(raw)[0].empty
+    assert index.conn.execute("SELECT count(*) FROM pending").fetchone() == (0,)
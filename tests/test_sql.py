@@ -0,0 +1,334 @@
+"""Tests for the SQL objects in setup_supabase.sql (see conftest)."""
+
+import threading
+import time
+
+import psycopg
+import pytest
+
+from tests.conftest import SCHEMA, TEST_DATABASE_URL, requires_db
+
+pytestmark = requires_db
+
+ARTICLES = [
+    # url, published_date, country, tone
+    ("https://a.example/1", "2025-06-01", "US", 1.0),
+    ("https://a.example/2", "2025-06-01", "US", 3.0),
+    ("https://a.example/3", "2025-06-01", "JA", -2.0),
+    ("https://a.example/4", "2025-06-02", "US", -1.0),
+    ("https://a.example/5", "2025-06-03", "GM", 4.0),
+    ("https://a.example/6", "2025-06-03", None, 4.0),
+]
+
+
+def _insert(db, rows):
+    with db.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO articles (url, published_date, mentioned_country_code, avg_tone) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def _by_country(db, start, end):
+    rows = db.execute("SELECT * FROM get_sentiment_by_country(%s, %s)", (start, end)).fetchall()
+    return {cc: (pytest.approx(tone), count) for cc, tone, count in rows}
+
+
+def test_setup_script_reruns_on_existing_database(db):
+    _insert(db, ARTICLES)
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01"],))
+
+    db.execute(SCHEMA.read_text())
+
+    assert db.execute("SELECT count(*) FROM articles").fetchone() == (6,)
+    assert _by_country(db, "2025-06-01", "2025-06-01")["US"] == (pytest.approx(2.0), 2)
+    (policies,) = db.execute("SELECT count(*) FROM pg_policies WHERE tablename = 'articles'").fetchone()
+    assert policies == 4
+
+
+def test_rollup_matches_raw_aggregate(db):
+    _insert(db, ARTICLES)
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01", "2025-06-02", "2025-06-03"],))
+
+    assert _by_country(db, "2025-06-01", "2025-06-03") == {
+        "US": (1.0, 3),
+        "JA": (-2.0, 1),
+        "GM": (4.0, 1),
+    }
+    assert _by_country(db, "2025-06-02", "2025-06-02") == {"US": (-1.0, 1)}
+
+
+def test_rollup_refresh_only_touches_given_days(db):
+    _insert(db, ARTICLES)
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01"],))
+    db.execute("UPDATE articles SET avg_tone = 10 WHERE url = 'https://a.example/4'")
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-02"],))
+
+    assert _by_country(db, "2025-06-01", "2025-06-02")["US"] == (pytest.approx(14 / 3), 3)
+
+
+@pytest.mark.parametrize(
+    "refresh_function", ["refresh_country_rollup", "refresh_geo_rollups", "refresh_country_rolling"]
+)
+def test_concurrent_refreshes_of_a_day_take_turns(db, refresh_function):
+    _insert(db, ARTICLES)
+    db.execute("UPDATE articles SET specific_adm1_code = 'USCA', specific_latitude = 34, specific_longitude = -118")
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01", "2025-06-02", "2025-06-03"],))
+    errors = []
+
+    def refresh():
+        try:
+            with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as other:
+                other.execute(f"SELECT {refresh_function}(%s::date[])", (["2025-06-01"],))
+        except Exception as exc:
+            errors.append(exc)
+
+    with psycopg.connect(TEST_DATABASE_URL) as first:
+        first.execute(f"SELECT {refresh_function}(%s::date[])", (["2025-06-01"],))
+        second = threading.Thread(target=refresh)
+        second.start()
+        time.sleep(0.3)
+        first.commit()
+    second.join()
+
+    assert errors == []
+    if refresh_function == "refresh_country_rollup":
+        assert _by_country(db, "2025-06-01", "2025-06-01")["US"] == (pytest.approx(2.0), 2)
+    elif refresh_function == "refresh_country_rolling":
+        # Every window ending 2025-06-01..03, e.g. the week to the 3rd
+        (count,) = db.execute("SELECT count(*) FROM country_rolling_sentiment").fetchone()
+        assert count == (3 + 3 + 1) * 3  # US and JA (from the 1st) every day, GM on the 3rd
+        (week,) = db.execute(
+            "SELECT tone_count FROM country_rolling_sentiment "
+            "WHERE country_code = 'US' AND as_of = '2025-06-03' AND window_days = 7"
+        ).fetchone()
+        assert week == 3
+    else:
+        (payload,) = db.execute("SELECT get_sentiment_by_adm1('2025-06-01', '2025-06-01')").fetchone()
+        assert payload["article_count"] == [3]
+
+
+def test_daily_sentiment_is_columnar_json(db):
+    _insert(db, ARTICLES)
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01", "2025-06-02"],))
+    (payload,) = db.execute(
+        "SELECT get_daily_sentiment_by_country('2025-06-01', '2025-06-02')"
+    ).fetchone()
+    assert payload["country_code"] == ["JA", "US", "US"]
+    assert payload["published_date"] == ["2025-06-01", "2025-06-01", "2025-06-02"]
+    assert payload["tone_sum"] == [-2.0, 4.0, -1.0]
+
+    (empty,) = db.execute("SELECT get_daily_sentiment_by_country('2024-01-01', '2024-01-02')").fetchone()
+    assert empty["country_code"] == []
+
+
+def test_sentiment_matrix_weekly(db):
+    _insert(db, ARTICLES)
+    db.execute("SELECT refresh_country_rollup(%s::date[])", (["2025-06-01", "2025-06-02", "2025-06-03"],))
+    (payload,) = db.execute("SELECT get_sentiment_matrix('2025-06-01', '2025-06-03', 'week')").fetchone()
+    # 2025-06-01 is a Sunday, so it falls in the week of 2025-05-26
+    assert payload["periods"] == ["2025-05-26", "2025-06-02"]
+    assert payload["countries"] == ["GM", "JA", "US"]
+    cells = list(zip(payload["period_index"], payload["country_index"], payload["article_count"]))
+    assert cells == [(0, 1, 1), (0, 2, 2), (1, 0, 1), (1, 2, 1)]
+
+
+@pytest.mark.parametrize("sort", ["recent", "negative", "positive"])
+def test_country_articles_keyset_pages(db, sort):
+    rows = [(f"https://b.example/{i}", f"2025-06-{1 + i % 5:02d}", "US", float(i % 4)) for i in range(23)]
+    _insert(db, rows + [("https://b.example/other", "2025-06-01", "JA", 0.0)])
+
+    seen = []
+    after = {"after_date": None, "after_tone": None, "after_id": None}
+    while True:
+        page = db.execute(
+            "SELECT id, avg_tone, published_date FROM get_country_articles("
+            "'US', '2025-06-01', '2025-06-30', sort => %(sort)s, page_size => 5, "
+            "after_date => %(after_date)s, after_tone => %(after_tone)s, after_id => %(after_id)s)",
+            {"sort": sort, **after},
+        ).fetchall()
+        seen.extend(page)
+        if len(page) < 5:
+            break
+        last_id, last_tone, last_date = page[-1]
+        after = {"after_date": last_date, "after_tone": last_tone, "after_id": last_id}
+
+    assert len(seen) == 23 and len({r[0] for r in seen}) == 23
+    key = {
+        "recent": lambda r: (r[2], r[0]),
+        "negative": lambda r: (-r[1], -r[0]),
+        "positive": lambda r: (r[1], r[0]),
+    }[sort]
+    assert seen == sorted(seen, key=key, reverse=True)
+
+
+def test_intern_themes_is_idempotent(db):
+    (first,) = db.execute("SELECT intern_themes(%s)", (["WB_AI", "TAX_AI"],)).fetchone()
+    (second,) = db.execute("SELECT intern_themes(%s)", (["TAX_AI", "NEW", "WB_AI"],)).fetchone()
+
+    assert set(first) == {"WB_AI", "TAX_AI"}
+    assert {k: second[k] for k in first} == first
+    assert db.execute("SELECT count(*) FROM themes").fetchone() == (3,)
+
+
+def test_anon_cannot_add_themes(db):
+    db.execute("SET ROLE anon")
+    try:
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            db.execute("INSERT INTO themes (name) VALUES ('SPAM')")
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            db.execute("SELECT intern_themes(ARRAY['SPAM'])")
+    finally:
+        db.execute("RESET ROLE")
+
+
+def test_sentiment_by_country_and_theme(db):
+    (ids,) = db.execute("SELECT intern_themes(%s)", (["TAX_AI", "WB_AI"],)).fetchone()
+    _insert(db, ARTICLES)
+    db.execute("UPDATE articles SET theme_ids = %s WHERE url IN ('https://a.example/1', 'https://a.example/3')",
+               ([ids["TAX_AI"], ids["WB_AI"]],))
+    db.execute("UPDATE articles SET theme_ids = %s WHERE url = 'https://a.example/2'", ([ids["WB_AI"]],))
+
+    rows = db.execute(
+        "SELECT * FROM get_sentiment_by_country_and_theme('2025-06-01', '2025-06-03', 'TAX_AI')"
+    ).fetchall()
+    assert sorted(rows) == [("JA", pytest.approx(-2.0), 1), ("US", pytest.approx(1.0), 1)]
+    assert db.execute(
+        "SELECT * FROM get_sentiment_by_country_and_theme('2025-06-01', '2025-06-03', 'UNKNOWN')"
+    ).fetchall() == []
+
+
+GEO_ARTICLES = [
+    # url, published_date, country, adm1, latitude, longitude, tone
+    ("https://g.example/1", "2025-06-01", "US", "USCA", 34.05, -118.25, 2.0),
+    ("https://g.example/2", "2025-06-01", "US", "USCA", 34.40, -118.90, -4.0),
+    ("https://g.example/3", "2025-06-02", "US", "USNY", 40.71, -74.01, 1.0),
+    ("https://g.example/4", "2025-06-02", "JA", "JA40", 35.68, 139.69, 3.0),
+    ("https://g.example/5", "2025-06-02", "JA", None, None, None, 5.0),
+]
+
+
+def _insert_geo(db, rows):
+    with db.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO articles (url, published_date, specific_country_code, specific_adm1_code, "
+            "specific_latitude, specific_longitude, avg_tone) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    db.execute("SELECT refresh_geo_rollups(%s::date[])", (["2025-06-01", "2025-06-02"],))
+
+
+def test_adm1_rollup(db):
+    _insert_geo(db, GEO_ARTICLES)
+
+    (payload,) = db.execute("SELECT get_sentiment_by_adm1('2025-06-01', '2025-06-02')").fetchone()
+    assert payload["adm1_code"] == ["JA40", "USCA", "USNY"]
+    assert payload["country_code"] == ["JA", "US", "US"]
+    assert payload["avg_tone"] == [pytest.approx(3.0), pytest.approx(-1.0), pytest.approx(1.0)]
+    assert payload["article_count"] == [1, 2, 1]
+
+    (us_day_one,) = db.execute("SELECT get_sentiment_by_adm1('2025-06-01', '2025-06-01', 'US')").fetchone()
+    assert us_day_one["adm1_code"] == ["USCA"]
+
+
+def test_grid_rollup_at_each_cell_size(db):
+    _insert_geo(db, GEO_ARTICLES)
+
+    (coarse,) = db.execute("SELECT get_sentiment_grid('2025-06-01', '2025-06-02', 5)").fetchone()
+    # Both Los Angeles articles share a 5-degree cell centred on (32.5, -117.5)
+    assert list(zip(coarse["latitude"], coarse["longitude"], coarse["article_count"])) == [
+        (32.5, -117.5, 2), (37.5, 137.5, 1), (42.5, -72.5, 1),
+    ]
+    assert coarse["avg_tone"][0] == pytest.approx(-1.0)
+
+    (fine,) = db.execute(
+        "SELECT get_sentiment_grid('2025-06-01', '2025-06-02', 0.25, "
+        "min_lat => 30, max_lat => 40, min_lon => -125, max_lon => -110)"
+    ).fetchone()
+    assert fine["article_count"] == [1, 1]
+    assert fine["latitude"] == [34.125, 34.375]
+
+    with pytest.raises(Exception, match="cell_deg must be one of"):
+        db.execute("SELECT get_sentiment_grid('2025-06-01', '2025-06-02', 2)")
+
+
+def _insert_days(db, first_day, last_day, per_day=3, shift_from=None):
+    """US articles on days ``first_day..last_day`` after 2025-01-01; tones cycle -2..2, +5 from ``shift_from``."""
+    rows = []
+    for day in range(first_day, last_day + 1):
+        shift = 5 if shift_from is not None and day >= shift_from else 0
+        rows += [(f"https://r.example/{day}/{i}", day, (day * per_day + i) % 5 - 2 + shift) for i in range(per_day)]
+    with db.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO articles (url, published_date, mentioned_country_code, avg_tone) "
+            "VALUES (%s, DATE '2025-01-01' + %s, 'US', %s)",
+            rows,
+        )
+    return db.execute(
+        "SELECT array_agg(d::date) FROM generate_series(DATE '2025-01-01' + %s, DATE '2025-01-01' + %s, '1 day') d",
+        (first_day, last_day),
+    ).fetchone()[0]
+
+
+def test_rolling_windows_match_direct_aggregate(db):
+    days = _insert_days(db, 0, 99)
+    db.execute("SELECT refresh_country_rollup(%s)", (days,))
+    db.execute("SELECT refresh_country_rolling(%s)", (days,))
+    # A later load adds days and changes one already rolled into the windows
+    days = _insert_days(db, 100, 119)
+    db.execute("UPDATE articles SET avg_tone = 9 WHERE url = 'https://r.example/95/0'")
+    days = [*days, db.execute("SELECT DATE '2025-01-01' + 95").fetchone()[0]]
+    db.execute("SELECT refresh_country_rollup(%s)", (days,))
+    db.execute("SELECT refresh_country_rolling(%s)", (days,))
+
+    rolled = db.execute(
+        "SELECT as_of, window_days, tone_sum / tone_count, tone_sq_sum / tone_count - (tone_sum / tone_count) ^ 2, "
+        "tone_count FROM country_rolling_sentiment WHERE country_code = 'US' ORDER BY 1, 2"
+    ).fetchall()
+    direct = db.execute(
+        "SELECT d::date, w, avg(a.avg_tone), var_pop(a.avg_tone), count(*) "
+        "FROM generate_series(DATE '2025-01-01', DATE '2025-01-01' + 119, '1 day') d "
+        "CROSS JOIN unnest(rolling_windows()) w "
+        "JOIN articles a ON a.published_date > d::date - w AND a.published_date <= d::date "
+        "GROUP BY 1, 2 ORDER BY 1, 2"
+    ).fetchall()
+    assert len(rolled) == len(direct) == 120 * 3
+    for got, want in zip(rolled, direct):
+        assert got[:2] == want[:2] and got[4] == want[4]
+        assert got[2] == pytest.approx(want[2]) and got[3] == pytest.approx(want[3], abs=1e-9)
+
+
+def test_tone_shift_alerts(db):
+    days = _insert_days(db, 0, 119, shift_from=110)
+    db.execute("SELECT refresh_country_rollup(%s)", (days,))
+    (alerts,) = db.execute("SELECT refresh_country_rolling(%s)", (days,)).fetchone()
+
+    (payload,) = db.execute("SELECT get_shift_alerts('2025-01-01', '2025-12-31')").fetchone()
+    assert alerts == len(payload["z_score"]) > 0
+    assert set(payload["country_code"]) == {"US"}
+    assert min(payload["as_of"]) >= "2025-04-21"  # day 110, when the shift starts
+    assert all(z >= 3 for z in payload["z_score"])
+    # Strongest first: the 7-day window once it is entirely after the shift
+    assert payload["window_days"][0] == 7 and payload["mean_tone"][0] == pytest.approx(5, abs=0.2)
+
+    # A stricter threshold, recomputing the same days, keeps fewer alerts
+    (fewer,) = db.execute("SELECT refresh_country_rolling(%s, z_threshold => 50)", (days,)).fetchone()
+    assert fewer < alerts
+
+
+def test_data_version_increments(db):
+    assert [db.execute("SELECT bump_data_version()").fetchone()[0] for _ in range(3)] == [1, 2, 3]
+    assert db.execute("SELECT value FROM pipeline_state WHERE key = 'data_version'").fetchone() == ("3",)
+
+
+def test_anon_cannot_write_pipeline_state(db):
+    db.execute("INSERT INTO pipeline_state (key, value) VALUES ('extract_watermark', '20250601000000')")
+    db.execute("SET ROLE anon")
+    try:
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            db.execute("INSERT INTO pipeline_state (key, value) VALUES ('data_version', '99')")
+        assert db.execute("UPDATE pipeline_state SET value = '0' RETURNING key").fetchall() == []
+        assert db.execute("SELECT value FROM pipeline_state").fetchall() == [("20250601000000",)]
+    finally:
+        db.execute("RESET ROLE")
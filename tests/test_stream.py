@@ -0,0 +1,103 @@
+"""Tests for pipeline.stream and the streaming extract and run paths."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_raw
+from pipeline import extract as extract_module
+from pipeline import run as run_module
+from pipeline.extract import extract, extract_pages
+from pipeline.headlines import score_headlines
+from pipeline.stream import threaded
+
+START, END = date(2025, 6, 9), date(2025, 6, 15)
+
+
+class _FakeBigQuery:
+    """Stands in for ``bigquery.Client``: every query returns ``rows``, whole or in pages."""
+
+    def __init__(self, rows: pd.DataFrame):
+        self.rows = rows
+        self.page_size = None
+
+    def query(self, query, job_config=None):
+        return self
+
+    def to_dataframe(self):
+        return self.rows.copy()
+
+    def result(self, page_size=None):
+        self.page_size = page_size
+        return self
+
+    def to_dataframe_iterable(self):
+        for i in range(0, len(self.rows), self.page_size):
+            yield self.rows.iloc[i : i + self.page_size].reset_index(drop=True)
+
+
+@pytest.fixture
+def bigquery(monkeypatch):
+    fake = _FakeBigQuery(make_raw(500, seed=8, day=END))
+    monkeypatch.setattr(extract_module.bigquery, "Client", lambda: fake)
+    monkeypatch.setattr(extract_module, "EXTRACT_CACHE_DIR", "")
+    return fake
+
+
+def test_threaded_preserves_order():
+    assert list(threaded(range(10), maxsize=2)) == list(range(10))
+
+
+def test_threaded_chains_stages():
+    doubled = threaded(x * 2 for x in threaded(range(5)))
+    assert list(doubled) == [0, 2, 4, 6, 8]
+
+
+def test_threaded_reraises_producer_error():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    items = threaded(failing())
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="boom"):
+        next(items)
+
+
+def test_extract_pages_match_extract(bigquery):
+    pages = list(extract_pages(START, END, page_size=120))
+    assert [len(page) for page in pages] == [120, 120, 120, 120, 20]
+
+    whole = extract(START, END)
+    pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), whole)
+
+
+def test_streaming_run_loads_the_same_rows_and_days(bigquery, monkeypatch):
+    # Several pages, so rows and days from different pages are combined
+    monkeypatch.setattr(run_module, "extract_pages", lambda *a, **kw: extract_pages(*a, page_size=120, **kw))
+    monkeypatch.setattr(run_module, "METRICS_DIR", "")
+    monkeypatch.setattr(run_module, "create_client", lambda *a: object())
+    monkeypatch.setattr(run_module, "score_headlines", lambda df: score_headlines(df, cache_path=None))
+    monkeypatch.setattr(run_module, "refresh_rolling_stats", lambda client, days: 0)
+    monkeypatch.setattr(run_module, "publish_data_version", lambda client: 1)
+    monkeypatch.setattr(run_module, "advance_watermark", lambda client, mark: None)
+    monkeypatch.setattr(run_module, "cleanup", lambda: 0)
+
+    def run(stream):
+        frames, days = [], []
+        monkeypatch.setattr(run_module, "load", lambda df, client, metrics: frames.append(df) or len(df))
+        monkeypatch.setattr(run_module, "refresh_rollups", lambda client, touched: days.extend(touched))
+        loaded = run_module.run(START, END, workers=1, stream=stream, gkg_dir=None, seen_path=None)
+        # Each page has its own categories; compare the values
+        rows = pd.concat([frame.astype({c: str for c in frame.select_dtypes("category")}) for frame in frames])
+        rows = rows.sort_values(["url", "published_date", "avg_tone"]).reset_index(drop=True)
+        return loaded, rows, days
+
+    loaded, rows, days = run(stream=False)
+    streamed, streamed_rows, streamed_days = run(stream=True)
+
+    assert streamed == loaded > 0
+    assert bigquery.page_size == 120
+    pd.testing.assert_frame_equal(streamed_rows, rows)
+    assert streamed_days == days
@@ -0,0 +1,34 @@
+"""Tests for interning theme names as ids."""
+
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.themes import theme_names, with_theme_ids
+
+
+def test_with_theme_ids_interns_distinct_names_once():
+    df = pd.DataFrame({
+        "url": ["a", "b", "c", "d"],
+        "themes": [["TAX_AI", "WB_AI"], ["WB_AI"], [], None],
+    })
+    calls = []
+
+    def intern(names):
+        calls.append(names)
+        return {name: 10 + i for i, name in enumerate(sorted(names))}
+
+    out = with_theme_ids(df, intern)
+
+    assert calls == [["TAX_AI", "WB_AI"]]
+    assert list(out.columns) == ["url", "theme_ids"]
+    assert out["theme_ids"].tolist() == [[10, 11], [11], [], None]
+
+
+def test_theme_names_accepts_arrow_lists():
+    themes = pd.Series([["B", "A"], ["A"]], dtype=pd.ArrowDtype(pa.list_(pa.string())))
+    assert sorted(theme_names(themes)) == ["A", "B"]
+
+
+def test_with_theme_ids_without_themes_is_a_no_op():
+    df = pd.DataFrame({"url": ["a"]})
+    assert with_theme_ids(df, lambda names: {}) is df
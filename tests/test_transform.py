@@ -3,6 +3,8 @@
 import pandas as pd
 import pytest
 
+from benchmarks.synthetic import make_raw
+from pipeline.columnar import encode, raw_frame
 from pipeline.transform import (
     parse_tone,
     parse_locations,
@@ -11,6 +13,9 @@ from pipeline.transform import (
     parse_date,
     parse_themes,
     transform,
+    transform_parallel,
+    _extract_title,
+    _transform_rowwise,
 )
 
 
@@ -32,6 +37,10 @@ def test_parse_tone_empty():
     assert parse_tone("") is None
 
 
+def test_parse_tone_nan():
+    assert parse_tone("nan,1.0") is None
+
+
 # --- parse_locations ---
 
 SINGLE_LOCATION = "4#Tokyo, Tokyo, Japan#JA#JA40#35.6895#139.6917#-1234567"
@@ -177,3 +186,150 @@ def test_transform_deduplicates():
 def test_transform_empty():
     result = transform(pd.DataFrame())
     assert result.empty
+
+
+def test_transform_matches_rowwise():
+    rows = [
+        {
+            "url": "https://example.com/a",
+            "extras": "<PAGE_TITLE>  Spaced  </PAGE_TITLE>",
+            "raw_locations": MULTI_LOCATIONS,
+            "raw_tone": "1.5,2.0",
+            "raw_date": 20250615120000,
+            "raw_themes": "A,1;B,2;A,3",
+        },
+        {
+            "url": "//cdn.example.org/b",
+            "extras": "<PAGE_TITLE>   </PAGE_TITLE>",
+            "raw_locations": "garbage#data;2#Paris, France#FR##48.85##-1;x#Bad#US##1#2#3",
+            "raw_tone": " 2 ,1",
+            "raw_date": "20250101000000",
+            "raw_themes": "",
+        },
+        {
+            "url": "not a url",
+            "extras": "<PAGE_TITLE>unterminated",
+            "raw_locations": "1#Nowhere###1#2#X;3#Somewhere#US#US06#nan#3#Y",
+            "raw_tone": "1e1,1",
+            "raw_date": 20240229235959,
+            "raw_themes": "  ;C ,5",
+        },
+        {
+            "url": "https://example.com/skip-tone",
+            "extras": None,
+            "raw_locations": SINGLE_LOCATION,
+            "raw_tone": "abc,1",
+            "raw_date": 20250615120000,
+            "raw_themes": "A,1",
+        },
+        {
+            "url": "https://example.com/skip-date",
+            "extras": None,
+            "raw_locations": SINGLE_LOCATION,
+            "raw_tone": "1.0",
+            "raw_date": 12345,
+            "raw_themes": "A,1",
+        },
+    ]
+    raw = pd.DataFrame(rows + rows[:1], dtype=object)
+    pd.testing.assert_frame_equal(transform(raw), encode(_transform_rowwise(raw)))
+
+
+def test_transform_parallel_matches_serial():
+    rows = []
+    for i in range(40):
+        rows.append({
+            "url": f"https://example.com/{i % 25}",
+            "extras": f"<PAGE_TITLE>Story {i}</PAGE_TITLE>",
+            "raw_locations": MULTI_LOCATIONS if i % 3 else "",
+            "raw_tone": f"{i / 10},1.0",
+            "raw_date": 20250615120000,
+            "raw_themes": "TAX_FNCACT_ARTIFICIAL_INTELLIGENCE,100",
+        })
+    raw = pd.DataFrame(rows)
+    expected = transform(raw).reset_index(drop=True)
+    result = transform_parallel(raw, workers=2, chunk_rows=7).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_transform_accepts_chunked_columns():
+    # Concatenated Arrow-backed frames (e.g. cached extract days) are chunked
+    rows = [
+        {
+            "url": f"https://example.com/{i}",
+            "extras": f"<PAGE_TITLE>Story {i}</PAGE_TITLE>",
+            "raw_locations": MULTI_LOCATIONS if i % 3 else SINGLE_LOCATION,
+            "raw_tone": f"{i / 10},1.0",
+            "raw_date": 20250615120000,
+            "raw_themes": "TAX_FNCACT_ARTIFICIAL_INTELLIGENCE,100;A,5",
+        }
+        for i in range(30)
+    ]
+    raw = raw_frame(pd.DataFrame(rows))
+    chunked = pd.concat([raw.iloc[:12], raw.iloc[12:]], ignore_index=True)
+    pd.testing.assert_frame_equal(transform(chunked), transform(raw))
+
+
+def test_transform_counts_drops_by_reason():
+    row = {
+        "url": "https://example.com/ok",
+        "extras": None,
+        "raw_locations": SINGLE_LOCATION,
+        "raw_tone": "1.0,1.0",
+        "raw_date": 20250615120000,
+        "raw_themes": "A,1",
+    }
+    raw = pd.DataFrame([
+        row,
+        row,
+        {**row, "url": "https://example.com/tone", "raw_tone": "abc"},
+        {**row, "url": "https://example.com/date", "raw_date": 12345},
+        {**row, "url": "https://example.com/country", "raw_locations": ""},
+    ])
+    result = transform(raw)
+    assert len(result) == 1
+    assert result.attrs["dropped"] == {"no_tone": 1, "no_date": 1, "no_country": 1, "duplicate": 1}
+    assert transform_parallel(raw, workers=2, chunk_rows=2).attrs["dropped"] == result.attrs["dropped"]
+
+
+def _pushdown(raw: pd.DataFrame, tone_filter: bool = True) -> pd.DataFrame:
+    """What ``PUSHDOWN_QUERY`` returns for ``raw``, computed with the scalar parsers.
+
+    Without ``tone_filter``, rows the query drops for lacking a tone are
+    kept with a NULL ``avg_tone``.
+    """
+    titles = [_extract_title(e, None) for e in raw["extras"].astype(object).where(raw["extras"].notna(), None)]
+    pushed = pd.DataFrame({
+        "url": raw["url"],
+        "raw_date": raw["raw_date"],
+        "title": titles,
+        "avg_tone": [parse_tone(t) for t in raw["raw_tone"]],
+        "published_date": [parse_date(d) for d in raw["raw_date"]],
+        "themes": [parse_themes(t) for t in raw["raw_themes"]],
+        "raw_locations": [";".join("#".join(e.split("#")[:6]) for e in v.split(";")) for v in raw["raw_locations"]],
+    })
+    has_country = [any(loc["country_code"] for loc in parse_locations(v)) for v in pushed["raw_locations"]]
+    keep = pd.Series(has_country) & (pushed["avg_tone"].notna() if tone_filter else True)
+    return raw_frame(pushed[keep].reset_index(drop=True))
+
+
+def test_transform_accepts_pushdown_extract(tmp_path):
+    raw = make_raw(2_000, seed=3)
+    raw.loc[:9, "raw_tone"] = ""
+    raw.loc[10:19, "raw_tone"] = "nan,1.0"
+    pushed = _pushdown(raw)
+    expected = transform(raw)
+    assert expected.attrs["dropped"]["no_tone"] == 20
+    assert len(_transform_rowwise(raw)) == len(expected)
+    pd.testing.assert_frame_equal(transform(pushed), expected)
+
+    # Rows without a tone that reach the client anyway are dropped the same way
+    unfiltered = _pushdown(raw, tone_filter=False)
+    result = transform(unfiltered)
+    pd.testing.assert_frame_equal(result, expected)
+    assert result.attrs["dropped"]["no_tone"] == unfiltered["avg_tone"].isna().sum() > 0
+
+    # As read back from the extract cache, themes are NumPy arrays
+    pushed.to_parquet(tmp_path / "day.parquet", index=False)
+    cached = pd.read_parquet(tmp_path / "day.parquet")
+    pd.testing.assert_frame_equal(transform(cached), expected)
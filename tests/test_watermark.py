@@ -0,0 +1,24 @@
+"""Tests for pipeline.watermark module."""
+
+from datetime import date
+
+import pandas as pd
+
+from pipeline.watermark import max_raw_date, partition_date, with_lookback
+
+
+def test_max_raw_date():
+    df = pd.DataFrame({"raw_date": [20250615120000, 20250616001500, 20250614235959]})
+    assert max_raw_date(df) == 20250616001500
+
+
+def test_max_raw_date_empty():
+    assert max_raw_date(pd.DataFrame()) is None
+
+
+def test_with_lookback_crosses_midnight():
+    assert with_lookback(20250616001500, 2) == 20250615221500
+
+
+def test_partition_date():
+    assert partition_date(20250615221500) == date(2025, 6, 15)